@@ -1,29 +1,139 @@
+from django.conf import settings
 from django.contrib import admin
+from django.contrib.admin.utils import unquote
+from django.db.models import Q
+from django.http import Http404
 
-from feed.models import Article, Author, Comment, LikeOnComment
+from feed.models import Article, Author, Comment, Job, LikeOnComment
+from feed.sharding import find_comment_shard, find_like_shard, get_article_shard, with_authors
+from pseudo_twitter.pagination import EstimatedCountPaginator
+from pseudo_twitter.sharding import using_shard
+
+DEFAULT_AUTHOR_SEARCH_LIMIT = 1000
+# Prefix matches, which the indexes of the columns serve
+AUTHOR_SEARCH_LOOKUPS = ["username__istartswith", "full_name__istartswith"]
+
+
+def find_author_ids(search_term: str) -> list[int]:
+    """
+    Ids of authors whose username or full name starts with the search term, at most ADMIN_AUTHOR_SEARCH_LIMIT
+    """
+    query = Q()
+    for lookup in AUTHOR_SEARCH_LOOKUPS:
+        query |= Q(**{lookup: search_term})
+    limit = getattr(settings, "ADMIN_AUTHOR_SEARCH_LIMIT", DEFAULT_AUTHOR_SEARCH_LIMIT)
+    return list(Author.all_objects.filter(query).order_by("pk").values_list("pk", flat=True)[:limit])
+
+
+class LargeTableAdmin(admin.ModelAdmin):
+    """
+    Changelist of a table with millions of rows: no full count next to the filtered one, capped counts
+    """
+    show_full_result_count = False
+    paginator = EstimatedCountPaginator
+
+
+class AuthoredAdmin(LargeTableAdmin):
+    """
+    Changelist of a sharded model with an author: authors are loaded and searched in the global database,
+    which may be another one than the database of the rows
+    """
+    # Authors are loaded by get_queryset, they may live in another database
+    list_select_related = []
+    author_fields = ["author"]
+
+    def get_queryset(self, request):
+        return with_authors(super().get_queryset(request), *self.author_fields)
+
+    def get_object_shard(self, object_id: int) -> str | None:
+        """
+        Shard holding the row, found through the directory of the model
+        :return: shard or None for an unknown row
+        """
+        raise NotImplementedError
+
+    def _view_on_shard(self, view, request, object_id, *args, **kwargs):
+        """
+        Run the view with queries of the form, its widgets and the template on the shard of the row
+        """
+        shard = None
+        if object_id:
+            try:
+                shard = self.get_object_shard(int(unquote(object_id)))
+            except ValueError:
+                raise Http404(f"Invalid {self.opts.verbose_name} id {object_id!r}")
+        with using_shard(shard):
+            response = view(request, object_id, *args, **kwargs)
+            if hasattr(response, "render"):
+                response.render()
+        return response
+
+    def changeform_view(self, request, object_id=None, form_url="", extra_context=None):
+        return self._view_on_shard(super().changeform_view, request, object_id, form_url, extra_context)
+
+    def delete_view(self, request, object_id, extra_context=None):
+        return self._view_on_shard(super().delete_view, request, object_id, extra_context)
+
+    def get_search_results(self, request, queryset, search_term):
+        search_term = search_term.strip()
+        if not search_term:
+            return queryset, False
+        if self.get_search_fields(request):
+            found, may_have_duplicates = super().get_search_results(request, queryset, search_term)
+        else:
+            found, may_have_duplicates = queryset.none(), False
+
+        author_ids = find_author_ids(search_term)
+        if author_ids:
+            found = found | queryset.filter(author_id__in=author_ids)
+        return found, may_have_duplicates
 
 
 @admin.register(Article)
-class ArticleAdmin(admin.ModelAdmin):
+class ArticleAdmin(AuthoredAdmin):
     list_display = ["id", "title", "author", "create_date"]
-    search_fields = ["title", "author"]
-    list_select_related = ["author"]
+    search_fields = ["title"]
+    autocomplete_fields = ["author"]
+    date_hierarchy = "create_date"
+
+    def get_object_shard(self, object_id):
+        return get_article_shard(object_id)
 
 
 @admin.register(Author)
-class AuthorAdmin(admin.ModelAdmin):
+class AuthorAdmin(LargeTableAdmin):
     list_display = ["id", "username", "full_name", "email", "registration_date"]
-    search_fields = ["username", "full_name", "email"]
+    search_fields = ["^username", "^full_name", "^email"]
+    ordering = ["id"]
 
 
 @admin.register(Comment)
-class CommentAdmin(admin.ModelAdmin):
+class CommentAdmin(AuthoredAdmin):
     list_display = ["id", "create_date", "author", "article", "comment_text"]
-    search_fields = ["author", "comment_text"]
-    list_select_related = ["author", "article", "parent_comment"]
+    search_fields = ["comment_text"]
+    list_select_related = ["article"]
+    autocomplete_fields = ["author"]
+    raw_id_fields = ["article", "parent_comment"]
+    date_hierarchy = "create_date"
+
+    def get_object_shard(self, object_id):
+        return find_comment_shard(object_id)
 
 
 @admin.register(LikeOnComment)
-class LikeOnCommentAdmin(admin.ModelAdmin):
+class LikeOnCommentAdmin(AuthoredAdmin):
     list_display = ["id", "comment", "author", "reaction", "create_date"]
-    list_select_related = ["author", "comment"]
+    list_select_related = ["comment"]
+    author_fields = ["author", "comment__author"]
+    autocomplete_fields = ["author"]
+    raw_id_fields = ["comment"]
+
+    def get_object_shard(self, object_id):
+        return find_like_shard(object_id)
+
+
+@admin.register(Job)
+class JobAdmin(LargeTableAdmin):
+    list_display = ["id", "name", "status", "attempts", "run_at", "update_date"]
+    list_filter = ["status", "name"]
+    search_fields = ["dedup_key"]
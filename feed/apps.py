@@ -1,6 +1,13 @@
 from django.apps import AppConfig
+from django.db.models.signals import post_migrate
 
 
 class FeedConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'feed'
+
+    def ready(self):
+        from feed import signals, tasks  # noqa: F401
+        from feed.sharding import reserve_shard_ids
+
+        post_migrate.connect(reserve_shard_ids, sender=self)
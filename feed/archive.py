@@ -0,0 +1,63 @@
+import datetime
+
+from django.conf import settings
+from django.utils import timezone
+
+from feed.models import Article
+from feed.sharding import move_article
+from pseudo_twitter.sharding import get_archive_database, get_shards
+
+DEFAULT_ARCHIVE_AFTER = 365 * 24 * 60 * 60
+DEFAULT_BATCH_SIZE = 100
+
+
+def get_archive_horizon(older_than: float | None = None) -> datetime.datetime:
+    """
+    :param older_than: age in seconds, ARCHIVE_AFTER by default
+    :return: threads without changes since this time are cold
+    """
+    if older_than is None:
+        older_than = getattr(settings, "ARCHIVE_AFTER", DEFAULT_ARCHIVE_AFTER)
+    return timezone.now() - datetime.timedelta(seconds=older_than)
+
+
+def find_cold_articles(shard: str, horizon: datetime.datetime, limit: int) -> list[int]:
+    """
+    Articles of the shard which neither they, their comments nor likes changed since the horizon
+    :return: article ids
+    """
+    articles = (
+        Article.all_objects.using(shard)
+        .filter(create_date__lt=horizon, update_date__lt=horizon, deleted_at__isnull=True)
+        .exclude(comment__update_date__gte=horizon)
+        .exclude(comment__likeoncomment__create_date__gte=horizon.date())
+        .order_by("pk")
+        .values_list("pk", flat=True)
+    )
+    return list(articles[:limit])
+
+
+def archive_articles(batch_size: int | None = None, older_than: float | None = None) -> tuple[int, bool]:
+    """
+    Move up to batch_size cold articles of every shard with their comments, likes and trending scores
+    to the archive database. The directory then points to the archive, so reads find them there
+    :param batch_size: max number of articles moved from one shard
+    :param older_than: age of cold threads in seconds, ARCHIVE_AFTER by default
+    :return: number of archived articles, True if no cold articles are left
+    """
+    archive = get_archive_database()
+    if archive is None:
+        return 0, True
+    batch_size = batch_size or getattr(settings, "ARCHIVE_BATCH_SIZE", DEFAULT_BATCH_SIZE)
+    horizon = get_archive_horizon(older_than)
+
+    archived = 0
+    done = True
+    for shard in get_shards():
+        article_ids = find_cold_articles(shard, horizon, batch_size)
+        if len(article_ids) == batch_size:
+            done = False
+        for article_id in article_ids:
+            if move_article(article_id, shard, archive):
+                archived += 1
+    return archived, done
@@ -0,0 +1,157 @@
+import copy
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core import signing
+from django.utils.crypto import constant_time_compare
+from drf_spectacular.extensions import OpenApiAuthenticationExtension
+from rest_framework import authentication, exceptions
+
+from feed.models import Author
+from pseudo_twitter.metrics import record_cache
+
+TOKEN_SALT = "feed.authentication.SignedTokenAuthentication"
+TOKEN_KEYWORD = b"bearer"
+
+DEFAULT_TOKEN_LIFETIME = 24 * 60 * 60
+DEFAULT_AUTHOR_CACHE_SIZE = 1024
+DEFAULT_AUTHOR_CACHE_TIMEOUT = 5
+
+# Length of the password fingerprint stored in the token: changing the password revokes tokens
+AUTH_HASH_LENGTH = 16
+
+
+class AuthorCache:
+    """
+    Small in-process LRU of authors by id.
+    Entries are dropped by feed.signals when an author is saved or deleted in this process
+    and expire after `timeout` seconds, so changes made by other workers (deactivation,
+    a new password) stop old tokens there within the timeout.
+    """
+
+    def __init__(self, max_size: int, timeout: float):
+        self.max_size = max_size
+        self.timeout = timeout
+        self._lock = threading.Lock()
+        self._authors = OrderedDict()
+
+    def get(self, author_id: int) -> Author | None:
+        with self._lock:
+            entry = self._authors.get(author_id)
+            if entry is None:
+                return None
+            author, expires = entry
+            if time.monotonic() >= expires:
+                del self._authors[author_id]
+                return None
+            self._authors.move_to_end(author_id)
+            return author
+
+    def set(self, author: Author):
+        with self._lock:
+            self._authors[author.pk] = (author, time.monotonic() + self.timeout)
+            self._authors.move_to_end(author.pk)
+            while len(self._authors) > self.max_size:
+                self._authors.popitem(last=False)
+
+    def invalidate(self, author_id: int):
+        with self._lock:
+            self._authors.pop(author_id, None)
+
+    def clear(self):
+        with self._lock:
+            self._authors.clear()
+
+
+author_cache = AuthorCache(
+    getattr(settings, "AUTH_AUTHOR_CACHE_SIZE", DEFAULT_AUTHOR_CACHE_SIZE),
+    getattr(settings, "AUTH_AUTHOR_CACHE_TIMEOUT", DEFAULT_AUTHOR_CACHE_TIMEOUT),
+)
+
+
+def get_token_lifetime() -> int:
+    return getattr(settings, "AUTH_TOKEN_LIFETIME", DEFAULT_TOKEN_LIFETIME)
+
+
+def issue_token(author: Author) -> str:
+    """
+    Create signed bearer token for the author
+    :param author: author instance
+    :return: token
+    """
+    payload = {
+        "a": author.pk,
+        "h": author.get_session_auth_hash()[:AUTH_HASH_LENGTH],
+    }
+    return signing.dumps(payload, salt=TOKEN_SALT)
+
+
+def get_cached_author(author_id: int) -> Author | None:
+    author = author_cache.get(author_id)
+    record_cache("author", author is not None)
+    if author is None:
+        author = Author.objects.filter(pk=author_id).first()
+        if author is None:
+            return None
+        author_cache.set(author)
+    # Every request gets its own instance, the cached one is shared between threads
+    return copy.copy(author)
+
+
+def authenticate_token(token: bytes) -> tuple[Author, dict]:
+    """
+    Verify signed bearer token
+    :param token: token of the Authorization header
+    :return: author and payload of the token
+    :raise AuthenticationFailed: for expired, forged or revoked tokens and inactive authors
+    """
+    try:
+        payload = signing.loads(token.decode(), salt=TOKEN_SALT, max_age=get_token_lifetime())
+    except signing.SignatureExpired:
+        raise exceptions.AuthenticationFailed("Token has expired.")
+    except (signing.BadSignature, UnicodeError, ValueError):
+        raise exceptions.AuthenticationFailed("Invalid token.")
+
+    author = get_cached_author(payload.get("a"))
+    if author is None or not author.is_active:
+        raise exceptions.AuthenticationFailed("User inactive or deleted.")
+
+    auth_hash = author.get_session_auth_hash()[:AUTH_HASH_LENGTH]
+    if not constant_time_compare(payload.get("h", ""), auth_hash):
+        raise exceptions.AuthenticationFailed("Invalid token.")
+    return author, payload
+
+
+class SignedTokenAuthentication(authentication.BaseAuthentication):
+    """
+    Authorization: Bearer <token>, where token is an HMAC-signed author id with a timestamp.
+    The token is verified without the database, the author comes from a short-lived in-process LRU.
+    """
+
+    def authenticate(self, request):
+        auth = authentication.get_authorization_header(request).split()
+        if not auth or auth[0].lower() != TOKEN_KEYWORD:
+            return None
+        if len(auth) != 2:
+            raise exceptions.AuthenticationFailed("Invalid token header.")
+        return authenticate_token(auth[1])
+
+    def authenticate_header(self, request):
+        return 'Bearer realm="api"'
+
+
+class SignedTokenScheme(OpenApiAuthenticationExtension):
+    """
+    Security scheme of SignedTokenAuthentication in the OpenAPI schema
+    """
+    target_class = SignedTokenAuthentication
+    name = "bearerAuth"
+
+    def get_security_definition(self, auto_schema):
+        return {
+            "type": "http",
+            "scheme": "bearer",
+            "description": "Token of POST /feed/token",
+        }
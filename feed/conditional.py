@@ -0,0 +1,108 @@
+import hashlib
+
+from django.db.models import Count, Max, Sum
+from django.utils.cache import get_conditional_response
+
+from feed.models import Article, Author, Comment
+from feed.response_cache import get_authors_version
+from pseudo_twitter.sharding import is_sharded, iter_shard_querysets
+
+
+def make_etag(*parts) -> str:
+    """
+    Strong ETag from values describing the state of a resource
+    :param parts: values, their repr must change with the resource
+    :return: quoted ETag
+    """
+    digest = hashlib.blake2b(repr(parts).encode(), digest_size=16).hexdigest()
+    return f'"{digest}"'
+
+
+def get_not_modified_response(request, etag: str):
+    """
+    Answer the conditional request before the body is built
+    :param request: request with If-None-Match / If-Match headers
+    :param etag: current ETag of the resource
+    :return: 304 / 412 response or None if the body must be sent
+    """
+    return get_conditional_response(request, etag=etag)
+
+
+def set_etag(response, etag: str):
+    if response.status_code == 200:
+        response["ETag"] = etag
+    return response
+
+
+def get_article_etag(article_id) -> str | None:
+    """
+    :return: ETag of the article or None if there is no such article
+    """
+    try:
+        article_id = int(article_id)
+    except (TypeError, ValueError):
+        return None
+
+    if not is_sharded():
+        state = Article.objects.filter(
+            pk=article_id
+        ).values_list(
+            "update_date", "comment_count", "author__full_name"
+        ).first()
+        if state is None:
+            return None
+        return make_etag("article", article_id, *state)
+
+    # The author lives in the global database
+    state = Article.objects.filter(pk=article_id).values_list("update_date", "comment_count", "author_id").first()
+    if state is None:
+        return None
+    update_date, comment_count, author_id = state
+    full_name = Author.objects.filter(pk=author_id).values_list("full_name", flat=True).first()
+    return make_etag("article", article_id, update_date, comment_count, full_name)
+
+
+def get_articles_etag(queryset, request) -> str:
+    states = [
+        shard_queryset.order_by().aggregate(
+            last_update=Max("update_date"),
+            count=Count("pk"),
+            comments=Sum("comment_count"),
+        )
+        for shard_queryset in iter_shard_querysets(queryset)
+    ]
+    last_updates = [state["last_update"] for state in states if state["last_update"] is not None]
+    comments = [state["comments"] for state in states if state["comments"] is not None]
+    state = (
+        max(last_updates, default=None),
+        sum(state["count"] for state in states),
+        sum(comments) if comments else None,
+    )
+    # Names of the authors are in the page too
+    return make_etag("articles", request.get_full_path(), get_authors_version(), *state)
+
+
+def get_comments_etag(article_id, request) -> str:
+    """
+    ETag of the thread shared by all users, see get_personal_etag
+    """
+    state = Comment.objects.visible().filter(
+        article=article_id
+    ).order_by().aggregate(
+        last_update=Max("update_date"),
+        count=Count("pk"),
+        likes=Sum("count_of_likes"),
+    )
+    # Names of the authors are in the thread too
+    return make_etag("comments", request.get_full_path(), get_authors_version(), *state.values())
+
+
+def get_personal_etag(etag: str, user, my_reactions: dict[int, str]) -> str:
+    """
+    ETag of a shared body with the reactions of the user added
+    :param etag: ETag of the shared body
+    :param user: request user
+    :param my_reactions: dict {comment id: reaction} of the user
+    :return: quoted ETag
+    """
+    return make_etag(etag, user.id, tuple(sorted(my_reactions.items())))
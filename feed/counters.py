@@ -0,0 +1,118 @@
+import threading
+from contextlib import contextmanager
+
+from django.db.models import Count, F, Min, OuterRef, Q, Subquery
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from feed.models import Article, Comment, LikeOnComment
+
+
+_state = threading.local()
+
+
+@contextmanager
+def suspend_counters():
+    """
+    Skip counter updates in the current thread, used when the counted rows are purged anyway
+    """
+    previous = getattr(_state, "suspended", False)
+    _state.suspended = True
+    try:
+        yield
+    finally:
+        _state.suspended = previous
+
+
+def counters_suspended() -> bool:
+    return getattr(_state, "suspended", False)
+
+
+def touch_updates(model) -> dict:
+    """
+    :return: update_date of rows whose counters change, so the delta-sync feed (feed.sync) sends them again
+    """
+    if any(field.name == "update_date" for field in model._meta.concrete_fields):
+        return {"update_date": timezone.now()}
+    return {}
+
+
+def change_counter(model, pk: int | None, field_name: str, delta: int) -> int:
+    """
+    Atomically change a counter with a single UPDATE, update_date of the row is bumped too
+    :param model: model with the counter
+    :param pk: primary key of the row, nothing is done for None
+    :param field_name: name of the counter field
+    :param delta: value added to the counter
+    :return: number of updated rows
+    """
+    if pk is None or not delta or counters_suspended():
+        return 0
+    queryset = model.objects.filter(pk=pk)
+    if delta < 0:
+        # A drifted counter stays at zero instead of failing the positive check
+        queryset = queryset.filter(**{f"{field_name}__gte": -delta})
+    return queryset.update(**{field_name: F(field_name) + delta}, **touch_updates(model))
+
+
+def change_comment_count(article_id: int | None, delta: int):
+    change_counter(Article, article_id, "comment_count", delta)
+
+
+def change_reply_count(comment_id: int | None, delta: int):
+    change_counter(Comment, comment_id, "reply_count", delta)
+
+
+def _count_subquery(queryset, field_name: str):
+    counts = queryset.filter(
+        **{field_name: OuterRef("pk")}
+    ).order_by().values(field_name).annotate(count=Count("pk")).values("count")
+    return Coalesce(Subquery(counts), 0)
+
+
+# (model, counter field, subquery with the real value)
+COUNTERS = (
+    (Article, "comment_count", lambda: _count_subquery(Comment.objects.all(), "article")),
+    (Comment, "reply_count", lambda: _count_subquery(Comment.objects.all(), "parent_comment")),
+    (Comment, "count_of_likes", lambda: _count_subquery(LikeOnComment.objects.all(), "comment")),
+)
+
+
+def iter_pk_chunks(model, first_pk: int, chunk_size: int):
+    """
+    Ranges [first, first + chunk_size) of primary keys from first_pk, gaps without rows are skipped
+    (ids of the shards start at their own offsets, feed.sharding.SHARD_ID_SPAN)
+    :return: generator of first primary keys of the ranges
+    """
+    while True:
+        first_pk = model.objects.filter(pk__gte=first_pk).aggregate(first_pk=Min("pk"))["first_pk"]
+        if first_pk is None:
+            return
+        yield first_pk
+        first_pk += chunk_size
+
+
+def reconcile_counter(model, field_name: str, real_value, first_pk: int, last_pk: int) -> int:
+    """
+    Repair drifted counters in a range of primary keys
+    :param model: model with the counter
+    :param field_name: name of the counter field
+    :param real_value: expression computing the real value for a row
+    :param first_pk: first primary key of the range (inclusive)
+    :param last_pk: last primary key of the range (exclusive)
+    :return: number of repaired rows
+    """
+    drifted = model.objects.filter(
+        pk__gte=first_pk,
+        pk__lt=last_pk
+    ).annotate(
+        real_value=real_value
+    ).filter(
+        ~Q(**{field_name: F("real_value")})
+    ).values_list("pk", flat=True)
+
+    drifted_ids = list(drifted)
+    if not drifted_ids:
+        return 0
+    model.objects.filter(pk__in=drifted_ids).update(**{field_name: real_value}, **touch_updates(model))
+    return len(drifted_ids)
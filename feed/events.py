@@ -0,0 +1,162 @@
+import json
+import threading
+import time
+from collections import OrderedDict, deque
+from dataclasses import dataclass
+
+from django.conf import settings
+
+DEFAULT_HISTORY_SIZE = 256
+DEFAULT_QUEUE_SIZE = 100
+DEFAULT_MAX_ARTICLES = 1000
+
+COMMENT_CREATED = "comment_created"
+COMMENT_UPDATED = "comment_updated"
+COMMENT_DELETED = "comment_deleted"
+REACTION_SET = "reaction_set"
+REACTION_DELETED = "reaction_deleted"
+RESET = "reset"
+
+
+@dataclass(frozen=True)
+class Event:
+    id: str
+    sequence: int
+    type: str
+    data: dict
+
+    def encode(self) -> bytes:
+        data = json.dumps(self.data, ensure_ascii=False, default=str)
+        return f"id: {self.id}\nevent: {self.type}\ndata: {data}\n\n".encode()
+
+
+class Subscription:
+    """
+    Events of one article for one connection, delivered into a bounded asyncio queue.
+    A consumer that does not keep up is marked as overflowed and must reconnect with Last-Event-ID.
+    """
+
+    def __init__(self, article_id, loop, queue):
+        self.article_id = article_id
+        self.loop = loop
+        self.queue = queue
+        self.overflowed = False
+
+    def push(self, event: Event):
+        # Called from any thread, the queue belongs to the event loop
+        self.loop.call_soon_threadsafe(self._put, event)
+
+    def _put(self, event: Event):
+        if self.overflowed:
+            return
+        if self.queue.full():
+            self.overflowed = True
+            return
+        self.queue.put_nowait(event)
+
+
+class ArticleHistory:
+    """
+    Last events of one article; events after complete_after are all present
+    """
+
+    def __init__(self, size: int, complete_after: int):
+        self.size = size
+        self.complete_after = complete_after
+        self.events = deque()
+
+    def append(self, event: Event):
+        if len(self.events) >= self.size:
+            self.complete_after = self.events.popleft().sequence
+        self.events.append(event)
+
+
+class Broker:
+    """
+    In-process pub/sub of article events with a short history per article for Last-Event-ID resume.
+    Event ids carry the broker start time, so ids of another process or of a previous run are detected.
+    """
+
+    def __init__(self, history_size: int, max_articles: int, queue_size: int):
+        self.history_size = history_size
+        self.max_articles = max_articles
+        self.queue_size = queue_size
+        self.boot = str(int(time.time() * 1000))
+        self._lock = threading.Lock()
+        self._sequence = 0
+        self._evicted = False
+        self._history = OrderedDict()
+        self._subscribers = {}
+
+    def publish(self, article_id: int, event_type: str, data: dict) -> Event:
+        with self._lock:
+            self._sequence += 1
+            event = Event(f"{self.boot}-{self._sequence}", self._sequence, event_type, data)
+
+            history = self._history.get(article_id)
+            if history is None:
+                # Until some history was evicted, no article had events before its first one
+                complete_after = self._sequence - 1 if self._evicted else 0
+                history = self._history[article_id] = ArticleHistory(self.history_size, complete_after)
+                if len(self._history) > self.max_articles:
+                    self._history.popitem(last=False)
+                    self._evicted = True
+            else:
+                self._history.move_to_end(article_id)
+            history.append(event)
+            subscribers = list(self._subscribers.get(article_id, ()))
+
+        for subscription in subscribers:
+            subscription.push(event)
+        return event
+
+    def subscribe(self, article_id: int, loop, queue, last_event_id: str | None = None) -> Subscription:
+        """
+        Subscribe to events of the article, events missed after last_event_id are queued at once
+        :param article_id: id of article
+        :param loop: event loop of the connection
+        :param queue: asyncio queue of the connection, at least queue_size long
+        :param last_event_id: value of the Last-Event-ID header
+        :return: subscription, to be passed to unsubscribe
+        """
+        subscription = Subscription(article_id, loop, queue)
+        with self._lock:
+            self._subscribers.setdefault(article_id, set()).add(subscription)
+            if last_event_id:
+                for event in self._missed_events(article_id, last_event_id):
+                    queue.put_nowait(event)
+        return subscription
+
+    def _missed_events(self, article_id: int, last_event_id: str) -> list[Event]:
+        reset = [Event(last_event_id, 0, RESET, {"article": article_id})]
+
+        boot, _, sequence = last_event_id.partition("-")
+        if boot != self.boot or not sequence.isdigit():
+            return reset
+        sequence = int(sequence)
+
+        history = self._history.get(article_id)
+        if history is None:
+            return reset if self._evicted else []
+        if sequence < history.complete_after:
+            return reset
+
+        missed = [event for event in history.events if event.sequence > sequence]
+        if len(missed) > self.queue_size:
+            return reset
+        return missed
+
+    def unsubscribe(self, subscription: Subscription):
+        with self._lock:
+            subscribers = self._subscribers.get(subscription.article_id)
+            if subscribers is not None:
+                subscribers.discard(subscription)
+                if not subscribers:
+                    del self._subscribers[subscription.article_id]
+
+
+broker = Broker(
+    history_size=getattr(settings, "EVENTS_HISTORY_SIZE", DEFAULT_HISTORY_SIZE),
+    max_articles=getattr(settings, "EVENTS_MAX_ARTICLES", DEFAULT_MAX_ARTICLES),
+    queue_size=getattr(settings, "EVENTS_QUEUE_SIZE", DEFAULT_QUEUE_SIZE),
+)
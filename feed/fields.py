@@ -0,0 +1,54 @@
+from django.core.exceptions import ValidationError
+from django.db import models
+from django.utils.functional import cached_property
+
+
+class CodedChoiceField(models.PositiveSmallIntegerField):
+    """
+    Choice stored as a small integer code: Python code, forms and the API see the choice values,
+    the database sees their codes. Codes are part of the stored data and must never change
+    """
+
+    def __init__(self, *args, codes: dict | None = None, **kwargs):
+        self.codes = dict(codes or {})
+        self.values_by_code = {code: value for value, code in self.codes.items()}
+        super().__init__(*args, **kwargs)
+
+    def deconstruct(self):
+        name, path, args, kwargs = super().deconstruct()
+        kwargs["codes"] = self.codes
+        return name, path, args, kwargs
+
+    @cached_property
+    def validators(self):
+        # Range validators of integer fields do not apply to the values
+        return [*self.default_validators, *self._validators]
+
+    def from_db_value(self, value, expression, connection):
+        if value is None:
+            return value
+        return self.values_by_code.get(value, value)
+
+    def to_python(self, value):
+        if value is None or value in self.codes:
+            return value
+        if value in self.values_by_code:
+            return self.values_by_code[value]
+        raise ValidationError(
+            self.error_messages["invalid_choice"], code="invalid_choice", params={"value": value}
+        )
+
+    def get_prep_value(self, value):
+        value = models.Field.get_prep_value(self, value)
+        if value is None:
+            return value
+        # Codes are accepted as well, e.g. in lookups built from stored data
+        if isinstance(value, int) and not isinstance(value, bool) and value in self.values_by_code:
+            return value
+        try:
+            return self.codes[value]
+        except (KeyError, TypeError):
+            raise ValueError(f"Field '{self.name}' got an unknown value {value!r}") from None
+
+    def value_to_string(self, obj):
+        return self.value_from_object(obj)
@@ -0,0 +1,214 @@
+import datetime
+import logging
+import threading
+import traceback
+
+from django.conf import settings
+from django.db import DatabaseError, IntegrityError, connections, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from feed.models import Job
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_RETRY_DELAY = 10
+DEFAULT_MAX_RETRY_DELAY = 60 * 60
+DEFAULT_LOCK_TIMEOUT = 10 * 60
+DEFAULT_HEARTBEAT_INTERVAL = 60
+CLAIM_CANDIDATES = 10
+
+handlers = {}
+scrubbers = {}
+
+
+def job(name: str, scrub=None):
+    """
+    Register function as a job handler.
+    The handler is called as handler(job, **payload) and must be safe to run again after a failure.
+    :param name: name of the job
+    :param scrub: callable returning the payload to keep once the job is done or failed for good,
+                  for payloads with secrets needed by retries only
+    """
+    def decorator(func):
+        handlers[name] = func
+        if scrub is not None:
+            scrubbers[name] = scrub
+        return func
+    return decorator
+
+
+def get_final_updates(finished_job: Job) -> dict:
+    """
+    Fields updated with the final status of the job, the scrubbed payload for jobs with a scrubber
+    """
+    scrub = scrubbers.get(finished_job.name)
+    if scrub is None:
+        return {}
+    return {"payload": scrub(finished_job.payload)}
+
+
+def enqueue(name: str, payload: dict | None = None, dedup_key: str | None = None,
+            run_at: datetime.datetime | None = None, max_attempts: int | None = None) -> Job:
+    """
+    Put job in the queue
+    :param name: name of a registered job
+    :param payload: keyword arguments of the handler, must be JSON serializable
+    :param dedup_key: if a pending job with this key exists, it is returned instead of a new one
+    :param run_at: time of the first run, now by default
+    :param max_attempts: number of runs before the job is marked as failed
+    :return: created or already pending job
+    """
+    if name not in handlers:
+        raise ValueError(f"Job {name} is not registered.")
+
+    data_for_created = {
+        "name": name,
+        "payload": payload or {},
+        "dedup_key": dedup_key,
+        "run_at": run_at or timezone.now(),
+    }
+    if max_attempts is not None:
+        data_for_created["max_attempts"] = max_attempts
+
+    try:
+        with transaction.atomic():
+            return Job.objects.create(**data_for_created)
+    except IntegrityError:
+        if dedup_key is None:
+            raise
+    pending_job = Job.objects.filter(dedup_key=dedup_key, status=Job.PENDING).first()
+    if pending_job is None:
+        # The pending job has just been claimed, so a new one is needed
+        return Job.objects.create(**data_for_created)
+    return pending_job
+
+
+def claim_next() -> Job | None:
+    """
+    Atomically move the next due job from pending to running
+    :return: claimed job or None if nothing is due
+    """
+    now = timezone.now()
+    candidate_ids = Job.objects.filter(
+        status=Job.PENDING,
+        run_at__lte=now
+    ).order_by("run_at", "id").values_list("pk", flat=True)[:CLAIM_CANDIDATES]
+
+    for job_id in candidate_ids:
+        claimed = Job.objects.filter(
+            pk=job_id,
+            status=Job.PENDING
+        ).update(
+            status=Job.RUNNING,
+            locked_at=now,
+            attempts=F("attempts") + 1
+        )
+        if claimed:
+            return Job.objects.get(pk=job_id)
+    return None
+
+
+def get_retry_delay(attempts: int) -> float:
+    retry_delay = getattr(settings, "JOBS_RETRY_DELAY", DEFAULT_RETRY_DELAY)
+    max_retry_delay = getattr(settings, "JOBS_MAX_RETRY_DELAY", DEFAULT_MAX_RETRY_DELAY)
+    return min(retry_delay * 2 ** (attempts - 1), max_retry_delay)
+
+
+class Heartbeat:
+    """
+    Refresh locked_at of a running job every JOBS_HEARTBEAT_INTERVAL seconds from a thread,
+    so a handler busy longer than JOBS_LOCK_TIMEOUT without reporting progress is not requeued as stale.
+    The heartbeat stops with the worker process, then requeue_stale_jobs picks the job up.
+    """
+
+    def __init__(self, job_id: int, interval: float | None = None):
+        self.job_id = job_id
+        if interval is None:
+            interval = getattr(settings, "JOBS_HEARTBEAT_INTERVAL", DEFAULT_HEARTBEAT_INTERVAL)
+        self.interval = interval
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self._run, name=f"feed-job-heartbeat-{job_id}", daemon=True)
+
+    def beat(self):
+        Job.objects.filter(pk=self.job_id, status=Job.RUNNING).update(locked_at=timezone.now())
+
+    def _run(self):
+        try:
+            while not self._stopped.wait(self.interval):
+                try:
+                    self.beat()
+                except DatabaseError:
+                    # The database may stay locked by a long write of the handler, the next beat retries
+                    logger.warning("Heartbeat of job %s failed", self.job_id, exc_info=True)
+        finally:
+            connections.close_all()
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._stopped.set()
+        self._thread.join()
+
+
+def run_job(claimed_job: Job):
+    """
+    Run claimed job and store the result; failed jobs are retried with exponential backoff.
+    The lock of the job is refreshed by a Heartbeat while the handler runs
+    :param claimed_job: job in the running status
+    """
+    handler = handlers.get(claimed_job.name)
+    try:
+        if handler is None:
+            raise LookupError(f"Job {claimed_job.name} is not registered.")
+        with Heartbeat(claimed_job.pk):
+            handler(claimed_job, **claimed_job.payload)
+    except Exception:
+        error = traceback.format_exc()
+        logger.exception("Job %s failed", claimed_job)
+
+        if claimed_job.attempts >= claimed_job.max_attempts:
+            Job.objects.filter(pk=claimed_job.pk).update(
+                status=Job.FAILED, locked_at=None, last_error=error, update_date=timezone.now(),
+                **get_final_updates(claimed_job)
+            )
+            return
+        run_at = timezone.now() + datetime.timedelta(seconds=get_retry_delay(claimed_job.attempts))
+        try:
+            Job.objects.filter(pk=claimed_job.pk).update(
+                status=Job.PENDING, locked_at=None, run_at=run_at, last_error=error, update_date=timezone.now()
+            )
+        except IntegrityError:
+            # Superseded: another pending job with the same key will do the work
+            Job.objects.filter(pk=claimed_job.pk).update(
+                status=Job.DONE, locked_at=None, last_error=error, update_date=timezone.now(),
+                **get_final_updates(claimed_job)
+            )
+        return
+
+    Job.objects.filter(pk=claimed_job.pk).update(
+        status=Job.DONE, locked_at=None, update_date=timezone.now(), **get_final_updates(claimed_job)
+    )
+
+
+def requeue_stale_jobs() -> int:
+    """
+    Return to the queue running jobs whose worker stopped without finishing them
+    :return: number of requeued jobs
+    """
+    lock_timeout = getattr(settings, "JOBS_LOCK_TIMEOUT", DEFAULT_LOCK_TIMEOUT)
+    locked_before = timezone.now() - datetime.timedelta(seconds=lock_timeout)
+
+    requeued = 0
+    stale_jobs = Job.objects.filter(status=Job.RUNNING, locked_at__lt=locked_before).values_list("pk", flat=True)
+    for job_id in list(stale_jobs):
+        try:
+            requeued += Job.objects.filter(pk=job_id, status=Job.RUNNING).update(status=Job.PENDING, locked_at=None)
+        except IntegrityError:
+            stale_job = Job.objects.get(pk=job_id)
+            Job.objects.filter(pk=job_id, status=Job.RUNNING).update(
+                status=Job.DONE, locked_at=None, **get_final_updates(stale_job)
+            )
+    return requeued
@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from feed.archive import DEFAULT_BATCH_SIZE, archive_articles
+from pseudo_twitter.sharding import get_archive_database
+
+
+class Command(BaseCommand):
+    help = "Move cold articles with their comments and likes from the shards to the archive database"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE)
+        parser.add_argument(
+            "--older-than", type=float, default=None, help="Age of cold threads in seconds, ARCHIVE_AFTER by default"
+        )
+
+    def handle(self, *args, **options):
+        archive = get_archive_database()
+        if archive is None:
+            raise CommandError("ARCHIVE_DATABASE is not set")
+
+        done = False
+        while not done:
+            archived, done = archive_articles(options["batch_size"], options["older_than"])
+            self.stdout.write(f"Moved {archived} articles to {archive}")
@@ -0,0 +1,66 @@
+import json
+import statistics
+import subprocess
+import sys
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+DEFAULT_REPEAT = 5
+DEFAULT_PATHS = ["/feed/article", "/api/schema/"]
+
+# Runs in a fresh interpreter: boot is everything up to a ready WSGI application,
+# the first request includes the lazy URLconf and view imports
+BOOT_SCRIPT = """
+import json, os, sys, time
+started = time.perf_counter()
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", sys.argv[1])
+from django.core.wsgi import get_wsgi_application
+application = get_wsgi_application()
+booted = time.perf_counter()
+from django.test import Client
+client = Client()
+result = {"boot": booted - started, "requests": []}
+for path in sys.argv[2:]:
+    first_started = time.perf_counter()
+    status = client.get(path).status_code
+    first = time.perf_counter() - first_started
+    second_started = time.perf_counter()
+    client.get(path)
+    second = time.perf_counter() - second_started
+    result["requests"].append({"path": path, "status": status, "first": first, "second": second})
+print(json.dumps(result))
+"""
+
+
+def format_ms(values: list[float]) -> str:
+    return "median {:.1f} ms, min {:.1f} ms, max {:.1f} ms".format(
+        statistics.median(values) * 1000, min(values) * 1000, max(values) * 1000
+    )
+
+
+class Command(BaseCommand):
+    help = "Measure worker boot time and first-request latency in fresh processes"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--repeat", type=int, default=DEFAULT_REPEAT)
+        parser.add_argument("--path", action="append", dest="paths", help="Path to request, may be repeated")
+
+    def handle(self, *args, **options):
+        paths = options["paths"] or DEFAULT_PATHS
+        runs = []
+        for _ in range(options["repeat"]):
+            process = subprocess.run(
+                [sys.executable, "-c", BOOT_SCRIPT, settings.SETTINGS_MODULE, *paths],
+                capture_output=True, text=True, cwd=settings.BASE_DIR
+            )
+            if process.returncode != 0:
+                raise CommandError(process.stderr)
+            runs.append(json.loads(process.stdout.strip().splitlines()[-1]))
+
+        self.stdout.write(f"boot: {format_ms([run['boot'] for run in runs])}")
+        for index, path in enumerate(paths):
+            requests = [run["requests"][index] for run in runs]
+            self.stdout.write(f"{path} [{requests[0]['status']}]")
+            self.stdout.write(f"  first request: {format_ms([request['first'] for request in requests])}")
+            self.stdout.write(f"  next request: {format_ms([request['second'] for request in requests])}")
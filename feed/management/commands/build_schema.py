@@ -0,0 +1,22 @@
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+
+from pseudo_twitter.schema import generate_schema, get_schema_file
+
+
+class Command(BaseCommand):
+    help = "Generate the OpenAPI schema into OPENAPI_SCHEMA_FILE, served as a static document by /api/schema/"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--file", help="Output path, OPENAPI_SCHEMA_FILE by default")
+
+    def handle(self, *args, **options):
+        path = Path(options["file"]) if options["file"] else get_schema_file()
+        if path is None:
+            raise CommandError("OPENAPI_SCHEMA_FILE is not set and --file is not given")
+
+        content = generate_schema()
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(content)
+        self.stdout.write(f"Schema written to {path} ({len(content)} bytes)")
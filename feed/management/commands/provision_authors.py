@@ -0,0 +1,37 @@
+import csv
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from feed.provisioning import provision_authors
+
+REQUIRED_COLUMNS = {"username", "password", "first_name", "last_name"}
+
+
+class Command(BaseCommand):
+    help = "Create authors from a CSV file with username, password, first_name, last_name and optional email " \
+           "columns, passwords are hashed in a process pool"
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="CSV file, - for standard input")
+        parser.add_argument("--batch-size", type=int, default=None)
+        parser.add_argument("--workers", type=int, default=None, help="Processes hashing passwords")
+
+    def handle(self, *args, **options):
+        path = options["path"]
+        with (open(path, newline="", encoding="utf-8") if path != "-" else sys.stdin) as file:
+            reader = csv.DictReader(file)
+            missing = REQUIRED_COLUMNS - set(reader.fieldnames or [])
+            if missing:
+                raise CommandError(f"Missing columns: {', '.join(sorted(missing))}")
+
+            created, skipped = provision_authors(
+                reader,
+                batch_size=options["batch_size"],
+                workers=options["workers"],
+                on_batch=lambda authors: self.stdout.write(f"Created {len(authors)} authors"),
+            )
+
+        if skipped:
+            self.stderr.write(f"Skipped {len(skipped)} taken usernames: {', '.join(skipped[:10])}")
+        self.stdout.write(f"Created {len(created)} authors")
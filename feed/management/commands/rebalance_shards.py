@@ -0,0 +1,51 @@
+from django.core.management.base import BaseCommand
+
+from feed.models import ArticleShard
+from feed.sharding import move_article, sweep_moved_articles
+from pseudo_twitter.sharding import get_all_shards, get_archive_database, get_ring, get_shards
+
+DEFAULT_BATCH_SIZE = 1000
+
+
+class Command(BaseCommand):
+    help = "Move articles with their comments and likes to the shards the hash ring assigns them, " \
+           "run after a shard is added to SHARDS"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE)
+        parser.add_argument("--dry-run", action="store_true", help="Only count the articles to move")
+
+    def handle(self, *args, **options):
+        batch_size = options["batch_size"]
+        shards = get_shards()
+        ring = get_ring()
+
+        moves = {}
+        last_id = 0
+        moved = 0
+        while True:
+            entries = list(
+                ArticleShard.objects.filter(pk__gt=last_id).order_by("pk").values_list("pk", "shard")[:batch_size]
+            )
+            if not entries:
+                break
+            last_id = entries[-1][0]
+            for article_id, source in entries:
+                target = ring.get_shard(article_id)
+                if source == target or not source or source == get_archive_database():
+                    # Archived threads stay in the archive
+                    continue
+                if source not in shards:
+                    self.stderr.write(f"Article {article_id} is on unknown shard {source}")
+                    continue
+                moves[(source, target)] = moves.get((source, target), 0) + 1
+                if not options["dry_run"] and move_article(article_id, source, target):
+                    moved += 1
+
+        for (source, target), count in sorted(moves.items()):
+            self.stdout.write(f"{source} -> {target}: {count} articles")
+        if options["dry_run"]:
+            return
+
+        swept = sum(sweep_moved_articles(shard, batch_size) for shard in get_all_shards())
+        self.stdout.write(f"Moved {moved} articles, deleted {swept} leftover copies")
@@ -0,0 +1,28 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Max
+
+from feed.models import Author, AuthorStats
+from feed.stats import rebuild_author_stats
+
+DEFAULT_CHUNK_SIZE = 1000
+
+
+class Command(BaseCommand):
+    help = "Recompute statistics of all authors from articles, comments and likes in chunks of primary keys"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE)
+
+    def handle(self, *args, **options):
+        chunk_size = options["chunk_size"]
+
+        # Rows of purged authors are removed by the cascade, rows of tombstoned ones are not needed
+        AuthorStats.objects.filter(author__deleted_at__isnull=False).delete()
+
+        last_pk = Author.objects.aggregate(last_pk=Max("pk"))["last_pk"] or 0
+        rebuilt = 0
+        for first_pk in range(0, last_pk + 1, chunk_size):
+            with transaction.atomic():
+                rebuilt += rebuild_author_stats(first_pk, first_pk + chunk_size)
+        self.stdout.write(f"Statistics rebuilt for {rebuilt} authors")
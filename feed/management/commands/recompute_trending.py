@@ -0,0 +1,29 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from feed.trending import DEFAULT_BATCH_SIZE, recompute_trending
+from pseudo_twitter.sharding import get_all_shards
+
+DEFAULT_INTERVAL = 60
+
+
+class Command(BaseCommand):
+    help = "Incrementally recompute time-decayed trending scores of articles"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE)
+        parser.add_argument("--loop", action="store_true", help="Keep recomputing every --interval seconds")
+        parser.add_argument("--interval", type=float, default=DEFAULT_INTERVAL)
+
+    def handle(self, *args, **options):
+        while True:
+            for shard in get_all_shards():
+                caught_up = False
+                while not caught_up:
+                    updated, caught_up = recompute_trending(options["batch_size"], shard)
+                    self.stdout.write(f"Trending scores updated for {updated} articles on {shard}")
+
+            if not options["loop"]:
+                break
+            time.sleep(options["interval"])
@@ -0,0 +1,32 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from feed.counters import COUNTERS, iter_pk_chunks, reconcile_counter
+from pseudo_twitter.sharding import get_all_shards, using_shard
+
+DEFAULT_CHUNK_SIZE = 1000
+
+
+class Command(BaseCommand):
+    help = "Recount denormalized comment, reply and like counters in chunks of primary keys"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE)
+
+    def handle(self, *args, **options):
+        chunk_size = options["chunk_size"]
+
+        for shard in get_all_shards():
+            with using_shard(shard):
+                self.reconcile_shard(shard, chunk_size)
+
+    def reconcile_shard(self, shard: str, chunk_size: int):
+        for model, field_name, real_value in COUNTERS:
+            repaired = 0
+            for first_pk in iter_pk_chunks(model, 0, chunk_size):
+                # Short transactions keep the write lock free for requests between chunks
+                with transaction.atomic(using=shard):
+                    repaired += reconcile_counter(model, field_name, real_value(), first_pk, first_pk + chunk_size)
+
+            model_name = model._meta.model_name
+            self.stdout.write(f"{shard}: {model_name}.{field_name}: repaired {repaired} rows")
@@ -0,0 +1,56 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections, connections
+
+from feed.jobs import claim_next, requeue_stale_jobs, run_job
+
+DEFAULT_WORKERS = 2
+DEFAULT_POLL_INTERVAL = 1.0
+
+
+def run_in_thread(claimed_job, slots):
+    try:
+        run_job(claimed_job)
+    finally:
+        # Worker threads own their connections to the global database and the shards
+        connections.close_all()
+        slots.release()
+
+
+class Command(BaseCommand):
+    help = "Run background jobs from the database queue in a thread pool"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS)
+        parser.add_argument("--poll-interval", type=float, default=DEFAULT_POLL_INTERVAL)
+        parser.add_argument("--once", action="store_true", help="Stop when no job is due")
+
+    def handle(self, *args, **options):
+        workers = options["workers"]
+        slots = threading.BoundedSemaphore(workers)
+
+        requeued = requeue_stale_jobs()
+        if requeued:
+            self.stdout.write(f"Requeued {requeued} stale jobs")
+
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="feed-job") as executor:
+            try:
+                while True:
+                    slots.acquire()
+                    close_old_connections()
+                    claimed_job = claim_next()
+                    if claimed_job is None:
+                        slots.release()
+                        if options["once"]:
+                            break
+                        time.sleep(options["poll_interval"])
+                        requeue_stale_jobs()
+                        continue
+
+                    self.stdout.write(f"Running job {claimed_job}")
+                    executor.submit(run_in_thread, claimed_job, slots)
+            except KeyboardInterrupt:
+                self.stdout.write("Stopping, waiting for running jobs")
@@ -0,0 +1,42 @@
+# Generated by Django 5.1.2 on 2026-10-19 12:33
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def fill_counters(apps, schema_editor):
+    Article = apps.get_model("feed", "Article")
+    Comment = apps.get_model("feed", "Comment")
+    db_alias = schema_editor.connection.alias
+
+    comments = Comment.objects.filter(
+        article=OuterRef("pk")
+    ).order_by().values("article").annotate(count=Count("pk")).values("count")
+    Article.objects.using(db_alias).update(comment_count=Coalesce(Subquery(comments), 0))
+
+    replies = Comment.objects.filter(
+        parent_comment=OuterRef("pk")
+    ).order_by().values("parent_comment").annotate(count=Count("pk")).values("count")
+    Comment.objects.using(db_alias).update(reply_count=Coalesce(Subquery(replies), 0))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('feed', '0003_alter_author_first_name_alter_author_full_name_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='article',
+            name='comment_count',
+            field=models.PositiveIntegerField(default=0, verbose_name='Количество комментариев'),
+        ),
+        migrations.AddField(
+            model_name='comment',
+            name='reply_count',
+            field=models.PositiveIntegerField(default=0, verbose_name='Количество ответов'),
+        ),
+        migrations.RunPython(fill_counters, migrations.RunPython.noop),
+    ]
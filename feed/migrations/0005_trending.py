@@ -0,0 +1,40 @@
+# Generated by Django 5.1.2 on 2026-10-19 12:35
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('feed', '0004_article_comment_count_comment_reply_count'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TrendingState',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('last_comment_id', models.BigIntegerField(default=0)),
+                ('last_like_id', models.BigIntegerField(default=0)),
+                ('last_run', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'verbose_name': 'Состояние пересчета рейтинга',
+                'verbose_name_plural': 'Состояния пересчета рейтинга',
+            },
+        ),
+        migrations.CreateModel(
+            name='ArticleTrendingScore',
+            fields=[
+                ('article', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='trending_score', serialize=False, to='feed.article', verbose_name='Запись')),
+                ('score', models.FloatField(default=0, verbose_name='Рейтинг')),
+                ('update_date', models.DateTimeField(auto_now=True, verbose_name='Дата пересчета рейтинга')),
+            ],
+            options={
+                'verbose_name': 'Рейтинг записи',
+                'verbose_name_plural': 'Рейтинги записей',
+                'indexes': [models.Index(fields=['-score', 'article'], name='feed_trending_score_idx')],
+            },
+        ),
+    ]
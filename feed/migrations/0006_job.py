@@ -0,0 +1,38 @@
+# Generated by Django 5.1.2 on 2026-10-19 12:35
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('feed', '0005_trending'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Job',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100, verbose_name='Имя задачи')),
+                ('payload', models.JSONField(blank=True, default=dict, verbose_name='Параметры задачи')),
+                ('status', models.CharField(choices=[('pending', 'pending'), ('running', 'running'), ('done', 'done'), ('failed', 'failed')], default='pending', max_length=10, verbose_name='Статус')),
+                ('dedup_key', models.CharField(blank=True, max_length=255, null=True, verbose_name='Ключ дедупликации')),
+                ('attempts', models.PositiveIntegerField(default=0, verbose_name='Количество попыток')),
+                ('max_attempts', models.PositiveIntegerField(default=5, verbose_name='Максимальное количество попыток')),
+                ('run_at', models.DateTimeField(default=django.utils.timezone.now, verbose_name='Время запуска')),
+                ('locked_at', models.DateTimeField(blank=True, null=True, verbose_name='Время захвата обработчиком')),
+                ('progress', models.JSONField(blank=True, default=dict, verbose_name='Прогресс')),
+                ('last_error', models.TextField(blank=True, verbose_name='Последняя ошибка')),
+                ('create_date', models.DateTimeField(auto_now_add=True, verbose_name='Дата создания задачи')),
+                ('update_date', models.DateTimeField(auto_now=True, verbose_name='Дата обновления задачи')),
+            ],
+            options={
+                'verbose_name': 'Фоновая задача',
+                'verbose_name_plural': 'Фоновые задачи',
+                'indexes': [models.Index(fields=['status', 'run_at'], name='feed_job_status_run_at_idx')],
+                'constraints': [models.UniqueConstraint(condition=models.Q(('status', 'pending')), fields=('dedup_key',), name='feed_job_pending_dedup_key')],
+            },
+        ),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 5.1.2 on 2026-10-19 12:37
+
+import django.contrib.auth.models
+import feed.models
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('feed', '0006_job'),
+    ]
+
+    operations = [
+        migrations.AlterModelManagers(
+            name='author',
+            managers=[
+                ('objects', feed.models.AuthorManager()),
+                ('all_objects', django.contrib.auth.models.UserManager()),
+            ],
+        ),
+        migrations.AddField(
+            model_name='article',
+            name='deleted_at',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='Дата удаления'),
+        ),
+        migrations.AddField(
+            model_name='author',
+            name='deleted_at',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='Дата удаления'),
+        ),
+    ]
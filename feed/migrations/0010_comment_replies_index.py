@@ -0,0 +1,17 @@
+# Generated by Django 5.1.2 on 2026-10-19 12:50
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('feed', '0009_author_stats'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='comment',
+            index=models.Index(fields=['parent_comment', 'create_date', 'id'], name='feed_comment_replies_idx'),
+        ),
+    ]
@@ -0,0 +1,66 @@
+# Generated by Django 5.1.2 on 2026-10-19 12:59
+
+import django.db.models.deletion
+from django.conf import settings
+from django.core.management.color import no_style
+from django.db import migrations, models
+
+BATCH_SIZE = 1000
+
+
+def fill_directory(apps, schema_editor):
+    """
+    Existing articles stay in the database they were created in
+    """
+    connection = schema_editor.connection
+    if connection.alias != getattr(settings, "SHARDS_GLOBAL_DATABASE", "default"):
+        return
+    Article = apps.get_model("feed", "Article")
+    ArticleShard = apps.get_model("feed", "ArticleShard")
+
+    article_ids = Article.objects.using(connection.alias).order_by("pk").values_list("pk", flat=True)
+    ArticleShard.objects.using(connection.alias).bulk_create(
+        [ArticleShard(pk=article_id, shard=connection.alias) for article_id in article_ids.iterator()],
+        batch_size=BATCH_SIZE
+    )
+    # Explicit ids do not move the sequence on every database
+    with connection.cursor() as cursor:
+        for sql in connection.ops.sequence_reset_sql(no_style(), [ArticleShard]):
+            cursor.execute(sql)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('feed', '0010_comment_replies_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArticleShard',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('shard', models.CharField(max_length=100, verbose_name='Шард')),
+            ],
+            options={
+                'verbose_name': 'Шард записи',
+                'verbose_name_plural': 'Шарды записей',
+            },
+        ),
+        migrations.AlterField(
+            model_name='article',
+            name='author',
+            field=models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL, verbose_name='Автор записи'),
+        ),
+        migrations.AlterField(
+            model_name='comment',
+            name='author',
+            field=models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL, verbose_name='Автор комментария'),
+        ),
+        migrations.AlterField(
+            model_name='likeoncomment',
+            name='author',
+            field=models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.RunPython(fill_directory, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,88 @@
+# Generated by Django 5.1.2 on 2026-10-19 13:40
+
+import feed.fields
+from django.db import migrations, models
+
+# Codes of LikeOnComment.REACTION_CODES at the time of the migration
+REACTION_CODES = {
+    '&#128077;': 1,
+    '&#128557;': 2,
+    '&#128562;': 3,
+    '&#128514;': 4,
+    '&#129505;': 5,
+}
+# Reactions were not validated before this migration, unknown ones become likes, so the counters of likes stay true
+DEFAULT_REACTION_CODE = REACTION_CODES['&#128077;']
+CHUNK_SIZE = 1000
+
+
+def iter_pk_ranges(queryset):
+    """
+    (first pk, last pk) of consecutive chunks of the rows, so every update touches at most CHUNK_SIZE rows
+    """
+    last_pk = 0
+    while True:
+        pks = list(queryset.filter(pk__gt=last_pk).order_by("pk").values_list("pk", flat=True)[:CHUNK_SIZE])
+        if not pks:
+            return
+        yield pks[0], pks[-1]
+        last_pk = pks[-1]
+
+
+def fill_reaction_codes(apps, schema_editor):
+    LikeOnComment = apps.get_model("feed", "LikeOnComment")
+    likes = LikeOnComment.objects.using(schema_editor.connection.alias)
+    for first_pk, last_pk in iter_pk_ranges(likes):
+        chunk = likes.filter(pk__gte=first_pk, pk__lte=last_pk)
+        for reaction, code in REACTION_CODES.items():
+            chunk.filter(reaction=reaction).update(reaction_code=code)
+        chunk.filter(reaction_code__isnull=True).update(reaction_code=DEFAULT_REACTION_CODE)
+
+
+def fill_reaction_texts(apps, schema_editor):
+    LikeOnComment = apps.get_model("feed", "LikeOnComment")
+    likes = LikeOnComment.objects.using(schema_editor.connection.alias)
+    for first_pk, last_pk in iter_pk_ranges(likes):
+        chunk = likes.filter(pk__gte=first_pk, pk__lte=last_pk)
+        for reaction, code in REACTION_CODES.items():
+            chunk.filter(reaction_code=code).update(reaction=reaction)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('feed', '0012_admin_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='likeoncomment',
+            name='reaction_code',
+            field=models.PositiveSmallIntegerField(null=True),
+        ),
+        # Nullable, so that a rollback can add the column back before filling it
+        migrations.AlterField(
+            model_name='likeoncomment',
+            name='reaction',
+            field=models.CharField(choices=[('&#128077;', 'like'), ('&#128557;', 'cry'), ('&#128562;', 'surprise'), ('&#128514;', 'laugh'), ('&#129505;', 'heart')], max_length=50, null=True, verbose_name='Текстовый код эмоции'),
+        ),
+        migrations.RunPython(fill_reaction_codes, fill_reaction_texts),
+        migrations.RemoveField(
+            model_name='likeoncomment',
+            name='reaction',
+        ),
+        migrations.RenameField(
+            model_name='likeoncomment',
+            old_name='reaction_code',
+            new_name='reaction',
+        ),
+        migrations.AlterField(
+            model_name='likeoncomment',
+            name='reaction',
+            field=feed.fields.CodedChoiceField(choices=[('&#128077;', 'like'), ('&#128557;', 'cry'), ('&#128562;', 'surprise'), ('&#128514;', 'laugh'), ('&#129505;', 'heart')], codes={'&#128077;': 1, '&#128557;': 2, '&#128562;': 3, '&#128514;': 4, '&#129505;': 5}, verbose_name='Код эмоции'),
+        ),
+        migrations.AddIndex(
+            model_name='likeoncomment',
+            index=models.Index(fields=['comment', 'reaction'], name='feed_like_comment_reaction_idx'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.1.2 on 2026-10-19 13:39
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('feed', '0013_like_reaction_codes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='trendingstate',
+            name='epoch',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
@@ -1,5 +1,42 @@
-from django.contrib.auth.models import AbstractUser
+from django.contrib.auth.models import AbstractUser, UserManager
 from django.db import models
+from django.db.models import Q
+from django.utils import timezone
+
+from feed.fields import CodedChoiceField
+from pseudo_twitter.sharding import shard_atomic
+
+
+def make_full_name(first_name: str, last_name: str) -> str:
+    return f"{first_name} {last_name}"
+
+
+class AuthorManager(UserManager):
+    """
+    Authors without tombstoned ones, they are kept until the background purge removes them
+    """
+
+    def get_queryset(self):
+        return super().get_queryset().filter(deleted_at__isnull=True)
+
+
+class ArticleManager(models.Manager):
+    """
+    Articles without tombstoned ones, they are kept until the background purge removes them
+    """
+
+    def get_queryset(self):
+        return super().get_queryset().filter(deleted_at__isnull=True)
+
+
+class CommentQuerySet(models.QuerySet):
+    def visible(self):
+        """
+        Comments without ones on tombstoned articles or by tombstoned authors
+        """
+        from feed.sharding import exclude_deleted_authors
+
+        return exclude_deleted_authors(self.filter(article__deleted_at__isnull=True))
 
 
 class Author(AbstractUser):
@@ -7,50 +44,91 @@ class Author(AbstractUser):
     last_name = models.CharField(max_length=150, verbose_name="Фамилия автора")
     full_name = models.CharField(max_length=255, verbose_name="Полное имя автора", blank=True)
     registration_date = models.DateField(auto_now_add=True, verbose_name="Дата регистрации")
+    deleted_at = models.DateTimeField(null=True, blank=True, verbose_name="Дата удаления")
+
+    objects = AuthorManager()
+    all_objects = UserManager()
 
     class Meta:
         verbose_name = "Автор"
         verbose_name_plural = "Авторы"
+        indexes = [
+            models.Index(fields=["full_name"], name="feed_author_full_name_idx"),
+        ]
 
     def __str__(self):
         author_id = self.id
         return f"{author_id} {self.full_name}"
 
     def save(self, *args, **kwargs):
-        first_name = self.first_name
-        last_name = self.last_name
-        self.full_name = f"{first_name} {last_name}"
+        self.full_name = make_full_name(self.first_name, self.last_name)
         super(Author, self).save(*args, **kwargs)
 
 
 class Article(models.Model):
     title = models.CharField(max_length=100, verbose_name="Заголовок")
     content = models.TextField(verbose_name="Текст записи")
-    author = models.ForeignKey(Author, on_delete=models.CASCADE, verbose_name="Автор записи")
+    # Authors live in the global database, articles may live on another shard
+    author = models.ForeignKey(Author, on_delete=models.CASCADE, db_constraint=False, verbose_name="Автор записи")
     create_date = models.DateTimeField(auto_now_add=True, verbose_name="Дата создания записи")
     update_date = models.DateTimeField(auto_now=True, verbose_name="Дата обновления записи")
+    comment_count = models.PositiveIntegerField(default=0, verbose_name="Количество комментариев")
+    deleted_at = models.DateTimeField(null=True, blank=True, verbose_name="Дата удаления")
+
+    objects = ArticleManager()
+    all_objects = models.Manager()
 
     class Meta:
         verbose_name = "Запись"
         verbose_name_plural = "Записи"
+        indexes = [
+            models.Index(fields=["update_date", "id"], name="feed_article_update_date_idx"),
+            models.Index(fields=["create_date", "id"], name="feed_article_create_date_idx"),
+        ]
 
     def __str__(self):
         article_id = self.id
         return f"{article_id} {self.title}"
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Loaded author, used by feed.signals to move author statistics
+        instance.loaded_author_id = instance.__dict__.get("author_id")
+        return instance
+
+    def save(self, *args, **kwargs):
+        from feed.sharding import allocate_article_id, get_instance_shard
+
+        if self.pk is None:
+            self.pk = allocate_article_id()
+            kwargs["force_insert"] = True
+        using = get_instance_shard(self, kwargs.pop("using", None))
+        # Statistics are updated by post_save receivers inside the same transactions
+        with shard_atomic(using):
+            super(Article, self).save(*args, using=using, **kwargs)
+
 
 class Comment(models.Model):
     comment_text = models.CharField(max_length=100, verbose_name="Текст комментария")
     create_date = models.DateTimeField(auto_now_add=True, verbose_name="Дата создания комментария")
     update_date = models.DateTimeField(auto_now=True, verbose_name="Дата обновления комментария")
-    author = models.ForeignKey(Author, on_delete=models.CASCADE, verbose_name="Автор комментария")
+    author = models.ForeignKey(Author, on_delete=models.CASCADE, db_constraint=False, verbose_name="Автор комментария")
     article = models.ForeignKey(Article, on_delete=models.CASCADE, default=None, verbose_name="Запись")
     parent_comment = models.ForeignKey("self", on_delete=models.CASCADE, null=True, blank=True)
     count_of_likes = models.PositiveIntegerField(default=0)
+    reply_count = models.PositiveIntegerField(default=0, verbose_name="Количество ответов")
+
+    objects = CommentQuerySet.as_manager()
 
     class Meta:
         verbose_name = "Комментарий"
         verbose_name_plural = "Комментарии"
+        indexes = [
+            models.Index(fields=["article", "update_date", "id"], name="feed_comment_update_date_idx"),
+            models.Index(fields=["parent_comment", "create_date", "id"], name="feed_comment_replies_idx"),
+            models.Index(fields=["create_date", "id"], name="feed_comment_create_date_idx"),
+        ]
 
     def __str__(self):
         comment_id = self.id
@@ -58,6 +136,23 @@ class Comment(models.Model):
         author_full_name = self.author.full_name
         return f"{comment_id} Комментарий от {create_date} от {author_full_name}"
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Loaded position in the tree and author, used by feed.signals to move counters on change
+        instance.loaded_article_id = instance.__dict__.get("article_id")
+        instance.loaded_parent_comment_id = instance.__dict__.get("parent_comment_id")
+        instance.loaded_author_id = instance.__dict__.get("author_id")
+        return instance
+
+    def save(self, *args, **kwargs):
+        from feed.sharding import get_instance_shard
+
+        using = get_instance_shard(self, kwargs.pop("using", None))
+        # Counters are updated by post_save receivers inside the same transactions
+        with shard_atomic(using):
+            super(Comment, self).save(*args, using=using, **kwargs)
+
 
 class LikeOnComment(models.Model):
     LIKE = "&#128077;"
@@ -73,9 +168,17 @@ class LikeOnComment(models.Model):
         (LAUGH, "laugh"),
         (HEART, "heart"),
     )
+    # Stored codes of the reactions, the API keeps the text codes
+    REACTION_CODES = {
+        LIKE: 1,
+        CRY: 2,
+        SURPRISE: 3,
+        LAUGH: 4,
+        HEART: 5,
+    }
 
-    author = models.ForeignKey(Author, on_delete=models.CASCADE)
-    reaction = models.CharField(max_length=50, verbose_name="Текстовый код эмоции", choices=REACTIONS)
+    author = models.ForeignKey(Author, on_delete=models.CASCADE, db_constraint=False)
+    reaction = CodedChoiceField(verbose_name="Код эмоции", choices=REACTIONS, codes=REACTION_CODES)
     create_date = models.DateField(auto_now_add=True)
     comment = models.ForeignKey(Comment, on_delete=models.CASCADE)
 
@@ -83,9 +186,176 @@ class LikeOnComment(models.Model):
         verbose_name = "Лайк на комментарии"
         verbose_name_plural = "Лайки на комментариях"
         unique_together = ['author', 'comment']
+        indexes = [
+            # Counts of reactions of a comment are read from the index only
+            models.Index(fields=["comment", "reaction"], name="feed_like_comment_reaction_idx"),
+        ]
 
     def __str__(self):
         reaction_id = self.id
         reaction = self.reaction
         author_fullname = self.author.full_name
         return f"{reaction_id} {reaction} от {author_fullname}"
+
+    def save(self, *args, **kwargs):
+        from feed.sharding import get_instance_shard
+
+        using = get_instance_shard(self, kwargs.pop("using", None))
+        with shard_atomic(using):
+            super(LikeOnComment, self).save(*args, using=using, **kwargs)
+
+
+class ArticleShard(models.Model):
+    """
+    Directory of articles in the global database: ids of articles are allocated here,
+    the shard holds the article with its comments and likes
+    """
+    shard = models.CharField(max_length=100, verbose_name="Шард")
+
+    class Meta:
+        verbose_name = "Шард записи"
+        verbose_name_plural = "Шарды записей"
+
+    def __str__(self):
+        article_id = self.id
+        return f"{article_id} {self.shard}"
+
+
+class AuthorStats(models.Model):
+    author = models.OneToOneField(
+        Author, on_delete=models.CASCADE, primary_key=True, related_name="stats", verbose_name="Автор"
+    )
+    article_count = models.PositiveIntegerField(default=0, verbose_name="Количество записей")
+    comment_count = models.PositiveIntegerField(default=0, verbose_name="Количество комментариев")
+    likes_received = models.PositiveIntegerField(default=0, verbose_name="Количество полученных лайков")
+
+    class Meta:
+        verbose_name = "Статистика автора"
+        verbose_name_plural = "Статистика авторов"
+
+    def __str__(self):
+        author_id = self.author_id
+        return f"{author_id} {self.article_count}/{self.comment_count}/{self.likes_received}"
+
+
+class Tombstone(models.Model):
+    """
+    Record of a deleted article or comment for the delta-sync change feed
+    """
+    ARTICLE = "article"
+    COMMENT = "comment"
+
+    MODEL_NAMES = (
+        (ARTICLE, "article"),
+        (COMMENT, "comment"),
+    )
+
+    model_name = models.CharField(max_length=20, choices=MODEL_NAMES, verbose_name="Тип объекта")
+    object_id = models.BigIntegerField(verbose_name="Идентификатор объекта")
+    article_id = models.BigIntegerField(null=True, blank=True, verbose_name="Идентификатор записи")
+    deleted_at = models.DateTimeField(default=timezone.now, verbose_name="Дата удаления")
+
+    class Meta:
+        verbose_name = "Удаленный объект"
+        verbose_name_plural = "Удаленные объекты"
+        indexes = [
+            models.Index(fields=["model_name", "deleted_at", "id"], name="feed_tombstone_deleted_at_idx"),
+            models.Index(fields=["article_id", "model_name", "deleted_at", "id"], name="feed_tombstone_article_idx"),
+        ]
+
+    def __str__(self):
+        model_name = self.model_name
+        object_id = self.object_id
+        return f"{model_name} {object_id}"
+
+
+class ArticleTrendingScore(models.Model):
+    article = models.OneToOneField(
+        Article, on_delete=models.CASCADE, primary_key=True, related_name="trending_score", verbose_name="Запись"
+    )
+    score = models.FloatField(default=0, verbose_name="Рейтинг")
+    update_date = models.DateTimeField(auto_now=True, verbose_name="Дата пересчета рейтинга")
+
+    class Meta:
+        verbose_name = "Рейтинг записи"
+        verbose_name_plural = "Рейтинги записей"
+        indexes = [
+            models.Index(fields=["-score", "article"], name="feed_trending_score_idx"),
+        ]
+
+    def __str__(self):
+        article_id = self.article_id
+        score = self.score
+        return f"{article_id} {score:.3f}"
+
+
+class TrendingState(models.Model):
+    """
+    Single row with the position of the last trending recompute
+    """
+    last_comment_id = models.BigIntegerField(default=0)
+    last_like_id = models.BigIntegerField(default=0)
+    last_run = models.DateTimeField(null=True, blank=True)
+    # Scores are stored relative to this time, see feed.trending.growth_factor
+    epoch = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        verbose_name = "Состояние пересчета рейтинга"
+        verbose_name_plural = "Состояния пересчета рейтинга"
+
+
+class Job(models.Model):
+    PENDING = "pending"
+    RUNNING = "running"
+    DONE = "done"
+    FAILED = "failed"
+
+    STATUSES = (
+        (PENDING, "pending"),
+        (RUNNING, "running"),
+        (DONE, "done"),
+        (FAILED, "failed"),
+    )
+
+    name = models.CharField(max_length=100, verbose_name="Имя задачи")
+    payload = models.JSONField(default=dict, blank=True, verbose_name="Параметры задачи")
+    status = models.CharField(max_length=10, choices=STATUSES, default=PENDING, verbose_name="Статус")
+    dedup_key = models.CharField(max_length=255, null=True, blank=True, verbose_name="Ключ дедупликации")
+    attempts = models.PositiveIntegerField(default=0, verbose_name="Количество попыток")
+    max_attempts = models.PositiveIntegerField(default=5, verbose_name="Максимальное количество попыток")
+    run_at = models.DateTimeField(default=timezone.now, verbose_name="Время запуска")
+    locked_at = models.DateTimeField(null=True, blank=True, verbose_name="Время захвата обработчиком")
+    progress = models.JSONField(default=dict, blank=True, verbose_name="Прогресс")
+    last_error = models.TextField(blank=True, verbose_name="Последняя ошибка")
+    create_date = models.DateTimeField(auto_now_add=True, verbose_name="Дата создания задачи")
+    update_date = models.DateTimeField(auto_now=True, verbose_name="Дата обновления задачи")
+
+    class Meta:
+        verbose_name = "Фоновая задача"
+        verbose_name_plural = "Фоновые задачи"
+        indexes = [
+            models.Index(fields=["status", "run_at"], name="feed_job_status_run_at_idx"),
+        ]
+        constraints = [
+            # Only one pending job per key, a running job does not block a new one
+            models.UniqueConstraint(
+                fields=["dedup_key"], condition=Q(status="pending"), name="feed_job_pending_dedup_key"
+            ),
+        ]
+
+    def __str__(self):
+        job_id = self.id
+        name = self.name
+        status = self.status
+        return f"{job_id} {name} ({status})"
+
+    def report_progress(self, **progress):
+        """
+        Save progress of the running job, also refreshes its lock
+        :param progress: values merged into Job.progress
+        """
+        self.progress.update(progress)
+        self.locked_at = timezone.now()
+        Job.objects.filter(pk=self.pk).update(
+            progress=self.progress, locked_at=self.locked_at, update_date=self.locked_at
+        )
@@ -0,0 +1,89 @@
+from itertools import islice
+
+from django.conf import settings
+from django.db import transaction
+
+from feed.models import Author, AuthorStats, make_full_name
+from feed.response_cache import bump_authors_version
+from pseudo_twitter.passwords import hash_passwords, password_hashing_pool
+from pseudo_twitter.sharding import get_global_database
+
+DEFAULT_BATCH_SIZE = 1000
+
+
+def get_batch_size() -> int:
+    return getattr(settings, "AUTHOR_PROVISION_BATCH_SIZE", DEFAULT_BATCH_SIZE)
+
+
+def find_taken_usernames(usernames: list[str]) -> set[str]:
+    """
+    :return: usernames of existing authors, tombstoned ones included
+    """
+    return set(Author.all_objects.filter(username__in=usernames).values_list("username", flat=True))
+
+
+def create_authors(rows: list[dict], encoded_passwords: list[str]) -> list[Author]:
+    """
+    Insert authors with their empty statistics, one bulk_create of each per call.
+    Author.save and its post_save receivers are skipped, so full_name is computed here
+    :param rows: dicts with username, password, first_name, last_name and optional email
+    :param encoded_passwords: hashed passwords of the rows
+    :return: created authors
+    """
+    authors = [
+        Author(
+            username=row["username"],
+            password=password,
+            first_name=row["first_name"],
+            last_name=row["last_name"],
+            full_name=make_full_name(row["first_name"], row["last_name"]),
+            email=row.get("email", ""),
+        )
+        for row, password in zip(rows, encoded_passwords)
+    ]
+    with transaction.atomic(using=get_global_database()):
+        Author.objects.bulk_create(authors)
+        AuthorStats.objects.bulk_create([AuthorStats(author=author) for author in authors])
+    return authors
+
+
+def provision_authors(rows, batch_size: int | None = None, workers: int | None = None,
+                      on_batch=None) -> tuple[list[Author], list[str]]:
+    """
+    Create many authors: passwords are hashed in a process pool, rows are inserted in batches.
+    Rows with usernames already taken, by existing authors or earlier rows, are skipped
+    :param rows: iterable of dicts with username, password, first_name, last_name and optional email
+    :param batch_size: rows per batch, AUTHOR_PROVISION_BATCH_SIZE by default
+    :param workers: processes hashing passwords, PASSWORD_HASHING_WORKERS by default
+    :param on_batch: called with the authors created in every batch
+    :return: created authors, skipped usernames
+    """
+    batch_size = batch_size or get_batch_size()
+    rows = iter(rows)
+    created = []
+    skipped = []
+    with password_hashing_pool(workers) as pool:
+        while True:
+            batch = list(islice(rows, batch_size))
+            if not batch:
+                break
+
+            taken = find_taken_usernames([row["username"] for row in batch])
+            new_rows = []
+            for row in batch:
+                if row["username"] in taken:
+                    skipped.append(row["username"])
+                    continue
+                taken.add(row["username"])
+                new_rows.append(row)
+            if not new_rows:
+                continue
+
+            authors = create_authors(new_rows, hash_passwords(pool, [row["password"] for row in new_rows]))
+            created.extend(authors)
+            if on_batch:
+                on_batch(authors)
+
+    if created:
+        bump_authors_version()
+    return created, skipped
@@ -0,0 +1,197 @@
+from collections import defaultdict
+from contextlib import nullcontext
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from feed.authentication import author_cache
+from feed.counters import suspend_counters, touch_updates
+from feed.jobs import enqueue
+from feed.models import Article, ArticleTrendingScore, Author, Comment, Job, LikeOnComment, Tombstone
+from feed.sharding import forget_deleted_authors, get_article_shard, get_instance_shard
+from feed.stats import change_author_stat, subtract_article_stats
+from pseudo_twitter.sharding import for_each_shard, get_all_shards, shard_atomic, using_shard
+
+DEFAULT_BATCH_SIZE = 500
+
+
+def get_batch_size() -> int:
+    return getattr(settings, "PURGE_BATCH_SIZE", DEFAULT_BATCH_SIZE)
+
+
+def tombstone_article(article: Article) -> Job:
+    """
+    Hide article from the feed at once and schedule purge of its comments and likes
+    :param article: article instance
+    :return: purge job
+    """
+    now = timezone.now()
+    with shard_atomic(get_instance_shard(article)):
+        Article.all_objects.filter(pk=article.pk).update(deleted_at=now, update_date=now)
+        Tombstone.objects.create(
+            model_name=Tombstone.ARTICLE, object_id=article.pk, article_id=article.pk, deleted_at=now
+        )
+        ArticleTrendingScore.objects.filter(article_id=article.pk).delete()
+        change_author_stat(article.author_id, "article_count", -1)
+        subtract_article_stats([article.pk])
+        return enqueue("purge_article", {"article_id": article.pk}, dedup_key=f"purge_article:{article.pk}")
+
+
+def tombstone_author(author: Author) -> Job:
+    """
+    Hide author with all their articles at once and schedule purge of everything they created
+    :param author: author instance
+    :return: purge job
+    """
+    now = timezone.now()
+
+    def hide_articles(shard):
+        with shard_atomic(shard):
+            article_ids = list(Article.objects.filter(author_id=author.pk).values_list("pk", flat=True))
+            Article.all_objects.filter(pk__in=article_ids).update(deleted_at=now, update_date=now)
+            Tombstone.objects.bulk_create([
+                Tombstone(model_name=Tombstone.ARTICLE, object_id=article_id, article_id=article_id, deleted_at=now)
+                for article_id in article_ids
+            ])
+            ArticleTrendingScore.objects.filter(article_id__in=article_ids).delete()
+            subtract_article_stats(article_ids)
+
+    with transaction.atomic():
+        Author.all_objects.filter(pk=author.pk).update(deleted_at=now, is_active=False)
+        for_each_shard(hide_articles)
+        job = enqueue("purge_author", {"author_id": author.pk}, dedup_key=f"purge_author:{author.pk}")
+    author_cache.invalidate(author.pk)
+    forget_deleted_authors()
+    return job
+
+
+def delete_in_batches(queryset, batch_size: int, on_batch=None) -> int:
+    """
+    Delete rows of the queryset by batches of primary keys, each batch in its own transaction
+    :param queryset: rows to delete
+    :param batch_size: number of rows in one batch
+    :param on_batch: called with the total number of deleted rows after every batch
+    :return: number of deleted rows including cascades
+    """
+    deleted = 0
+    model = queryset.model
+    while True:
+        with transaction.atomic(using=queryset.db):
+            batch_ids = list(queryset.order_by("-pk").values_list("pk", flat=True)[:batch_size])
+            if not batch_ids:
+                return deleted
+            deleted += model._base_manager.filter(pk__in=batch_ids).delete()[0]
+        if on_batch:
+            on_batch(deleted)
+
+
+def purge_likes(likes, batch_size: int) -> int:
+    """
+    Delete likes in batches, count_of_likes of their comments goes down in the transaction of every batch
+    :param likes: queryset of likes to delete
+    :param batch_size: number of likes in one batch
+    :return: number of deleted likes
+    """
+    deleted = 0
+    while True:
+        with transaction.atomic(using=likes.db):
+            batch = list(likes.order_by("-pk").values_list("pk", "comment_id")[:batch_size])
+            if not batch:
+                return deleted
+            deleted += LikeOnComment._base_manager.filter(pk__in=[pk for pk, _ in batch]).delete()[0]
+
+            likes_by_comment = defaultdict(int)
+            for _, comment_id in batch:
+                likes_by_comment[comment_id] += 1
+            # One UPDATE per distinct number of deleted likes
+            comments_by_count = defaultdict(list)
+            for comment_id, count in likes_by_comment.items():
+                comments_by_count[count].append(comment_id)
+            for count, comment_ids in comments_by_count.items():
+                # A drifted counter stays at zero instead of failing the positive check
+                Comment.objects.filter(pk__in=comment_ids, count_of_likes__gte=count).update(
+                    count_of_likes=F("count_of_likes") - count, **touch_updates(Comment)
+                )
+
+
+def purge_comments(job: Job, comments, progress_key: str, keep_counters: bool = False) -> int:
+    """
+    Delete comments with their likes in batches
+    :param job: running purge job, receives progress
+    :param comments: queryset of comments to delete
+    :param progress_key: key of Job.progress with the number of deleted comments
+    :param keep_counters: maintain counters of the remaining articles and comments
+    :return: number of deleted comments
+    """
+    batch_size = get_batch_size()
+    deleted_before = job.progress.get(progress_key, 0)
+
+    def report(deleted):
+        job.report_progress(**{progress_key: deleted_before + deleted})
+
+    with nullcontext() if keep_counters else suspend_counters():
+        delete_in_batches(LikeOnComment.objects.filter(comment__in=comments.values("pk")), batch_size)
+        # Leaves first, so that a batch does not cascade into a big subtree
+        deleted = delete_in_batches(comments.filter(comment__isnull=True), batch_size, report)
+        # Whatever is left (e.g. cycles made by reparenting) goes with cascades
+        deleted += delete_in_batches(comments, batch_size, lambda batch_deleted: report(deleted + batch_deleted))
+    report(deleted)
+    return deleted
+
+
+def purge_article(job: Job, article_id: int):
+    """
+    Delete tombstoned article with its comment tree in batches, safe to run again after a stop
+    """
+    shard = get_article_shard(article_id)
+    if shard is None:
+        return
+    with using_shard(shard):
+        article = Article.all_objects.filter(pk=article_id).first()
+        if article is None:
+            return
+        if article.deleted_at is None:
+            # The article was restored after the job had been queued
+            return
+
+        job.report_progress(article_id=article_id, total_comments=article.comment_count)
+        purge_comments(job, Comment.objects.filter(article_id=article_id), "deleted_comments")
+        with shard_atomic(shard):
+            Article.all_objects.filter(pk=article_id).delete()
+    job.report_progress(finished=True)
+
+
+def purge_author(job: Job, author_id: int):
+    """
+    Delete tombstoned author with their articles, comments and likes in batches, safe to run again after a stop
+    """
+    author = Author.all_objects.filter(pk=author_id).first()
+    if author is None:
+        return
+    if author.deleted_at is None:
+        return
+
+    articles = [
+        (shard, article_id)
+        for shard in get_all_shards()
+        for article_id in Article.all_objects.using(shard).filter(author_id=author_id).values_list("pk", flat=True)
+    ]
+    job.report_progress(total_articles=len(articles))
+    for number, (shard, article_id) in enumerate(articles, start=1):
+        with using_shard(shard):
+            purge_comments(job, Comment.objects.filter(article_id=article_id), "deleted_comments")
+            with shard_atomic(shard):
+                Article.all_objects.filter(pk=article_id).delete()
+        job.report_progress(deleted_articles=number)
+
+    for shard in get_all_shards():
+        with using_shard(shard):
+            purge_likes(LikeOnComment.objects.filter(author_id=author_id), get_batch_size())
+            purge_comments(
+                job, Comment.objects.filter(author_id=author_id), "deleted_own_comments", keep_counters=True
+            )
+
+    Author.all_objects.filter(pk=author_id).delete()
+    job.report_progress(finished=True)
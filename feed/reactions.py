@@ -0,0 +1,154 @@
+import datetime
+
+from django.db import connections, router
+
+from feed import events
+from feed.counters import change_counter
+from feed.models import Comment, LikeOnComment
+from feed.response_cache import bump_article_version
+from feed.signals import publish_after_commit, reaction_event_data
+from feed.stats import change_author_stat
+from pseudo_twitter.sharding import for_each_shard, get_current_shard, shard_atomic
+
+MAX_BATCH_SIZE = 200
+
+
+def get_my_reactions(user, comment_ids) -> dict[int, str]:
+    """
+    Reactions of the user on the comments in one query
+    :param user: request user, anonymous users have no reactions
+    :param comment_ids: iterable of comment ids
+    :return: dict {comment id: reaction} for the comments the user reacted to
+    """
+    comment_ids = list(comment_ids)
+    if not user.is_authenticated or not comment_ids:
+        return {}
+
+    def get_reactions(shard=None) -> dict[int, str]:
+        return dict(
+            LikeOnComment.objects.filter(
+                author=user.id,
+                comment_id__in=comment_ids
+            ).values_list("comment_id", "reaction")
+        )
+
+    if get_current_shard() is not None:
+        return get_reactions()
+    # Comments of a batch may come from any shard
+    reactions = {}
+    for shard_reactions in for_each_shard(get_reactions):
+        reactions.update(shard_reactions)
+    return reactions
+
+
+def get_article_reactions(user, article_id) -> dict[int, str]:
+    """
+    Reactions of the user on all comments of the article in one query
+    :param user: request user, anonymous users have no reactions
+    :param article_id: id of the article
+    :return: dict {comment id: reaction} for the comments the user reacted to
+    """
+    if not user.is_authenticated:
+        return {}
+    return dict(
+        LikeOnComment.objects.filter(
+            author=user.id,
+            comment__article=article_id
+        ).order_by("comment_id").values_list("comment_id", "reaction")
+    )
+
+
+def with_my_reactions(comments: list[dict], my_reactions: dict[int, str]) -> list[dict]:
+    """
+    Copy of serialized comments with my_reaction of the user set in the whole thread
+    :param comments: data of CommentsSerializer rendered without a user
+    :param my_reactions: dict {comment id: reaction}
+    :return: comments with my_reaction, the same list if the user has no reactions
+    """
+    if not my_reactions:
+        return comments
+    return [
+        {
+            **comment,
+            "my_reaction": my_reactions.get(comment["id"]),
+            "child_comments": comment["child_comments"] and with_my_reactions(comment["child_comments"], my_reactions),
+        }
+        for comment in comments
+    ]
+
+
+def parse_comment_ids(raw_ids: str) -> list[int] | None:
+    """
+    Parse comma separated comment ids
+    :param raw_ids: value of the ids query parameter
+    :return: unique ids in the given order or None if the value is invalid
+    """
+    comment_ids = []
+    for raw_id in raw_ids.split(","):
+        raw_id = raw_id.strip()
+        if not raw_id.isdigit():
+            return None
+        comment_id = int(raw_id)
+        if comment_id not in comment_ids:
+            comment_ids.append(comment_id)
+    if len(comment_ids) > MAX_BATCH_SIZE:
+        return None
+    return comment_ids
+
+
+def _execute_returning(connection, sql: str, params: list) -> tuple | None:
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        return cursor.fetchone()
+
+
+def set_reaction(author, comment: Comment, reaction: str) -> tuple[LikeOnComment, bool]:
+    """
+    Create the reaction of the author on the comment or change the existing one
+    with a single INSERT ... ON CONFLICT DO UPDATE ... RETURNING (SQLite 3.35 or later),
+    so the unique constraint never fails. The stored code read before the upsert tells what happened:
+    counters change only when a row is created, an unchanged reaction publishes nothing.
+    Signals are not sent for these statements, their work is done here.
+    :param author: author of the reaction
+    :param comment: comment
+    :param reaction: text code of the reaction
+    :return: reaction and True if it was created
+    """
+    # Likes live on the shard of the comment
+    using = router.db_for_write(LikeOnComment, instance=comment)
+    connection = connections[using]
+    table = connection.ops.quote_name(LikeOnComment._meta.db_table)
+    select_sql = f"SELECT reaction FROM {table} WHERE author_id = %s AND comment_id = %s"
+    upsert_sql = (
+        f"INSERT INTO {table} (author_id, comment_id, reaction, create_date) VALUES (%s, %s, %s, %s) "
+        "ON CONFLICT (author_id, comment_id) DO UPDATE SET reaction = excluded.reaction RETURNING id, create_date"
+    )
+
+    # The column stores the small integer code of the reaction
+    reaction_code = LikeOnComment._meta.get_field("reaction").get_db_prep_save(reaction, connection)
+
+    # Transactions are IMMEDIATE, the write lock of the shard is held from the SELECT on,
+    # so no concurrent request inserts the row between the two statements
+    with shard_atomic(using):
+        old_code = _execute_returning(connection, select_sql, [author.id, comment.id])
+        row = _execute_returning(
+            connection, upsert_sql, [author.id, comment.id, reaction_code, datetime.date.today()]
+        )
+        created = old_code is None
+
+        like_id, create_date = row
+        like = LikeOnComment(
+            id=like_id,
+            author=author,
+            comment=comment,
+            reaction=reaction,
+            create_date=LikeOnComment._meta.get_field("create_date").to_python(create_date),
+        )
+
+        if created:
+            change_counter(Comment, comment.id, "count_of_likes", 1)
+            change_author_stat(comment.author_id, "likes_received", 1)
+        if old_code is None or old_code[0] != reaction_code:
+            bump_article_version(comment.article_id)
+            publish_after_commit(comment.article_id, events.REACTION_SET, reaction_event_data(like))
+    return like, created
@@ -0,0 +1,76 @@
+import hashlib
+import time
+
+from django.db import transaction
+from rest_framework.response import Response
+
+from pseudo_twitter.coalescing import CoalescingCache
+
+ARTICLE_VERSION_KEY = "response_version:article:{}"
+AUTHORS_VERSION_KEY = "response_version:authors"
+
+response_cache = CoalescingCache("response")
+
+
+def get_version(article_id) -> int:
+    """
+    Version of the cached responses of the article: the time of the last change of the article,
+    its comments and likes, or of any author (names are shown in the responses)
+    """
+    versions = response_cache.cache.get_many([ARTICLE_VERSION_KEY.format(article_id), AUTHORS_VERSION_KEY])
+    return max(versions.values(), default=0)
+
+
+def get_authors_version() -> int:
+    """
+    Time of the last change of any author, lists show author names without keeping their update time
+    """
+    return response_cache.cache.get(AUTHORS_VERSION_KEY, 0)
+
+
+def _bump(key: str):
+    response_cache.cache.set(key, time.time_ns(), None)
+
+
+def bump_article_version(article_id):
+    """
+    Invalidate cached responses of the article once the current transaction commits
+    """
+    if article_id is not None:
+        transaction.on_commit(lambda: _bump(ARTICLE_VERSION_KEY.format(article_id)))
+
+
+def bump_authors_version():
+    transaction.on_commit(lambda: _bump(AUTHORS_VERSION_KEY))
+
+
+def cached_response(request, scope: str, article_id, build, etag: str | None = None, personalize=None) -> Response:
+    """
+    Response with the data served from the coalescing response cache.
+    The cached data are the same for all users, per-user parts are added by personalize
+    :param request: request, the key includes its path
+    :param scope: name of the cached view
+    :param article_id: id of the article the data depend on
+    :param build: callable returning the response to cache, called on a miss only
+    :param etag: ETag of the data at the time they are built, stored with them: a stale entry
+                 is sent with its own ETag
+    :param personalize: callable taking the cached data and returning the data sent to the user
+    :return: response
+    """
+    key = f"{scope}:{request.get_full_path()}"
+    entry = response_cache.get_or_compute(
+        key, get_version(article_id), lambda: {"data": build().data, "etag": etag}
+    )
+
+    data = entry["value"]["data"]
+    if personalize is not None:
+        data = personalize(data)
+    response = Response(data)
+    if entry["value"]["etag"]:
+        response["ETag"] = entry["value"]["etag"]
+    if data is entry["value"]["data"]:
+        # The same entry rendered the same way gives the same bytes, so CompressionMiddleware can reuse them
+        response.body_digest = hashlib.blake2b(
+            f"{entry['id']}:{request.accepted_renderer.format}".encode(), digest_size=20
+        ).hexdigest()
+    return response
@@ -1,6 +1,8 @@
 from rest_framework import serializers
 
-from feed.models import Article, Author, Comment, LikeOnComment
+from feed.models import Article, ArticleTrendingScore, Author, AuthorStats, Comment, Job, LikeOnComment
+from feed.trending import get_current_score
+from pseudo_twitter.metrics import TimedSerializerMixin
 
 
 def getting_author_fullname(obj):
@@ -16,31 +18,67 @@ def create_is_updated_flag(obj):
     return create_date != update_date
 
 
-class AuthorsSerializer(serializers.ModelSerializer):
+class AuthorsSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     class Meta:
         model = Author
         fields = "__all__"
 
 
-class ArticlesSerializer(serializers.ModelSerializer):
+class BulkAuthorSerializer(serializers.Serializer):
+    """
+    Author of bulk provisioning, uniqueness of usernames is checked for the whole batch at once
+    """
+    username = serializers.CharField(max_length=150)
+    password = serializers.CharField(max_length=128)
+    first_name = serializers.CharField(max_length=150)
+    last_name = serializers.CharField(max_length=150)
+    email = serializers.EmailField(required=False, allow_blank=True, default="")
+
+
+class AuthorStatsSerializer(TimedSerializerMixin, serializers.ModelSerializer):
+    class Meta:
+        model = AuthorStats
+        fields = ["author", "article_count", "comment_count", "likes_received"]
+
+
+class ArticlesSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     author_fullname = serializers.SerializerMethodField()
 
     class Meta:
         model = Article
-        fields = ["id", "title", "author_fullname", "create_date"]
+        fields = ["id", "title", "author_fullname", "create_date", "comment_count"]
 
     @staticmethod
     def get_author_fullname(obj):
         return getting_author_fullname(obj)
 
 
-class ArticleSerializer(serializers.ModelSerializer):
+class TrendingArticleSerializer(TimedSerializerMixin, serializers.ModelSerializer):
+    id = serializers.IntegerField(source="article.id")
+    title = serializers.CharField(source="article.title")
+    author_fullname = serializers.CharField(source="article.author.full_name")
+    create_date = serializers.DateTimeField(source="article.create_date")
+    comment_count = serializers.IntegerField(source="article.comment_count")
+    score = serializers.SerializerMethodField()
+
+    class Meta:
+        model = ArticleTrendingScore
+        fields = ["id", "title", "author_fullname", "create_date", "comment_count", "score"]
+
+    def get_score(self, obj) -> float:
+        # Stored scores grow with the time of the events, the decayed value is shown
+        score_epochs = self.context.get("score_epochs", {})
+        return get_current_score(obj.score, score_epochs.get(obj._state.db))
+
+
+class ArticleSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     author_fullname = serializers.SerializerMethodField()
     is_updated = serializers.SerializerMethodField()
 
     class Meta:
         model = Article
         fields = "__all__"
+        read_only_fields = ["comment_count"]
 
     @staticmethod
     def get_author_fullname(obj):
@@ -51,14 +89,17 @@ class ArticleSerializer(serializers.ModelSerializer):
         return create_is_updated_flag(obj)
 
 
-class CommentsSerializer(serializers.ModelSerializer):
+class CommentsSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     author_fullname = serializers.SerializerMethodField()
     is_updated = serializers.SerializerMethodField()
     child_comments = serializers.SerializerMethodField()
+    my_reaction = serializers.SerializerMethodField()
+    replies_cursor = serializers.SerializerMethodField()
 
     class Meta:
         model = Comment
         fields = "__all__"
+        read_only_fields = ["reply_count", "count_of_likes"]
 
     @staticmethod
     def get_author_fullname(obj):
@@ -68,15 +109,52 @@ class CommentsSerializer(serializers.ModelSerializer):
     def get_is_updated(obj):
         return create_is_updated_flag(obj)
 
-    @staticmethod
-    def get_child_comments(obj):
-        child_comments = Comment.objects.filter(parent_comment=obj.id)
+    def get_child_comments(self, obj):
+        # Replies preloaded by the view (feed.threads.get_descendants) save a query per comment
+        children = self.context.get("children")
+        if children is not None:
+            child_comments = children.get(obj.id)
+        else:
+            child_comments = Comment.objects.visible().filter(parent_comment=obj.id)
         if child_comments:
-            return CommentsSerializer(child_comments, many=True).data
+            return CommentsSerializer(child_comments, many=True, context=self.context).data
         return None
 
+    def get_my_reaction(self, obj) -> str | None:
+        my_reactions = self.context.get("my_reactions", {})
+        return my_reactions.get(obj.id)
+
+    def get_replies_cursor(self, obj) -> str | None:
+        # Set when some replies are left out of the bounded thread, see comments/<pk>/replies
+        reply_cursors = self.context.get("reply_cursors", {})
+        return reply_cursors.get(obj.id)
+
+    def update(self, instance, validated_data):
+        # Only the sent fields are written: the counters are changed by concurrent UPDATEs (feed.counters)
+        for field_name, value in validated_data.items():
+            setattr(instance, field_name, value)
+        instance.save(update_fields=[*validated_data, "update_date"])
+        return instance
 
-class LikeOnCommentSerializer(serializers.ModelSerializer):
+
+class CommentChangeSerializer(TimedSerializerMixin, serializers.ModelSerializer):
+    author_fullname = serializers.SerializerMethodField()
+    is_updated = serializers.SerializerMethodField()
+
+    class Meta:
+        model = Comment
+        fields = "__all__"
+
+    @staticmethod
+    def get_author_fullname(obj):
+        return getting_author_fullname(obj)
+
+    @staticmethod
+    def get_is_updated(obj):
+        return create_is_updated_flag(obj)
+
+
+class LikeOnCommentSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     author_fullname = serializers.SerializerMethodField()
 
     class Meta:
@@ -86,3 +164,9 @@ class LikeOnCommentSerializer(serializers.ModelSerializer):
     @staticmethod
     def get_author_fullname(obj):
         return getting_author_fullname(obj)
+
+
+class JobSerializer(TimedSerializerMixin, serializers.ModelSerializer):
+    class Meta:
+        model = Job
+        fields = ["id", "name", "status", "attempts", "progress", "last_error", "run_at", "create_date", "update_date"]
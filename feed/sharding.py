@@ -0,0 +1,354 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connections, transaction
+
+from feed.counters import suspend_counters
+from feed.models import Article, ArticleShard, ArticleTrendingScore, Author, Comment, LikeOnComment
+from pseudo_twitter.sharding import ARCHIVE_SHARD_INDEX, get_all_shards, get_archive_database, \
+    get_global_database, get_ring, get_shard_index, get_shards, is_sharded, set_current_shard
+
+# Comments and likes of the shard number N get ids from N * SHARD_ID_SPAN, so ids stay unique
+# when rows move between shards
+SHARD_ID_SPAN = 10 ** 12
+
+ARTICLE_SHARD_KEY = "article_shard:{}"
+COMMENT_SHARD_KEY = "comment_shard:{}"
+LIKE_COMMENT_KEY = "like_comment:{}"
+DELETED_AUTHORS_KEY = "deleted_author_ids"
+DEFAULT_DELETED_AUTHORS_TIMEOUT = 60
+DEFAULT_COPY_CHUNK_SIZE = 1000
+
+# url name: (kwarg, True if it is an article id, False if a comment id)
+SHARD_KEYS = {
+    "retrieve_update_destroy_article": ("pk", True),
+    "list_comments": ("article_id", True),
+    "list_comment_changes": ("article_id", True),
+    "create_comment": ("pk", False),
+    "list_replies": ("pk", False),
+    "list_likes_create_like_on_comment": ("comment_id", False),
+}
+
+
+def _parse_id(value) -> int | None:
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def allocate_article_id() -> int:
+    """
+    Take the next article id from the directory and place the article on its shard of the ring
+    :return: article id
+    """
+    with transaction.atomic(using=get_global_database()):
+        entry = ArticleShard.objects.create(shard="")
+        entry.shard = get_ring().get_shard(entry.pk)
+        entry.save(update_fields=["shard"])
+    cache.set(ARTICLE_SHARD_KEY.format(entry.pk), entry.shard, None)
+    return entry.pk
+
+
+def get_article_shard(article_id) -> str | None:
+    """
+    :param article_id: article id
+    :return: shard holding the article or None for an unknown article
+    """
+    if not is_sharded():
+        return get_shards()[0]
+    article_id = _parse_id(article_id)
+    if article_id is None:
+        return None
+
+    key = ARTICLE_SHARD_KEY.format(article_id)
+    shard = cache.get(key)
+    if shard is None:
+        shard = ArticleShard.objects.filter(pk=article_id).values_list("shard", flat=True).first()
+        if shard is not None:
+            cache.set(key, shard, None)
+    return shard
+
+
+def _shards_by_owner(object_id: int) -> list[str]:
+    """
+    All shards, the one which gave the comment or like id first: it holds the row
+    unless the row was moved by a rebalance or to the archive
+    """
+    shards = get_all_shards()
+    owner_index = object_id // SHARD_ID_SPAN
+    owner = get_archive_database() if owner_index == ARCHIVE_SHARD_INDEX else None
+    if owner_index < len(get_shards()):
+        owner = get_shards()[owner_index]
+    if owner in shards:
+        shards.remove(owner)
+        shards.insert(0, owner)
+    return shards
+
+
+def find_comment_shard(comment_id) -> str | None:
+    """
+    :param comment_id: comment id
+    :return: shard holding the comment or None for an unknown comment
+    """
+    if not is_sharded():
+        return get_shards()[0]
+    comment_id = _parse_id(comment_id)
+    if comment_id is None:
+        return None
+
+    key = COMMENT_SHARD_KEY.format(comment_id)
+    shard = cache.get(key)
+    if shard is not None:
+        return shard
+
+    for shard in _shards_by_owner(comment_id):
+        if Comment.objects.using(shard).filter(pk=comment_id).exists():
+            cache.set(key, shard, None)
+            return shard
+    return None
+
+
+def find_like_shard(like_id) -> str | None:
+    """
+    Likes live on the shard of their comment. The comment of a like never changes, so it is cached
+    and the shard is found by find_comment_shard, which follows moved comments
+    :param like_id: like id
+    :return: shard holding the like or None for an unknown like
+    """
+    if not is_sharded():
+        return get_shards()[0]
+    like_id = _parse_id(like_id)
+    if like_id is None:
+        return None
+
+    key = LIKE_COMMENT_KEY.format(like_id)
+    comment_id = cache.get(key)
+    if comment_id is None:
+        for shard in _shards_by_owner(like_id):
+            likes = LikeOnComment.objects.using(shard).filter(pk=like_id)
+            comment_id = likes.values_list("comment_id", flat=True).first()
+            if comment_id is not None:
+                cache.set(key, comment_id, None)
+                break
+        else:
+            return None
+    return find_comment_shard(comment_id)
+
+
+def get_instance_shard(instance, using: str | None = None) -> str:
+    """
+    Shard an article, comment, like or trending score belongs to
+    :param instance: model instance
+    :param using: database chosen by the caller, with several shards the directory decides instead
+    """
+    if not is_sharded():
+        return using or get_shards()[0]
+    if not instance._state.adding and instance._state.db:
+        return instance._state.db
+
+    if isinstance(instance, Article):
+        shard = get_article_shard(instance.pk)
+    elif isinstance(instance, (Comment, ArticleTrendingScore)):
+        shard = get_article_shard(instance.article_id)
+    elif isinstance(instance, LikeOnComment):
+        if LikeOnComment.comment.is_cached(instance) and instance.comment._state.db:
+            shard = instance.comment._state.db
+        else:
+            shard = find_comment_shard(instance.comment_id)
+    else:
+        raise TypeError(f"{type(instance).__name__} is not sharded")
+    return shard or get_shards()[0]
+
+
+def forget_shards(article_ids=(), comment_ids=()):
+    """
+    Drop cached locations of moved articles and comments
+    """
+    keys = [ARTICLE_SHARD_KEY.format(article_id) for article_id in article_ids]
+    keys += [COMMENT_SHARD_KEY.format(comment_id) for comment_id in comment_ids]
+    if keys:
+        cache.delete_many(keys)
+
+
+def get_deleted_author_ids() -> list[int]:
+    """
+    Ids of tombstoned authors, used instead of a join with the author table, which lives in another database
+    """
+    author_ids = cache.get(DELETED_AUTHORS_KEY)
+    if author_ids is None:
+        author_ids = list(Author.all_objects.filter(deleted_at__isnull=False).values_list("pk", flat=True))
+        timeout = getattr(settings, "SHARDS_DELETED_AUTHORS_TIMEOUT", DEFAULT_DELETED_AUTHORS_TIMEOUT)
+        cache.set(DELETED_AUTHORS_KEY, author_ids, timeout)
+    return author_ids
+
+
+def forget_deleted_authors():
+    cache.delete(DELETED_AUTHORS_KEY)
+
+
+def exclude_deleted_authors(queryset, author_field: str = "author"):
+    """
+    Rows of the sharded queryset without ones of tombstoned authors
+    """
+    if is_sharded():
+        return queryset.exclude(**{f"{author_field}_id__in": get_deleted_author_ids()})
+    return queryset.filter(**{f"{author_field}__deleted_at__isnull": True})
+
+
+def with_authors(queryset, *fields):
+    """
+    Load related authors with a join in one database or with a second query to the global database
+    :param queryset: queryset of a sharded model
+    :param fields: paths to author foreign keys
+    """
+    if is_sharded():
+        return queryset.prefetch_related(*fields)
+    return queryset.select_related(*fields)
+
+
+def reserve_shard_ids(using: str, **kwargs):
+    """
+    post_migrate receiver: move the id sequences of comments and likes of a shard to its own range
+    """
+    if using not in get_all_shards() or not get_shard_index(using):
+        return
+    start = get_shard_index(using) * SHARD_ID_SPAN
+    connection = connections[using]
+    with connection.cursor() as cursor:
+        for model in (Comment, LikeOnComment):
+            table = model._meta.db_table
+            if connection.vendor == "sqlite":
+                cursor.execute("DELETE FROM sqlite_sequence WHERE name = %s AND seq < %s", [table, start])
+                cursor.execute(
+                    "INSERT INTO sqlite_sequence (name, seq) SELECT %s, %s "
+                    "WHERE NOT EXISTS (SELECT 1 FROM sqlite_sequence WHERE name = %s)",
+                    [table, start, table]
+                )
+            elif connection.vendor == "postgresql":
+                cursor.execute(
+                    f"SELECT setval(pg_get_serial_sequence(%s, 'id'), "
+                    f"GREATEST(%s, (SELECT COALESCE(MAX(id), 0) FROM {connection.ops.quote_name(table)})))",
+                    [table, start]
+                )
+
+
+def copy_rows(queryset, target: str) -> list:
+    """
+    Insert the rows into the target database as they are, auto_now dates and ids included.
+    Rows are read and written in chunks of ARCHIVE_COPY_CHUNK_SIZE, so large threads do not load at once
+    :param queryset: rows in the source database
+    :param target: target database
+    :return: primary keys of the copied rows
+    """
+    model = queryset.model
+    fields = model._meta.concrete_fields
+    pk_index = fields.index(model._meta.pk)
+    connection = connections[target]
+    chunk_size = getattr(settings, "ARCHIVE_COPY_CHUNK_SIZE", DEFAULT_COPY_CHUNK_SIZE)
+
+    quote_name = connection.ops.quote_name
+    sql = "INSERT INTO {} ({}) VALUES ({})".format(
+        quote_name(model._meta.db_table),
+        ", ".join(quote_name(field.column) for field in fields),
+        ", ".join(["%s"] * len(fields)),
+    )
+    pks = []
+    queryset = queryset.order_by("pk").values_list(*[field.attname for field in fields])
+    while True:
+        chunk = queryset.filter(pk__gt=pks[-1])[:chunk_size] if pks else queryset[:chunk_size]
+        rows = list(chunk)
+        if not rows:
+            return pks
+        params = [
+            [field.get_db_prep_save(value, connection) for field, value in zip(fields, row)]
+            for row in rows
+        ]
+        with connection.cursor() as cursor:
+            cursor.executemany(sql, params)
+        pks.extend(row[pk_index] for row in rows)
+
+
+def delete_article_rows(article_id: int, shard: str):
+    """
+    Delete the article with its comments, likes and trending score from the shard without
+    counters, statistics, tombstones and events: the rows live on in another shard
+    """
+    with suspend_counters():
+        LikeOnComment.objects.using(shard).filter(comment__article_id=article_id).delete()
+        Comment.objects.using(shard).filter(article_id=article_id).delete()
+        Article.all_objects.using(shard).filter(pk=article_id).delete()
+
+
+def move_article(article_id: int, source: str, target: str) -> bool:
+    """
+    Move the article with its comments, likes and trending score to the target shard.
+    Writes to the article wait on the write lock of the source shard until the directory points to the target.
+    :return: False if the source shard does not hold the article
+    """
+    with transaction.atomic(using=source):
+        # Takes the write lock of the source (IMMEDIATE transactions of SQLite, row lock elsewhere)
+        article = Article.all_objects.using(source).select_for_update().filter(pk=article_id).first()
+        if article is None:
+            return False
+
+        with transaction.atomic(using=target):
+            # Leftovers of an interrupted move
+            delete_article_rows(article_id, target)
+            copy_rows(Article.all_objects.using(source).filter(pk=article_id), target)
+            comment_ids = copy_rows(Comment.objects.using(source).filter(article_id=article_id), target)
+            copy_rows(LikeOnComment.objects.using(source).filter(comment__article_id=article_id), target)
+            copy_rows(ArticleTrendingScore.objects.using(source).filter(article_id=article_id), target)
+
+        ArticleShard.objects.filter(pk=article_id).update(shard=target)
+        delete_article_rows(article_id, source)
+    forget_shards([article_id], comment_ids)
+    return True
+
+
+def sweep_moved_articles(shard: str, batch_size: int) -> int:
+    """
+    Delete copies of articles which the directory places on other shards, left by interrupted moves
+    :return: number of deleted articles
+    """
+    deleted = 0
+    last_id = 0
+    while True:
+        article_ids = list(
+            Article.all_objects.using(shard).filter(pk__gt=last_id).order_by("pk").values_list("pk", flat=True)[:batch_size]
+        )
+        if not article_ids:
+            return deleted
+        last_id = article_ids[-1]
+        directory = dict(ArticleShard.objects.filter(pk__in=article_ids).values_list("pk", "shard"))
+        for article_id in article_ids:
+            if directory.get(article_id, shard) != shard:
+                with transaction.atomic(using=shard):
+                    delete_article_rows(article_id, shard)
+                deleted += 1
+
+
+class ShardMiddleware:
+    """
+    Route queries of the view to the shard of the article or comment in its URL
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        try:
+            return self.get_response(request)
+        finally:
+            set_current_shard(None)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        if not is_sharded():
+            return None
+        shard_key = SHARD_KEYS.get(request.resolver_match.url_name)
+        if shard_key is None:
+            return None
+
+        kwarg, is_article = shard_key
+        object_id = view_kwargs.get(kwarg)
+        set_current_shard(get_article_shard(object_id) if is_article else find_comment_shard(object_id))
+        return None
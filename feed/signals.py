@@ -0,0 +1,223 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from feed import events
+from feed.authentication import author_cache
+from feed.counters import change_comment_count, change_reply_count, counters_suspended
+from feed.models import Article, Author, Comment, LikeOnComment, Tombstone
+from feed.response_cache import bump_article_version, bump_authors_version
+from feed.sharding import forget_deleted_authors
+from feed.stats import change_author_stat
+
+
+@receiver(post_save, sender=Author)
+@receiver(post_delete, sender=Author)
+def invalidate_cached_author(sender, instance, **kwargs):
+    author_cache.invalidate(instance.pk)
+    if instance.deleted_at is not None:
+        forget_deleted_authors()
+
+
+@receiver(post_save, sender=Author)
+def invalidate_responses_on_author_save(sender, instance, update_fields=None, **kwargs):
+    # Logins only touch last_login, which no response shows
+    if update_fields is not None and set(update_fields) <= {"last_login"}:
+        return
+    bump_authors_version()
+
+
+@receiver(post_save, sender=Article)
+@receiver(post_delete, sender=Article)
+def invalidate_article_responses(sender, instance, **kwargs):
+    if counters_suspended():
+        return
+    bump_article_version(instance.pk)
+
+
+# Connected before the counter receivers, which reset loaded_article_id
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+def invalidate_comment_responses(sender, instance, **kwargs):
+    if counters_suspended():
+        return
+    bump_article_version(instance.article_id)
+    loaded_article_id = getattr(instance, "loaded_article_id", instance.article_id)
+    if loaded_article_id != instance.article_id:
+        bump_article_version(loaded_article_id)
+
+
+@receiver(post_save, sender=LikeOnComment)
+@receiver(post_delete, sender=LikeOnComment)
+def invalidate_reaction_responses(sender, instance, **kwargs):
+    if counters_suspended():
+        return
+    bump_article_version(get_like_article_id(instance))
+
+
+@receiver(post_save, sender=Comment)
+def update_counters_on_comment_save(sender, instance, created, **kwargs):
+    if created:
+        change_comment_count(instance.article_id, 1)
+        change_reply_count(instance.parent_comment_id, 1)
+    else:
+        loaded_article_id = getattr(instance, "loaded_article_id", instance.article_id)
+        loaded_parent_comment_id = getattr(instance, "loaded_parent_comment_id", instance.parent_comment_id)
+
+        if loaded_article_id != instance.article_id:
+            change_comment_count(loaded_article_id, -1)
+            change_comment_count(instance.article_id, 1)
+        if loaded_parent_comment_id != instance.parent_comment_id:
+            change_reply_count(loaded_parent_comment_id, -1)
+            change_reply_count(instance.parent_comment_id, 1)
+
+    instance.loaded_article_id = instance.article_id
+    instance.loaded_parent_comment_id = instance.parent_comment_id
+
+
+@receiver(post_delete, sender=Comment)
+def create_comment_tombstone(sender, instance, **kwargs):
+    if counters_suspended():
+        return
+    Tombstone.objects.create(model_name=Tombstone.COMMENT, object_id=instance.pk, article_id=instance.article_id)
+
+
+@receiver(post_delete, sender=Article)
+def create_article_tombstone(sender, instance, **kwargs):
+    # Tombstoned articles got their record when they were hidden, moved ones are not deleted
+    if instance.deleted_at is not None or counters_suspended():
+        return
+    Tombstone.objects.create(model_name=Tombstone.ARTICLE, object_id=instance.pk, article_id=instance.pk)
+
+
+@receiver(post_delete, sender=Comment)
+def update_counters_on_comment_delete(sender, instance, **kwargs):
+    # Also called for every comment removed by a cascade; updates of already deleted rows are no-op
+    change_comment_count(instance.article_id, -1)
+    change_reply_count(instance.parent_comment_id, -1)
+
+
+def publish_after_commit(article_id: int, event_type: str, data: dict):
+    # Purges of tombstoned articles have no listeners
+    if article_id is None or counters_suspended():
+        return
+    transaction.on_commit(lambda: events.broker.publish(article_id, event_type, data))
+
+
+def comment_event_data(comment: Comment) -> dict:
+    return {
+        "id": comment.pk,
+        "article": comment.article_id,
+        "parent_comment": comment.parent_comment_id,
+        "author": comment.author_id,
+        "comment_text": comment.comment_text,
+        "count_of_likes": comment.count_of_likes,
+        "reply_count": comment.reply_count,
+        "create_date": comment.create_date,
+        "update_date": comment.update_date,
+    }
+
+
+def reaction_event_data(like: LikeOnComment) -> dict:
+    return {
+        "id": like.pk,
+        "comment": like.comment_id,
+        "author": like.author_id,
+        "reaction": like.reaction,
+    }
+
+
+def get_like_article_id(like: LikeOnComment) -> int | None:
+    if LikeOnComment.comment.is_cached(like):
+        return like.comment.article_id
+    return Comment.objects.filter(pk=like.comment_id).values_list("article_id", flat=True).first()
+
+
+@receiver(post_save, sender=Comment)
+def publish_comment_saved(sender, instance, created, **kwargs):
+    event_type = events.COMMENT_CREATED if created else events.COMMENT_UPDATED
+    publish_after_commit(instance.article_id, event_type, comment_event_data(instance))
+
+
+@receiver(post_delete, sender=Comment)
+def publish_comment_deleted(sender, instance, **kwargs):
+    data = {"id": instance.pk, "article": instance.article_id, "parent_comment": instance.parent_comment_id}
+    publish_after_commit(instance.article_id, events.COMMENT_DELETED, data)
+
+
+@receiver(post_save, sender=LikeOnComment)
+def publish_reaction_saved(sender, instance, **kwargs):
+    if counters_suspended():
+        return
+    publish_after_commit(get_like_article_id(instance), events.REACTION_SET, reaction_event_data(instance))
+
+
+@receiver(post_delete, sender=LikeOnComment)
+def publish_reaction_deleted(sender, instance, **kwargs):
+    if counters_suspended():
+        return
+    publish_after_commit(get_like_article_id(instance), events.REACTION_DELETED, reaction_event_data(instance))
+
+
+def is_direct_delete(origin, model) -> bool:
+    """
+    True if the delete started from this model, not from a cascade of another one
+    """
+    return isinstance(origin, model) or getattr(origin, "model", None) is model
+
+
+def get_like_comment_author_id(like: LikeOnComment) -> int | None:
+    if LikeOnComment.comment.is_cached(like):
+        return like.comment.author_id
+    return Comment.objects.filter(pk=like.comment_id).values_list("author_id", flat=True).first()
+
+
+@receiver(post_save, sender=Article)
+def update_stats_on_article_save(sender, instance, created, **kwargs):
+    if created:
+        change_author_stat(instance.author_id, "article_count", 1)
+    else:
+        loaded_author_id = getattr(instance, "loaded_author_id", instance.author_id)
+        if loaded_author_id != instance.author_id:
+            change_author_stat(loaded_author_id, "article_count", -1)
+            change_author_stat(instance.author_id, "article_count", 1)
+    instance.loaded_author_id = instance.author_id
+
+
+@receiver(post_delete, sender=Article)
+def update_stats_on_article_delete(sender, instance, **kwargs):
+    # Tombstoned articles were subtracted when they were hidden
+    if instance.deleted_at is None:
+        change_author_stat(instance.author_id, "article_count", -1)
+
+
+@receiver(post_save, sender=Comment)
+def update_stats_on_comment_save(sender, instance, created, **kwargs):
+    loaded_author_id = getattr(instance, "loaded_author_id", instance.author_id)
+    if created:
+        change_author_stat(instance.author_id, "comment_count", 1)
+    elif loaded_author_id != instance.author_id:
+        change_author_stat(loaded_author_id, "comment_count", -1)
+        change_author_stat(instance.author_id, "comment_count", 1)
+        change_author_stat(loaded_author_id, "likes_received", -instance.count_of_likes)
+        change_author_stat(instance.author_id, "likes_received", instance.count_of_likes)
+    instance.loaded_author_id = instance.author_id
+
+
+@receiver(post_delete, sender=Comment)
+def update_stats_on_comment_delete(sender, instance, **kwargs):
+    change_author_stat(instance.author_id, "comment_count", -1)
+    # Likes deleted together with the comment are subtracted here at once
+    change_author_stat(instance.author_id, "likes_received", -instance.count_of_likes)
+
+
+@receiver(post_save, sender=LikeOnComment)
+def update_stats_on_like_save(sender, instance, created, **kwargs):
+    if created:
+        change_author_stat(get_like_comment_author_id(instance), "likes_received", 1)
+
+
+@receiver(post_delete, sender=LikeOnComment)
+def update_stats_on_like_delete(sender, instance, origin=None, **kwargs):
+    if is_direct_delete(origin, LikeOnComment):
+        change_author_stat(get_like_comment_author_id(instance), "likes_received", -1)
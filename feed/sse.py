@@ -0,0 +1,143 @@
+import asyncio
+import re
+from importlib import import_module
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth import aget_user
+from django.http import HttpRequest
+from django.http.cookie import parse_cookie
+from rest_framework import exceptions
+
+from feed.authentication import TOKEN_KEYWORD, authenticate_token
+from feed.events import DEFAULT_QUEUE_SIZE, broker
+from feed.models import Article
+from feed.sharding import get_article_shard
+from pseudo_twitter.sharding import using_shard
+
+SSE_PATH = re.compile(r"^/feed/articles/(?P<article_id>\d+)/events$")
+
+DEFAULT_HEARTBEAT = 15
+RETRY_MILLISECONDS = 3000
+
+
+def get_header(scope, name: bytes) -> str | None:
+    for header_name, value in scope.get("headers", ()):
+        if header_name.lower() == name:
+            return value.decode("latin-1")
+    return None
+
+
+async def send_error(send, status_code: int, detail: bytes, headers: list | None = None):
+    await send({
+        "type": "http.response.start",
+        "status": status_code,
+        "headers": [(b"content-type", b"application/json"), *(headers or ())],
+    })
+    await send({"type": "http.response.body", "body": b'{"detail": "' + detail + b'"}'})
+
+
+async def wait_for_disconnect(receive):
+    while True:
+        message = await receive()
+        if message["type"] == "http.disconnect":
+            return
+
+
+async def authenticate(scope):
+    """
+    Author of the stream from the bearer token or the session cookie, like the API authenticates requests
+    :return: author, None without credentials
+    :raise AuthenticationFailed: for a rejected token
+    """
+    auth = (get_header(scope, b"authorization") or "").encode("latin-1").split()
+    if auth and auth[0].lower() == TOKEN_KEYWORD:
+        if len(auth) != 2:
+            raise exceptions.AuthenticationFailed("Invalid token header.")
+        author, _ = await sync_to_async(authenticate_token)(auth[1])
+        return author
+
+    session_key = parse_cookie(get_header(scope, b"cookie") or "").get(settings.SESSION_COOKIE_NAME)
+    if session_key is None:
+        return None
+    request = HttpRequest()
+    request.session = import_module(settings.SESSION_ENGINE).SessionStore(session_key)
+    user = await aget_user(request)
+    return user if user.is_authenticated else None
+
+
+async def sse_application(scope, receive, send):
+    """
+    Server-Sent Events stream of comment and reaction changes of an article:
+    GET /feed/articles/<article_id>/events, resumable with the Last-Event-ID header.
+    Only authenticated authors may subscribe, as to the article itself
+    """
+    if scope["method"] != "GET":
+        await send_error(send, 405, b"Method not allowed.")
+        return
+
+    try:
+        author = await authenticate(scope)
+    except exceptions.AuthenticationFailed as error:
+        await send_error(send, 403, str(error.detail).encode())
+        return
+    if author is None:
+        await send_error(
+            send, 401, b"Authentication credentials were not provided.",
+            [(b"www-authenticate", b'Bearer realm="api"')],
+        )
+        return
+
+    article_id = int(SSE_PATH.match(scope["path"]).group("article_id"))
+    # The article lives on its shard, queries of the stream go there
+    shard = await sync_to_async(get_article_shard)(article_id)
+    if shard is None:
+        await send_error(send, 404, b"Not Found")
+        return
+    with using_shard(shard):
+        await stream_article_events(scope, receive, send, article_id)
+
+
+async def stream_article_events(scope, receive, send, article_id: int):
+    article_exists = await sync_to_async(Article.objects.filter(pk=article_id).exists)()
+    if not article_exists:
+        await send_error(send, 404, b"Not Found")
+        return
+
+    heartbeat = getattr(settings, "EVENTS_HEARTBEAT", DEFAULT_HEARTBEAT)
+    loop = asyncio.get_running_loop()
+    queue = asyncio.Queue(maxsize=getattr(settings, "EVENTS_QUEUE_SIZE", DEFAULT_QUEUE_SIZE))
+    subscription = broker.subscribe(article_id, loop, queue, get_header(scope, b"last-event-id"))
+    disconnected = asyncio.ensure_future(wait_for_disconnect(receive))
+
+    try:
+        await send({
+            "type": "http.response.start",
+            "status": 200,
+            "headers": [
+                (b"content-type", b"text/event-stream; charset=utf-8"),
+                (b"cache-control", b"no-cache"),
+                (b"x-accel-buffering", b"no"),
+            ],
+        })
+        await send({"type": "http.response.body", "body": f"retry: {RETRY_MILLISECONDS}\n\n".encode(), "more_body": True})
+
+        while not disconnected.done():
+            next_event = asyncio.ensure_future(queue.get())
+            done, _ = await asyncio.wait({next_event, disconnected}, timeout=heartbeat, return_when=asyncio.FIRST_COMPLETED)
+            if next_event not in done:
+                next_event.cancel()
+                if not disconnected.done():
+                    await send({"type": "http.response.body", "body": b": heartbeat\n\n", "more_body": True})
+                continue
+
+            if subscription.overflowed:
+                # The client is too slow; it reconnects and resumes from its Last-Event-ID
+                break
+            await send({"type": "http.response.body", "body": next_event.result().encode(), "more_body": True})
+
+        if not disconnected.done():
+            await send({"type": "http.response.body", "body": b"", "more_body": False})
+    finally:
+        broker.unsubscribe(subscription)
+        disconnected.cancel()
@@ -0,0 +1,142 @@
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from feed.counters import change_counter, counters_suspended
+from feed.models import Article, Author, AuthorStats, Comment, LikeOnComment
+from feed.sharding import exclude_deleted_authors
+from pseudo_twitter.sharding import for_each_shard, is_sharded
+
+STATS_FIELDS = ["article_count", "comment_count", "likes_received"]
+
+
+def change_author_stat(author_id: int | None, field_name: str, delta: int):
+    """
+    Atomically change one value of AuthorStats, the row is created on the first increment
+    :param author_id: id of author, nothing is done for None
+    :param field_name: name of AuthorStats field
+    :param delta: value added to the field
+    """
+    if author_id is None or not delta or counters_suspended():
+        return
+    updated = change_counter(AuthorStats, author_id, field_name, delta)
+    if not updated and delta > 0 and not AuthorStats.objects.filter(author_id=author_id).exists():
+        # A missing row is built from the data, which already include this change
+        rebuild_author_stats(author_id, author_id + 1)
+
+
+def _count_by_author(queryset, author_field: str):
+    counts = queryset.filter(
+        **{author_field: OuterRef("pk")}
+    ).order_by().values(author_field).annotate(count=Count("pk")).values("count")
+    return Coalesce(Subquery(counts), 0)
+
+
+def get_real_stats():
+    """
+    Expressions computing AuthorStats values for an Author row
+    """
+    return {
+        "article_count": _count_by_author(Article.objects.all(), "author"),
+        "comment_count": _count_by_author(Comment.objects.visible(), "author"),
+        "likes_received": _count_by_author(
+            LikeOnComment.objects.filter(
+                comment__article__deleted_at__isnull=True,
+                comment__author__deleted_at__isnull=True,
+                author__deleted_at__isnull=True
+            ),
+            "comment__author"
+        ),
+    }
+
+
+def _count_by_author_on_shard(first_pk: int, last_pk: int) -> dict:
+    querysets = {
+        "article_count": (Article.objects.all(), "author_id"),
+        "comment_count": (Comment.objects.visible(), "author_id"),
+        "likes_received": (
+            exclude_deleted_authors(
+                exclude_deleted_authors(
+                    LikeOnComment.objects.filter(comment__article__deleted_at__isnull=True),
+                    "comment__author"
+                )
+            ),
+            "comment__author_id"
+        ),
+    }
+    return {
+        name: list(
+            queryset.filter(
+                **{f"{author_field}__gte": first_pk, f"{author_field}__lt": last_pk}
+            ).order_by().values(author_field).annotate(count=Count("pk")).values_list(author_field, "count")
+        )
+        for name, (queryset, author_field) in querysets.items()
+    }
+
+
+def gather_real_stats(first_pk: int, last_pk: int) -> dict[int, dict]:
+    """
+    Statistics of authors in a range of primary keys summed over all shards
+    :return: dict {author id: {field name: value}}
+    """
+    author_stats = {
+        author_id: dict.fromkeys(STATS_FIELDS, 0)
+        for author_id in Author.objects.filter(pk__gte=first_pk, pk__lt=last_pk).values_list("pk", flat=True)
+    }
+    for counts in for_each_shard(lambda shard: _count_by_author_on_shard(first_pk, last_pk)):
+        for name, author_counts in counts.items():
+            for author_id, count in author_counts:
+                if author_id in author_stats:
+                    author_stats[author_id][name] += count
+    return author_stats
+
+
+def rebuild_author_stats(first_pk: int, last_pk: int) -> int:
+    """
+    Recompute statistics of authors in a range of primary keys
+    :param first_pk: first primary key of the range (inclusive)
+    :param last_pk: last primary key of the range (exclusive)
+    :return: number of rebuilt rows
+    """
+    if is_sharded():
+        rows = [
+            AuthorStats(author_id=author_id, **values)
+            for author_id, values in gather_real_stats(first_pk, last_pk).items()
+        ]
+    else:
+        rows = [
+            AuthorStats(author_id=author_id, **dict(zip(STATS_FIELDS, values)))
+            for author_id, *values in Author.objects.filter(
+                pk__gte=first_pk,
+                pk__lt=last_pk
+            ).annotate(
+                **{f"real_{name}": value for name, value in get_real_stats().items()}
+            ).values_list(
+                "pk", *[f"real_{name}" for name in STATS_FIELDS]
+            )
+        ]
+    AuthorStats.objects.bulk_create(
+        rows,
+        update_conflicts=True,
+        unique_fields=["author"],
+        update_fields=STATS_FIELDS,
+    )
+    return len(rows)
+
+
+def subtract_article_stats(article_ids: list[int]):
+    """
+    Remove comments and likes received in the hidden articles from statistics of their authors.
+    The comments themselves are purged later with counters suspended.
+    :param article_ids: ids of tombstoned articles
+    """
+    comments = Comment.objects.filter(
+        article_id__in=article_ids
+    ).order_by().values("author_id").annotate(count=Count("pk")).values_list("author_id", "count")
+    for author_id, count in comments:
+        change_author_stat(author_id, "comment_count", -count)
+
+    likes = LikeOnComment.objects.filter(
+        comment__article_id__in=article_ids
+    ).order_by().values("comment__author_id").annotate(count=Count("pk")).values_list("comment__author_id", "count")
+    for author_id, count in likes:
+        change_author_stat(author_id, "likes_received", -count)
@@ -1,59 +1,117 @@
-from drf_spectacular.utils import inline_serializer
+from django.utils.functional import SimpleLazyObject
+from drf_spectacular.utils import OpenApiParameter
 from rest_framework import serializers, status
 from rest_framework.response import Response
 
+
+def lazy_inline_serializer(name: str, get_fields):
+    """
+    inline_serializer built on first use: the schema serializers are only needed when the schema is generated
+    :param name: component name
+    :param get_fields: callable returning the fields dict
+    :return: lazy serializer instance
+    """
+    def build():
+        from drf_spectacular.utils import inline_serializer
+        return inline_serializer(name, get_fields())
+
+    return SimpleLazyObject(build)
+
+
 # schemas permission denied for documentation
 SCHEMA_PERMISSION_DENIED = {
-    status.HTTP_401_UNAUTHORIZED: inline_serializer(
+    status.HTTP_401_UNAUTHORIZED: lazy_inline_serializer(
         "Unauthorized",
-        {
+        lambda: {
             "detail": serializers.CharField(default="You do not have sufficient permissions to perform this action."),
         }
     ),
-    status.HTTP_403_FORBIDDEN: inline_serializer(
+    status.HTTP_403_FORBIDDEN: lazy_inline_serializer(
         "Forbidden",
-        {
+        lambda: {
             "detail_": serializers.CharField(default="Authentication credentials were not provided."),
         }
     )
 }
 
 STATUS_204 = {
-    status.HTTP_204_NO_CONTENT: inline_serializer(
-        "No Content",
-        {
+    status.HTTP_204_NO_CONTENT: lazy_inline_serializer(
+        "NoContent",
+        lambda: {
             "detail": serializers.CharField(default="No Content"),
         }
     )
 }
 
+STATUS_202_DELETION = {
+    status.HTTP_202_ACCEPTED: lazy_inline_serializer(
+        "DeletionAccepted",
+        lambda: {
+            "job_id": serializers.IntegerField(),
+        }
+    )
+}
+
+STATUS_202_PROVISIONING = {
+    status.HTTP_202_ACCEPTED: lazy_inline_serializer(
+        "ProvisioningAccepted",
+        lambda: {
+            "job_id": serializers.IntegerField(),
+        }
+    )
+}
+
 STATUS_400 = {
-    status.HTTP_400_BAD_REQUEST: inline_serializer(
-        "Bad Request",
-        {
+    status.HTTP_400_BAD_REQUEST: lazy_inline_serializer(
+        "BadRequest",
+        lambda: {
             "detail": serializers.CharField(default="Bad Request"),
         }
     )
 }
 
 STATUS_404 = {
-    status.HTTP_404_NOT_FOUND: inline_serializer(
-        "Not Found",
-        {
+    status.HTTP_404_NOT_FOUND: lazy_inline_serializer(
+        "NotFound",
+        lambda: {
             "detail": serializers.CharField(default="Not Found"),
         }
     )
 }
 
+STATUS_410 = {
+    status.HTTP_410_GONE: lazy_inline_serializer(
+        "Gone",
+        lambda: {
+            "errors": serializers.CharField(default="The cursor is too old, a full sync is required."),
+        }
+    )
+}
+
 STATUS_500 = {
-    status.HTTP_500_INTERNAL_SERVER_ERROR: inline_serializer(
-        "Internal Server Error",
-        {
+    status.HTTP_500_INTERNAL_SERVER_ERROR: lazy_inline_serializer(
+        "InternalServerError",
+        lambda: {
             "detail": serializers.CharField(default="Internal Server Error"),
         }
     )
 }
 
+SCHEMA_SYNC_CHANGES = lazy_inline_serializer(
+    "Changes",
+    lambda: {
+        "changes": serializers.ListField(child=serializers.DictField()),
+        "next_cursor": serializers.CharField(),
+        "has_more": serializers.BooleanField(),
+    }
+)
+
+# Query parameter of list views with StreamingListMixin
+SCHEMA_STREAM_PARAMETER = OpenApiParameter(
+    "stream", type=bool, required=False,
+    description="Stream all rows as one JSON array instead of a page, page_size is ignored"
+)
+
 SCHEMA_GET_POST_STATUSES = {
     **STATUS_400,
     **STATUS_500
@@ -0,0 +1,137 @@
+import datetime
+
+from django.conf import settings
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from feed.models import Tombstone
+from feed.utils import decode_cursor, encode_cursor
+
+DEFAULT_LIMIT = 100
+MAX_LIMIT = 1000
+DEFAULT_TOMBSTONE_RETENTION = 30 * 24 * 60 * 60
+DEFAULT_SAFETY_WINDOW = 5
+
+CHANGE_UPSERT = "upsert"
+CHANGE_DELETE = "delete"
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+class ExpiredCursor(ValueError):
+    pass
+
+
+def parse_position(value) -> tuple[datetime.datetime, int] | None:
+    if value is None:
+        return None
+    try:
+        timestamp, object_id = value
+        timestamp = parse_datetime(timestamp)
+        object_id = int(object_id)
+    except (TypeError, ValueError):
+        raise InvalidCursor()
+    if timestamp is None:
+        raise InvalidCursor()
+    return timestamp, object_id
+
+
+def decode_sync_cursor(cursor: str | None) -> tuple:
+    """
+    Decode ?since= cursor of the change feed
+    :param cursor: cursor from a previous response or None for a full sync
+    :return: positions (update_date, id) of rows and (deleted_at, id) of tombstones
+    """
+    if not cursor:
+        return None, None
+    position = decode_cursor(cursor)
+    if position is None:
+        raise InvalidCursor()
+    rows_position = parse_position(position.get("rows"))
+    tombstones_position = parse_position(position.get("tombstones"))
+
+    retention = getattr(settings, "SYNC_TOMBSTONE_RETENTION", DEFAULT_TOMBSTONE_RETENTION)
+    horizon = timezone.now() - datetime.timedelta(seconds=retention)
+    if tombstones_position and tombstones_position[0] < horizon:
+        # Tombstones older than the retention are pruned, deletes could be missed
+        raise ExpiredCursor()
+    return rows_position, tombstones_position
+
+
+def after(queryset, position, date_field: str):
+    if position is None:
+        return queryset
+    timestamp, object_id = position
+    return queryset.filter(
+        Q(**{f"{date_field}__gt": timestamp}) | Q(**{date_field: timestamp, "id__gt": object_id})
+    )
+
+
+def collect_changes(rows, tombstones, cursor: str | None, limit: int, serialize) -> dict:
+    """
+    Changes of rows and tombstones after the cursor in stable (date, id) order.
+    Dates are taken before the writes commit, so only changes older than SYNC_SAFETY_WINDOW are sent:
+    the cursor never passes a change that becomes visible later
+    :param rows: queryset of alive rows with update_date
+    :param tombstones: queryset of Tombstone
+    :param cursor: ?since= cursor
+    :param limit: max number of changes
+    :param serialize: callable returning serialized data of a list of rows
+    :return: response data
+    """
+    rows_position, tombstones_position = decode_sync_cursor(cursor)
+    safety_window = getattr(settings, "SYNC_SAFETY_WINDOW", DEFAULT_SAFETY_WINDOW)
+    horizon = timezone.now() - datetime.timedelta(seconds=safety_window)
+
+    rows = after(rows, rows_position, "update_date").filter(update_date__lt=horizon)
+    changed_rows = list(rows.order_by("update_date", "id")[:limit + 1])
+    if cursor is None:
+        # A full sync downloads the current rows, only later deletes matter
+        tombstones_position = (horizon, 0)
+        deleted = []
+    else:
+        tombstones = after(tombstones, tombstones_position, "deleted_at").filter(deleted_at__lt=horizon)
+        deleted = list(tombstones.order_by("deleted_at", "id")[:limit + 1])
+
+    merged = [(row.update_date, 0, row.id, row) for row in changed_rows]
+    merged += [(tombstone.deleted_at, 1, tombstone.id, tombstone) for tombstone in deleted]
+    merged.sort(key=lambda change: change[:3])
+    has_more = len(merged) > limit
+    merged = merged[:limit]
+
+    emitted_rows = [change[3] for change in merged if change[1] == 0]
+    emitted_tombstones = [change[3] for change in merged if change[1] == 1]
+    serialized_rows = iter(serialize(emitted_rows))
+
+    changes = []
+    for _, kind, object_id, item in merged:
+        if kind == 0:
+            changes.append({"type": CHANGE_UPSERT, "id": object_id, "data": next(serialized_rows)})
+        else:
+            changes.append({"type": CHANGE_DELETE, "id": item.object_id})
+
+    if emitted_rows:
+        rows_position = (emitted_rows[-1].update_date, emitted_rows[-1].id)
+    if emitted_tombstones:
+        tombstones_position = (emitted_tombstones[-1].deleted_at, emitted_tombstones[-1].id)
+
+    next_cursor = encode_cursor({
+        "rows": [rows_position[0].isoformat(), rows_position[1]] if rows_position else None,
+        "tombstones": [tombstones_position[0].isoformat(), tombstones_position[1]] if tombstones_position else None,
+    })
+    return {
+        "changes": changes,
+        "next_cursor": next_cursor,
+        "has_more": has_more,
+    }
+
+
+def article_tombstones():
+    return Tombstone.objects.filter(model_name=Tombstone.ARTICLE)
+
+
+def comment_tombstones(article_id: int):
+    return Tombstone.objects.filter(model_name=Tombstone.COMMENT, article_id=article_id)
@@ -0,0 +1,129 @@
+import datetime
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from feed.archive import archive_articles
+from feed.counters import COUNTERS, iter_pk_chunks, reconcile_counter
+from feed.jobs import enqueue, job
+from feed.models import Tombstone
+from feed.provisioning import provision_authors
+from feed.purge import delete_in_batches, get_batch_size, purge_article, purge_author
+from feed.sync import DEFAULT_TOMBSTONE_RETENTION
+from feed.trending import DEFAULT_BATCH_SIZE, recompute_trending
+from pseudo_twitter.sharding import get_all_shards, using_shard
+
+RECONCILE_CHUNK_SIZE = 1000
+DEFAULT_TRENDING_INTERVAL = 60
+DEFAULT_ARCHIVE_INTERVAL = 24 * 60 * 60
+
+
+@job("reconcile_counters")
+def reconcile_counters_job(current_job, first_pk=0):
+    """
+    Recount denormalized counters of every shard in chunks, the position is kept in the progress,
+    so a restarted job continues from the last finished chunk
+    """
+    first_pk = current_job.progress.get("first_pk", first_pk)
+    shard_index = current_job.progress.get("shard", 0)
+    counter_index = current_job.progress.get("counter", 0)
+
+    shards = get_all_shards()
+    for shard_index in range(shard_index, len(shards)):
+        shard = shards[shard_index]
+        with using_shard(shard):
+            for index, (model, field_name, real_value) in enumerate(COUNTERS[counter_index:], start=counter_index):
+                repaired = current_job.progress.get("repaired", 0)
+                for chunk_first_pk in iter_pk_chunks(model, first_pk, RECONCILE_CHUNK_SIZE):
+                    with transaction.atomic(using=shard):
+                        repaired += reconcile_counter(
+                            model, field_name, real_value(), chunk_first_pk, chunk_first_pk + RECONCILE_CHUNK_SIZE
+                        )
+                    first_pk = chunk_first_pk + RECONCILE_CHUNK_SIZE
+                    current_job.report_progress(shard=shard_index, counter=index, first_pk=first_pk, repaired=repaired)
+                first_pk = 0
+                current_job.report_progress(shard=shard_index, counter=index + 1, first_pk=0, repaired=repaired)
+        counter_index = 0
+        current_job.report_progress(shard=shard_index + 1, counter=0, first_pk=0)
+
+
+@job("recompute_trending")
+def recompute_trending_job(current_job, reschedule=True):
+    for shard in get_all_shards():
+        caught_up = False
+        while not caught_up:
+            _, caught_up = recompute_trending(DEFAULT_BATCH_SIZE, shard)
+
+    if reschedule:
+        interval = getattr(settings, "TRENDING_INTERVAL", DEFAULT_TRENDING_INTERVAL)
+        enqueue(
+            "recompute_trending",
+            dedup_key="recompute_trending",
+            run_at=timezone.now() + datetime.timedelta(seconds=interval),
+        )
+
+
+@job("archive_threads")
+def archive_threads_job(current_job, reschedule=True):
+    archived = current_job.progress.get("archived", 0)
+    done = False
+    while not done:
+        count, done = archive_articles()
+        archived += count
+        current_job.report_progress(archived=archived)
+
+    if reschedule:
+        interval = getattr(settings, "ARCHIVE_INTERVAL", DEFAULT_ARCHIVE_INTERVAL)
+        enqueue(
+            "archive_threads",
+            dedup_key="archive_threads",
+            run_at=timezone.now() + datetime.timedelta(seconds=interval),
+        )
+
+
+@job("purge_article")
+def purge_article_job(current_job, article_id):
+    purge_article(current_job, article_id)
+
+
+@job("purge_author")
+def purge_author_job(current_job, author_id):
+    purge_author(current_job, author_id)
+
+
+@job("prune_tombstones")
+def prune_tombstones_job(current_job):
+    retention = getattr(settings, "SYNC_TOMBSTONE_RETENTION", DEFAULT_TOMBSTONE_RETENTION)
+    horizon = timezone.now() - datetime.timedelta(seconds=retention)
+    deleted = delete_in_batches(Tombstone.objects.filter(deleted_at__lt=horizon), get_batch_size())
+    current_job.report_progress(deleted=deleted)
+
+
+def scrub_passwords(payload: dict) -> dict:
+    # Raw passwords are not kept once the job is done or failed for good
+    return {"authors": [{"username": author["username"]} for author in payload.get("authors", [])]}
+
+
+@job("provision_authors", scrub=scrub_passwords)
+def provision_authors_job(current_job, authors):
+    """
+    Create authors of the bulk endpoint. A rerun skips the authors created before the failure,
+    they are counted as created, not as skipped
+    """
+    created_usernames = current_job.progress.get("created_usernames", [])
+    created_before = set(created_usernames)
+
+    def report(batch):
+        created_usernames.extend(author.username for author in batch)
+        current_job.report_progress(created=len(created_usernames), created_usernames=created_usernames)
+
+    _, taken = provision_authors(authors, on_batch=report)
+    skipped = []
+    for username in taken:
+        if username in created_before:
+            # Created by an earlier attempt, later duplicates of the row are still skipped
+            created_before.discard(username)
+            continue
+        skipped.append(username)
+    current_job.report_progress(created=len(created_usernames), skipped=skipped)
\ No newline at end of file
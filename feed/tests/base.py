@@ -0,0 +1,56 @@
+from django.core.cache import caches
+from django.test import TestCase, override_settings
+
+from feed.jobs import claim_next, run_job
+from feed.models import Article, Author
+from feed.sharding import get_article_shard
+
+# The shared tier lives in the memory of the test process instead of the cache directory
+TEST_CACHES = {
+    "default": {
+        "BACKEND": "pseudo_twitter.tiered_cache.TieredCache",
+        "OPTIONS": {
+            "SHARED": "shared",
+            "LOCAL_MAX_BYTES": 1024 * 1024,
+            "LOCAL_TIMEOUT": 5,
+            "POLL_INTERVAL": 0.5,
+            "IMMUTABLE_KEY_PREFIXES": ["compressed:"],
+        },
+    },
+    "shared": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": "feed-tests",
+    },
+}
+
+
+def create_author(username: str, **kwargs) -> Author:
+    return Author.objects.create_user(
+        username=username, password="password", first_name="First", last_name="Last", **kwargs
+    )
+
+
+def run_jobs():
+    """
+    Run every due job of the queue in the test thread
+    """
+    while (job := claim_next()) is not None:
+        run_job(job)
+
+
+@override_settings(CACHES=TEST_CACHES)
+class FeedTestCase(TestCase):
+    databases = "__all__"
+
+    def setUp(self):
+        caches["shared"].clear()
+        caches["default"].clear()
+        self.author = create_author("author")
+        self.reader = create_author("reader")
+        self.article = Article.objects.create(title="Title", content="Content", author=self.author)
+        # Queries outside requests are routed like in the jobs, requests are routed by ShardMiddleware
+        self.shard = get_article_shard(self.article.pk)
+
+    def refresh(self, instance):
+        instance.refresh_from_db()
+        return instance
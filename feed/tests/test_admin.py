@@ -0,0 +1,39 @@
+from django.contrib.admin import site
+from django.test import RequestFactory, override_settings
+
+from feed.admin import find_author_ids
+from feed.models import Article, Author
+from feed.tests.base import FeedTestCase, create_author
+from pseudo_twitter.pagination import EstimatedCountPaginator
+
+
+class AdminTests(FeedTestCase):
+    def setUp(self):
+        super().setUp()
+        self.client.force_login(create_author("admin", is_staff=True, is_superuser=True))
+
+    def test_changelists(self):
+        for model in ("article", "author", "comment", "likeoncomment", "job"):
+            with self.subTest(model=model):
+                self.assertEqual(self.client.get(f"/admin/feed/{model}/").status_code, 200)
+
+    def test_search_by_author_prefix(self):
+        self.assertEqual(find_author_ids("auth"), [self.author.pk])
+
+        self.assertEqual(self.client.get("/admin/feed/article/", {"q": "auth"}).status_code, 200)
+
+        article_admin = site._registry[Article]
+        request = RequestFactory().get("/admin/feed/article/")
+        queryset = Article.objects.using(self.shard).all()
+        for search_term, expected in (("auth", [self.article.pk]), ("read", []), ("Title", [self.article.pk])):
+            with self.subTest(search_term=search_term):
+                found, _ = article_admin.get_search_results(request, queryset, search_term)
+                self.assertEqual([article.pk for article in found], expected)
+
+    @override_settings(ADMIN_COUNT_LIMIT=2)
+    def test_count_is_capped(self):
+        # author, reader and admin
+        paginator = EstimatedCountPaginator(Author.objects.order_by("pk"), 10)
+        with self.assertNumQueries(1):
+            self.assertEqual(paginator.count, 3)
+        self.assertEqual(EstimatedCountPaginator(Article.objects.using(self.shard).order_by("pk"), 10).count, 1)
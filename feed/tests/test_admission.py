@@ -0,0 +1,83 @@
+import threading
+
+from django.test import override_settings
+
+from feed.models import Comment
+from feed.tests.base import FeedTestCase
+from pseudo_twitter import admission
+from pseudo_twitter.admission import REJECT_QUEUE_FULL, REJECT_TIMEOUT, LimiterRegistry, RouteLimiter
+from pseudo_twitter.sharding import using_shard
+
+ADMISSION_CONTROL = {
+    "list_likes_create_like_on_comment": {
+        "MAX_CONCURRENCY": 1,
+        "MAX_QUEUE": 0,
+        "MAX_WAIT": 0.05,
+        "RETRY_AFTER": 3,
+    },
+}
+
+
+class RouteLimiterTests(FeedTestCase):
+    def test_requests_over_the_queue_are_shed(self):
+        limiter = RouteLimiter("route", max_concurrency=1, max_queue=0, max_wait=1, retry_after=1)
+        self.assertIsNone(limiter.acquire())
+        self.assertEqual(limiter.acquire(), REJECT_QUEUE_FULL)
+        limiter.release()
+        self.assertIsNone(limiter.acquire())
+        self.assertEqual(limiter.stats()["shed_queue_full"], 1)
+
+    def test_waiting_requests_time_out(self):
+        limiter = RouteLimiter("route", max_concurrency=1, max_queue=1, max_wait=0.05, retry_after=1)
+        self.assertIsNone(limiter.acquire())
+        self.assertEqual(limiter.acquire(), REJECT_TIMEOUT)
+        self.assertEqual(limiter.stats()["waiting"], 0)
+
+    def test_release_admits_a_waiting_request(self):
+        limiter = RouteLimiter("route", max_concurrency=1, max_queue=1, max_wait=5, retry_after=1)
+        self.assertIsNone(limiter.acquire())
+        results = []
+        waiter = threading.Thread(target=lambda: results.append(limiter.acquire()))
+        waiter.start()
+        while not limiter.stats()["waiting"]:
+            pass
+        limiter.release()
+        waiter.join()
+        self.assertEqual(results, [None])
+        self.assertEqual(limiter.stats()["active"], 1)
+
+
+@override_settings(ADMISSION_CONTROL=ADMISSION_CONTROL)
+class AdmissionMiddlewareTests(FeedTestCase):
+    def setUp(self):
+        super().setUp()
+        previous_registry = admission.registry
+        admission.registry = LimiterRegistry()
+        self.addCleanup(setattr, admission, "registry", previous_registry)
+        self.limiter = admission.registry.limiters["list_likes_create_like_on_comment"]
+
+        with using_shard(self.shard):
+            self.comment = Comment.objects.create(comment_text="Comment", author=self.author, article=self.article)
+        self.url = f"/feed/comment/{self.comment.pk}/like"
+
+    def test_full_route_answers_429(self):
+        self.client.force_login(self.reader)
+        self.assertIsNone(self.limiter.acquire())
+        response = self.client.post(self.url, {"reaction": "&#128077;"})
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(response["Retry-After"], "3")
+
+        self.limiter.release()
+        response = self.client.post(self.url, {"reaction": "&#128077;"})
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(self.limiter.stats()["active"], 0)
+
+    def test_reads_are_not_limited(self):
+        self.assertIsNone(self.limiter.acquire())
+        self.assertEqual(self.client.get(self.url).status_code, 403)
+
+    async def test_asgi_requests_are_not_limited(self):
+        await self.async_client.aforce_login(self.reader)
+        self.assertIsNone(self.limiter.acquire())
+        response = await self.async_client.post(self.url, {"reaction": "&#128077;"})
+        self.assertNotEqual(response.status_code, 429)
@@ -0,0 +1,69 @@
+import datetime
+from unittest import skipUnless
+
+from django.conf import settings
+from django.test import override_settings
+from django.utils import timezone
+
+from feed.archive import archive_articles, find_cold_articles, get_archive_horizon
+from feed.models import Article, Comment, LikeOnComment
+from feed.reactions import set_reaction
+from feed.sharding import get_article_shard
+from feed.tests.base import FeedTestCase
+from pseudo_twitter.sharding import get_archive_database, using_shard
+
+ARCHIVE_AFTER = 30 * 24 * 60 * 60
+
+
+class ArchiveTestCase(FeedTestCase):
+    def setUp(self):
+        super().setUp()
+        with using_shard(self.shard):
+            self.comment = Comment.objects.create(comment_text="Comment", author=self.reader, article=self.article)
+            set_reaction(self.author, self.comment, LikeOnComment.LIKE)
+
+    def make_cold(self):
+        old = timezone.now() - datetime.timedelta(seconds=ARCHIVE_AFTER * 2)
+        with using_shard(self.shard):
+            Article.all_objects.filter(pk=self.article.pk).update(create_date=old, update_date=old)
+            Comment.objects.filter(pk=self.comment.pk).update(update_date=old)
+            LikeOnComment.objects.filter(comment=self.comment).update(create_date=old.date())
+
+
+class ColdArticleTests(ArchiveTestCase):
+    def test_recent_threads_are_not_cold(self):
+        horizon = get_archive_horizon(ARCHIVE_AFTER)
+        self.assertEqual(find_cold_articles(self.shard, horizon, 10), [])
+
+        self.make_cold()
+        self.assertEqual(find_cold_articles(self.shard, horizon, 10), [self.article.pk])
+
+        # A new comment warms the thread up again
+        with using_shard(self.shard):
+            Comment.objects.create(comment_text="Reply", author=self.author, article=self.article,
+                                   parent_comment=self.comment)
+        self.assertEqual(find_cold_articles(self.shard, horizon, 10), [])
+
+    @override_settings(ARCHIVE_DATABASE=None)
+    def test_disabled_without_archive_database(self):
+        self.make_cold()
+        self.assertEqual(archive_articles(older_than=ARCHIVE_AFTER), (0, True))
+
+
+@skipUnless(settings.ARCHIVE_DATABASE, "Needs an archive database, e.g. ARCHIVE_DATABASE=archive")
+class ArchiveTests(ArchiveTestCase):
+    def test_cold_thread_moves_to_archive(self):
+        self.make_cold()
+        self.assertEqual(archive_articles(older_than=ARCHIVE_AFTER), (1, True))
+
+        archive = get_archive_database()
+        self.assertEqual(get_article_shard(self.article.pk), archive)
+        self.assertFalse(Article.all_objects.using(self.shard).filter(pk=self.article.pk).exists())
+        self.assertTrue(LikeOnComment.objects.using(archive).filter(comment=self.comment.pk).exists())
+
+        # Reads go through the directory to the archive
+        self.client.force_login(self.reader)
+        response = self.client.get(f"/feed/article/{self.article.pk}")
+        self.assertEqual(response.status_code, 200)
+        response = self.client.get(f"/feed/articles/{self.article.pk}/comments")
+        self.assertEqual([comment["count_of_likes"] for comment in response.json()["results"]], [1])
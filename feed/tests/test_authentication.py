@@ -0,0 +1,80 @@
+import time
+from unittest import mock
+
+import yaml
+
+from feed.authentication import AuthorCache, author_cache, issue_token
+from feed.models import Author, Comment
+from feed.tests.base import FeedTestCase
+from pseudo_twitter.schema import generate_schema
+from pseudo_twitter.sharding import using_shard
+
+
+class SignedTokenTests(FeedTestCase):
+    def setUp(self):
+        super().setUp()
+        author_cache.clear()
+        with using_shard(self.shard):
+            self.comment = Comment.objects.create(comment_text="Comment", author=self.author, article=self.article)
+        self.url = f"/feed/comment/{self.comment.pk}/like?current_user_like=false"
+
+    def get_with_token(self, token: str):
+        return self.client.get(self.url, HTTP_AUTHORIZATION=f"Bearer {token}")
+
+    def test_obtained_token_authenticates(self):
+        response = self.client.post("/feed/token", {"username": "reader", "password": "password"})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.get_with_token(response.json()["token"]).status_code, 200)
+
+    def test_wrong_password_gets_no_token(self):
+        response = self.client.post("/feed/token", {"username": "reader", "password": "wrong"})
+        self.assertEqual(response.status_code, 400)
+
+    def test_expired_token_is_rejected(self):
+        token = issue_token(self.reader)
+        with self.settings(AUTH_TOKEN_LIFETIME=60), mock.patch("time.time", return_value=time.time() + 61):
+            response = self.get_with_token(token)
+        self.assertEqual(response.status_code, 403)
+        self.assertEqual(response.json()["detail"], "Token has expired.")
+
+    def test_new_password_revokes_token(self):
+        token = issue_token(self.reader)
+        self.reader.set_password("new password")
+        self.reader.save()
+        self.assertEqual(self.get_with_token(token).status_code, 403)
+
+    def test_deactivation_by_other_worker_applies_after_cache_timeout(self):
+        token = issue_token(self.reader)
+        self.assertEqual(self.get_with_token(token).status_code, 200)
+        # An update without signals, like a change made in another worker process
+        Author.objects.filter(pk=self.reader.pk).update(is_active=False)
+        self.assertEqual(self.get_with_token(token).status_code, 200)
+
+        expired = time.monotonic() + author_cache.timeout
+        with mock.patch("feed.authentication.time.monotonic", return_value=expired):
+            self.assertEqual(self.get_with_token(token).status_code, 403)
+
+
+class AuthorCacheTests(FeedTestCase):
+    def test_entries_expire(self):
+        cache = AuthorCache(max_size=2, timeout=5)
+        cache.set(self.author)
+        self.assertEqual(cache.get(self.author.pk), self.author)
+        with mock.patch("feed.authentication.time.monotonic", return_value=time.monotonic() + 5):
+            self.assertIsNone(cache.get(self.author.pk))
+
+    def test_least_recently_used_is_evicted(self):
+        cache = AuthorCache(max_size=1, timeout=5)
+        cache.set(self.author)
+        cache.set(self.reader)
+        self.assertIsNone(cache.get(self.author.pk))
+        self.assertEqual(cache.get(self.reader.pk), self.reader)
+
+
+class SecuritySchemeTests(FeedTestCase):
+    def test_schema_declares_bearer_scheme(self):
+        schema = yaml.safe_load(generate_schema())
+        self.assertEqual(
+            schema["components"]["securitySchemes"]["bearerAuth"],
+            {"type": "http", "scheme": "bearer", "description": "Token of POST /feed/token"},
+        )
@@ -0,0 +1,139 @@
+import threading
+import time
+
+from django.core.cache import caches
+from django.db import connections
+from django.test import SimpleTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+
+from feed.models import Comment, LikeOnComment
+from feed.reactions import set_reaction
+from feed.tests.base import TEST_CACHES, FeedTestCase
+from pseudo_twitter.coalescing import CoalescingCache, SingleFlight
+from pseudo_twitter.sharding import using_shard
+
+
+class SingleFlightTests(SimpleTestCase):
+    def run_concurrently(self, flights: SingleFlight, function) -> list:
+        release = threading.Event()
+        results = []
+
+        def call():
+            try:
+                results.append(flights.do("key", lambda: function(release)))
+            except ValueError as error:
+                results.append(error)
+
+        threads = [threading.Thread(target=call) for _ in range(3)]
+        threads[0].start()
+        while not flights.in_flight("key"):
+            time.sleep(0.001)
+        for thread in threads[1:]:
+            thread.start()
+        release.set()
+        for thread in threads:
+            thread.join()
+        return results
+
+    def test_concurrent_calls_share_the_result(self):
+        calls = []
+
+        def compute(release):
+            calls.append(1)
+            release.wait()
+            return len(calls)
+
+        self.assertEqual(self.run_concurrently(SingleFlight(), compute), [1, 1, 1])
+        self.assertEqual(len(calls), 1)
+
+    def test_error_is_shared(self):
+        def fail(release):
+            release.wait()
+            raise ValueError("failed")
+
+        flights = SingleFlight()
+        results = self.run_concurrently(flights, fail)
+        self.assertEqual(len(results), 3)
+        self.assertTrue(all(isinstance(result, ValueError) for result in results))
+        self.assertFalse(flights.in_flight("key"))
+
+
+@override_settings(CACHES=TEST_CACHES, RESPONSE_CACHE_ALIAS="shared")
+class CoalescingCacheTests(SimpleTestCase):
+    def setUp(self):
+        caches["shared"].clear()
+        self.coalescing_cache = CoalescingCache("test")
+        self.coalescing_cache.lock_timeout = 0.2
+        self.computed = 0
+
+    def compute(self):
+        self.computed += 1
+        return self.computed
+
+    def test_fresh_entry_is_reused(self):
+        first = self.coalescing_cache.get_or_compute("key", 1, self.compute)
+        second = self.coalescing_cache.get_or_compute("key", 1, self.compute)
+        self.assertEqual(first["id"], second["id"])
+        self.assertEqual(self.computed, 1)
+
+    def test_new_version_recomputes(self):
+        self.coalescing_cache.get_or_compute("key", 1, self.compute)
+        entry = self.coalescing_cache.get_or_compute("key", time.time_ns(), self.compute)
+        self.assertEqual(entry["value"], 2)
+
+    def test_stale_entry_is_served_while_another_process_computes(self):
+        self.coalescing_cache.get_or_compute("key", 1, self.compute)
+        # Another process holds the lock of the key
+        caches["shared"].add("test:key:lock", 1)
+
+        entry = self.coalescing_cache.get_or_compute("key", time.time_ns(), self.compute)
+        self.assertEqual((entry["value"], self.computed), (1, 1))
+
+    def test_waits_for_the_other_process_without_stale_entry(self):
+        caches["shared"].add("test:key:lock", 1)
+        started = time.monotonic()
+        # Nothing arrives before the lock timeout, the value is computed here
+        entry = self.coalescing_cache.get_or_compute("key", 1, self.compute)
+        self.assertGreaterEqual(time.monotonic() - started, self.coalescing_cache.lock_timeout)
+        self.assertEqual(entry["value"], 1)
+
+
+class ResponseCacheTests(FeedTestCase):
+    def setUp(self):
+        super().setUp()
+        with using_shard(self.shard):
+            self.comment = Comment.objects.create(comment_text="Comment", author=self.author, article=self.article)
+
+    def test_article_is_built_once_for_all_users(self):
+        url = f"/feed/article/{self.article.pk}"
+        self.client.force_login(self.reader)
+        with CaptureQueriesContext(connections[self.shard]) as queries:
+            self.assertEqual(self.client.get(url).status_code, 200)
+        self.assertTrue(any('"feed_article"."content"' in query["sql"] for query in queries))
+
+        self.client.force_login(self.author)
+        with CaptureQueriesContext(connections[self.shard]) as queries:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["comment_count"], 1)
+        # Only the ETag is checked, the article itself comes from the cache
+        self.assertFalse(any('"feed_article"."content"' in query["sql"] for query in queries))
+
+    def test_comments_etag_is_personal(self):
+        self.client.force_login(self.reader)
+        url = f"/feed/articles/{self.article.pk}/comments"
+        response = self.client.get(url)
+        etag = response["ETag"]
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        with self.captureOnCommitCallbacks(execute=True), using_shard(self.shard):
+            set_reaction(self.reader, self.comment, LikeOnComment.LIKE)
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["results"][0]["my_reaction"], LikeOnComment.LIKE)
+
+        # The cached thread is shared, reactions of other users are not in it
+        self.client.force_login(self.author)
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertIsNone(response.json()["results"][0]["my_reaction"])
@@ -0,0 +1,59 @@
+import gzip
+import json
+import zlib
+from unittest import mock, skipUnless
+
+from feed.models import Article
+from feed.tests.base import FeedTestCase
+from pseudo_twitter import compression
+from pseudo_twitter.sharding import using_shard
+
+LONG_CONTENT = "Content of a long article. " * 100
+
+
+class CompressionTests(FeedTestCase):
+    def setUp(self):
+        super().setUp()
+        with using_shard(self.shard):
+            Article.objects.filter(pk=self.article.pk).update(content=LONG_CONTENT)
+        self.client.force_login(self.reader)
+
+    def get_decoded(self, url: str, coding: str, decompress):
+        plain = self.client.get(url)
+        response = self.client.get(url, HTTP_ACCEPT_ENCODING=coding)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["Content-Encoding"], coding)
+        self.assertIn("Accept-Encoding", response["Vary"])
+        self.assertEqual(json.loads(decompress(response.content)), plain.json())
+
+    def test_gzip_round_trip(self):
+        self.get_decoded(f"/feed/article/{self.article.pk}", "gzip", gzip.decompress)
+
+    def test_deflate_round_trip(self):
+        self.get_decoded(f"/feed/article/{self.article.pk}", "deflate", zlib.decompress)
+
+    @skipUnless(compression._zstd is not None, "Needs compression.zstd or zstandard")
+    def test_zstd_round_trip(self):
+        self.get_decoded(f"/feed/article/{self.article.pk}", "zstd", compression._zstd.decompress)
+
+    def test_small_bodies_are_not_compressed(self):
+        with using_shard(self.shard):
+            Article.objects.filter(pk=self.article.pk).update(content="Short")
+        response = self.client.get(f"/feed/article/{self.article.pk}", HTTP_ACCEPT_ENCODING="gzip")
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(response.has_header("Content-Encoding"))
+
+    def test_cached_responses_are_compressed_once(self):
+        compress_gzip = mock.Mock(wraps=compression._compress_gzip)
+        url = f"/feed/article/{self.article.pk}"
+        with mock.patch.dict(compression.COMPRESSORS, gzip=compress_gzip):
+            first = self.client.get(url, HTTP_ACCEPT_ENCODING="gzip")
+            second = self.client.get(url, HTTP_ACCEPT_ENCODING="gzip")
+        self.assertEqual(first.content, second.content)
+        self.assertEqual(compress_gzip.call_count, 1)
+
+    def test_other_responses_are_not_cached(self):
+        with mock.patch.object(compression, "caches") as cache_handler:
+            body = compression.CompressedBodyCache().compress("gzip", LONG_CONTENT.encode())
+        self.assertEqual(gzip.decompress(body), LONG_CONTENT.encode())
+        cache_handler.__getitem__.assert_not_called()
@@ -0,0 +1,58 @@
+from feed.models import Comment, LikeOnComment
+from feed.reactions import set_reaction
+from feed.tests.base import FeedTestCase
+from pseudo_twitter.sharding import using_shard
+
+
+class ConditionalTests(FeedTestCase):
+    def setUp(self):
+        super().setUp()
+        self.client.force_login(self.reader)
+
+    def assert_not_modified(self, url: str) -> str:
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        etag = response["ETag"]
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        return etag
+
+    def test_article_not_modified(self):
+        self.assert_not_modified(f"/feed/article/{self.article.pk}")
+
+    def test_article_etag_changes_with_comments(self):
+        url = f"/feed/article/{self.article.pk}"
+        etag = self.assert_not_modified(url)
+        with self.captureOnCommitCallbacks(execute=True), using_shard(self.shard):
+            Comment.objects.create(comment_text="Comment", author=self.reader, article=self.article)
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["comment_count"], 1)
+
+    def test_missing_article(self):
+        self.assertEqual(self.client.get("/feed/article/0").status_code, 404)
+        self.assertEqual(self.client.get("/feed/article/invalid").status_code, 404)
+        self.assertEqual(self.client.get("/feed/articles/0/comments").status_code, 404)
+
+    def test_articles_etag_changes_with_author_names(self):
+        url = "/feed/article"
+        etag = self.assert_not_modified(url)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.author.first_name = "Renamed"
+            self.author.save()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["results"][0]["author_fullname"], "Renamed Last")
+
+    def test_comments_etag_changes_with_likes(self):
+        with using_shard(self.shard):
+            comment = Comment.objects.create(comment_text="Comment", author=self.author, article=self.article)
+        url = f"/feed/articles/{self.article.pk}/comments"
+        etag = self.assert_not_modified(url)
+
+        self.client.force_login(self.author)
+        with self.captureOnCommitCallbacks(execute=True), using_shard(self.shard):
+            set_reaction(self.reader, comment, LikeOnComment.LIKE)
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["results"][0]["count_of_likes"], 1)
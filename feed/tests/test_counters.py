@@ -0,0 +1,62 @@
+from django.db import connections
+from django.test.utils import CaptureQueriesContext
+
+from feed.models import Comment, LikeOnComment
+from feed.tests.base import FeedTestCase
+from pseudo_twitter.sharding import using_shard
+
+
+class CounterTests(FeedTestCase):
+    def setUp(self):
+        super().setUp()
+        with using_shard(self.shard):
+            self.comment = Comment.objects.create(comment_text="Comment", author=self.author, article=self.article)
+
+    def test_comment_and_reply_counts(self):
+        with using_shard(self.shard):
+            reply = Comment.objects.create(
+                comment_text="Reply", author=self.author, article=self.article, parent_comment=self.comment
+            )
+            self.assertEqual(self.refresh(self.article).comment_count, 2)
+            self.assertEqual(self.refresh(self.comment).reply_count, 1)
+
+            reply.delete()
+            self.assertEqual(self.refresh(self.article).comment_count, 1)
+            self.assertEqual(self.refresh(self.comment).reply_count, 0)
+
+    def test_like_views_change_count_of_likes(self):
+        url = f"/feed/comment/{self.comment.pk}/like"
+        self.client.force_login(self.reader)
+        response = self.client.post(url, {"reaction": LikeOnComment.LIKE})
+        self.assertEqual(response.status_code, 201)
+        with using_shard(self.shard):
+            self.assertEqual(self.refresh(self.comment).count_of_likes, 1)
+
+        self.assertEqual(self.client.post(url, {"reaction": LikeOnComment.LIKE}).status_code, 400)
+        with using_shard(self.shard):
+            self.assertEqual(self.refresh(self.comment).count_of_likes, 1)
+
+        self.assertEqual(self.client.delete(url).status_code, 204)
+        with using_shard(self.shard):
+            self.assertEqual(self.refresh(self.comment).count_of_likes, 0)
+
+    def test_comment_update_keeps_counters(self):
+        with using_shard(self.shard):
+            LikeOnComment.objects.create(author=self.reader, comment=self.comment, reaction=LikeOnComment.LIKE)
+            Comment.objects.filter(pk=self.comment.pk).update(count_of_likes=1)
+
+        self.client.force_login(self.author)
+        with CaptureQueriesContext(connections[self.shard]) as queries:
+            response = self.client.patch(
+                f"/feed/comments/{self.comment.pk}",
+                {"comment_text": "Changed", "count_of_likes": 10},
+                content_type="application/json",
+            )
+        self.assertEqual(response.status_code, 200)
+        updates = [query["sql"] for query in queries if query["sql"].startswith("UPDATE")]
+        self.assertTrue(updates)
+        self.assertFalse([sql for sql in updates if "count_of_likes" in sql or "reply_count" in sql])
+        with using_shard(self.shard):
+            comment = self.refresh(self.comment)
+        self.assertEqual(comment.comment_text, "Changed")
+        self.assertEqual(comment.count_of_likes, 1)
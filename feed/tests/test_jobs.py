@@ -0,0 +1,96 @@
+import datetime
+import threading
+from unittest import mock
+
+from django.test import override_settings
+from django.utils import timezone
+
+from feed import jobs
+from feed.jobs import Heartbeat, claim_next, enqueue, requeue_stale_jobs, run_job
+from feed.models import Job
+from feed.tests.base import FeedTestCase
+
+
+@override_settings(JOBS_RETRY_DELAY=10, JOBS_MAX_RETRY_DELAY=15, JOBS_LOCK_TIMEOUT=60)
+class JobTests(FeedTestCase):
+    def setUp(self):
+        super().setUp()
+        self.handler = mock.Mock()
+        patcher = mock.patch.dict(jobs.handlers, {"test": self.handler})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def claim_and_run(self) -> Job:
+        claimed_job = claim_next()
+        self.assertIsNotNone(claimed_job)
+        run_job(claimed_job)
+        return self.refresh(claimed_job)
+
+    def test_handler_gets_payload(self):
+        enqueue("test", {"value": 1})
+        finished_job = self.claim_and_run()
+        self.assertEqual(finished_job.status, Job.DONE)
+        self.assertIsNone(finished_job.locked_at)
+        self.handler.assert_called_once_with(mock.ANY, value=1)
+
+    def test_failed_job_is_retried_with_backoff(self):
+        self.handler.side_effect = RuntimeError("Failure")
+        created_job = enqueue("test", max_attempts=3)
+
+        with self.assertLogs("feed.jobs", "ERROR"):
+            failed_job = self.claim_and_run()
+        self.assertEqual(failed_job.status, Job.PENDING)
+        self.assertEqual(failed_job.attempts, 1)
+        self.assertIn("RuntimeError: Failure", failed_job.last_error)
+        self.assertGreater(failed_job.run_at, timezone.now() + datetime.timedelta(seconds=5))
+        self.assertIsNone(claim_next())
+
+        for attempts in (2, 3):
+            Job.objects.filter(pk=created_job.pk).update(run_at=timezone.now())
+            with self.assertLogs("feed.jobs", "ERROR"):
+                failed_job = self.claim_and_run()
+            self.assertEqual(failed_job.attempts, attempts)
+        # The third attempt is the last one
+        self.assertEqual(failed_job.status, Job.FAILED)
+        self.assertEqual(self.handler.call_count, 3)
+
+    def test_retry_delay_is_capped(self):
+        self.assertEqual(jobs.get_retry_delay(1), 10)
+        self.assertEqual(jobs.get_retry_delay(2), 15)
+
+    def test_pending_jobs_are_deduplicated(self):
+        first = enqueue("test", dedup_key="key")
+        self.assertEqual(enqueue("test", dedup_key="key"), first)
+        claim_next()
+        self.assertNotEqual(enqueue("test", dedup_key="key"), first)
+
+    def test_stale_running_jobs_are_requeued(self):
+        stale_job = enqueue("test")
+        fresh_job = enqueue("test")
+        claim_next()
+        claim_next()
+        Job.objects.filter(pk=stale_job.pk).update(locked_at=timezone.now() - datetime.timedelta(seconds=61))
+
+        self.assertEqual(requeue_stale_jobs(), 1)
+        self.assertEqual(self.refresh(stale_job).status, Job.PENDING)
+        self.assertEqual(self.refresh(fresh_job).status, Job.RUNNING)
+
+    def test_lock_is_refreshed_while_handler_runs(self):
+        beaten = threading.Event()
+        self.handler.side_effect = lambda current_job: self.assertTrue(beaten.wait(5))
+        enqueue("test")
+        with override_settings(JOBS_HEARTBEAT_INTERVAL=0.01), \
+                mock.patch.object(Heartbeat, "beat", side_effect=beaten.set) as beat:
+            finished_job = self.claim_and_run()
+        self.assertEqual(finished_job.status, Job.DONE)
+        self.assertTrue(beat.called)
+
+    def test_heartbeat_refreshes_locked_at(self):
+        running_job = enqueue("test")
+        claim_next()
+        locked_at = timezone.now() - datetime.timedelta(seconds=61)
+        Job.objects.filter(pk=running_job.pk).update(locked_at=locked_at)
+
+        Heartbeat(running_job.pk).beat()
+        self.assertGreater(self.refresh(running_job).locked_at, locked_at)
+        self.assertEqual(requeue_stale_jobs(), 0)
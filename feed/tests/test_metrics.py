@@ -0,0 +1,61 @@
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+from feed.tests.base import FeedTestCase, create_author
+from pseudo_twitter import metrics
+from pseudo_twitter.metrics import MetricsFile
+
+
+class MetricsTests(FeedTestCase):
+    def test_server_timing_header(self):
+        self.client.force_login(self.reader)
+        response = self.client.get(f"/feed/article/{self.article.pk}")
+        self.assertEqual(
+            [part.split(";")[0] for part in response["Server-Timing"].split(", ")],
+            ["db", "serialize", "render", "total"],
+        )
+
+    def test_metrics_endpoint(self):
+        self.client.force_login(self.reader)
+        self.client.get(f"/feed/article/{self.article.pk}")
+        self.assertEqual(self.client.get("/metrics").status_code, 403)
+
+        self.client.force_login(create_author("admin", is_staff=True))
+        response = self.client.get("/metrics")
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(
+            'feed_http_requests_total{method="GET",route="feed/article/<str:pk>",status="200"}',
+            response.content.decode(),
+        )
+
+
+class MetricsFileTests(FeedTestCase):
+    def setUp(self):
+        super().setUp()
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = directory.name
+        self.metrics_file = MetricsFile(self.directory, flush_interval=0)
+
+    def write_dump(self, pid: int):
+        with open(os.path.join(self.directory, f"metrics-{pid}.json"), "w") as dump_file:
+            json.dump(metrics.MetricsRegistry().dump(), dump_file)
+
+    def test_files_of_exited_workers_are_swept(self):
+        exited = subprocess.Popen([sys.executable, "-c", "pass"])
+        exited.wait()
+        self.write_dump(exited.pid)
+        self.metrics_file.flush()
+
+        self.assertEqual(len(self.metrics_file.read_all()), 1)
+        self.assertEqual(os.listdir(self.directory), [f"metrics-{os.getpid()}.json"])
+
+    def test_file_is_removed_on_exit(self):
+        self.metrics_file.flush()
+        self.metrics_file.remove()
+        self.assertEqual(os.listdir(self.directory), [])
+        # Removing twice does not fail
+        self.metrics_file.remove()
@@ -0,0 +1,45 @@
+from feed.models import Comment, LikeOnComment
+from feed.reactions import MAX_BATCH_SIZE, set_reaction
+from feed.tests.base import FeedTestCase
+from pseudo_twitter.sharding import using_shard
+
+
+class MyReactionsTests(FeedTestCase):
+    def setUp(self):
+        super().setUp()
+        with using_shard(self.shard):
+            self.comment = Comment.objects.create(comment_text="Comment", author=self.author, article=self.article)
+            self.reply = Comment.objects.create(
+                comment_text="Reply", author=self.author, article=self.article, parent_comment=self.comment
+            )
+            set_reaction(self.reader, self.comment, LikeOnComment.LAUGH)
+            set_reaction(self.author, self.reply, LikeOnComment.HEART)
+        self.client.force_login(self.reader)
+
+    def test_batch(self):
+        response = self.client.get("/feed/comment/reactions", {"ids": f"{self.comment.pk}, {self.reply.pk},0"})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            response.json()["reactions"],
+            {str(self.comment.pk): LikeOnComment.LAUGH, str(self.reply.pk): None, "0": None},
+        )
+
+    def test_invalid_ids(self):
+        too_many = ",".join(str(comment_id) for comment_id in range(1, MAX_BATCH_SIZE + 2))
+        for ids in ("", "1,a", "-1", too_many):
+            with self.subTest(ids=ids[:10]):
+                response = self.client.get("/feed/comment/reactions", {"ids": ids})
+                self.assertEqual(response.status_code, 400)
+                self.assertIn("errors", response.json())
+
+    def test_anonymous(self):
+        self.client.logout()
+        response = self.client.get("/feed/comment/reactions", {"ids": str(self.comment.pk)})
+        self.assertEqual(response.status_code, 403)
+
+    def test_reactions_inline_in_thread(self):
+        response = self.client.get(f"/feed/articles/{self.article.pk}/comments")
+        self.assertEqual(response.status_code, 200)
+        [comment] = response.json()["results"]
+        self.assertEqual(comment["my_reaction"], LikeOnComment.LAUGH)
+        self.assertIsNone(comment["child_comments"][0]["my_reaction"])
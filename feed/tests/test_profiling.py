@@ -0,0 +1,69 @@
+import threading
+import time
+from collections import Counter
+
+from django.test import override_settings
+
+from feed.tests.base import FeedTestCase, create_author
+from pseudo_twitter.profiling import StackProfiler, format_collapsed, profiler, top_functions
+
+
+def busy(stop: threading.Event):
+    while not stop.is_set():
+        sum(range(1000))
+
+
+class StackProfilerTests(FeedTestCase):
+    def test_sampler_runs_only_during_requests(self):
+        stack_profiler = StackProfiler(interval=0.001, max_depth=64)
+        started = threading.Event()
+        stop = threading.Event()
+
+        def serve():
+            stack_profiler.start_request("GET route")
+            started.set()
+            try:
+                busy(stop)
+            finally:
+                stack_profiler.stop_request()
+
+        thread = threading.Thread(target=serve)
+        thread.start()
+        started.wait()
+        self.assertTrue(stack_profiler._active.is_set())
+        deadline = time.monotonic() + 5
+        while not stack_profiler.stacks() and time.monotonic() < deadline:
+            time.sleep(0.01)
+        stop.set()
+        thread.join()
+
+        # The sampler thread is parked until the next profiled request
+        self.assertFalse(stack_profiler._active.is_set())
+        self.assertEqual(stack_profiler.routes()["GET route"]["requests"], 1)
+        self.assertTrue(any("busy" in frame for stack in stack_profiler.stacks() for frame in stack))
+
+    def test_collapsed_and_top_formats(self):
+        stacks = Counter({("main", "handler", "query"): 3, ("main", "handler"): 1})
+        self.assertEqual(format_collapsed(stacks), "main;handler;query 3\nmain;handler 1\n")
+        [top, *_] = top_functions(stacks, 10)
+        self.assertEqual((top["cumulative_samples"], top["cumulative_percent"]), (4, 100.0))
+
+
+@override_settings(PROFILING_ENABLED=True, PROFILING_SAMPLE_RATE=1.0)
+class ProfilingMiddlewareTests(FeedTestCase):
+    def setUp(self):
+        super().setUp()
+        profiler.reset()
+        self.addCleanup(profiler.reset)
+
+    def test_sampled_requests_are_counted_per_route(self):
+        self.client.force_login(self.reader)
+        self.client.get(f"/feed/article/{self.article.pk}")
+        self.assertEqual(profiler.routes()["GET feed/article/<str:pk>"]["requests"], 1)
+        self.assertFalse(profiler._active.is_set())
+
+    def test_stacks_are_for_admins(self):
+        self.client.force_login(self.reader)
+        self.assertEqual(self.client.get("/profiling/stacks").status_code, 403)
+        self.client.force_login(create_author("admin", is_staff=True))
+        self.assertEqual(self.client.get("/profiling/stacks", {"output": "collapsed"}).status_code, 200)
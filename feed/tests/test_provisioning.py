@@ -0,0 +1,65 @@
+from unittest import mock
+
+from feed.jobs import claim_next, run_job
+from feed.models import Author, AuthorStats, Job
+from feed.tests.base import FeedTestCase, create_author, run_jobs
+
+
+def make_row(username: str) -> dict:
+    return {"username": username, "password": "secret-password", "first_name": "First", "last_name": "Last"}
+
+
+class ProvisioningTests(FeedTestCase):
+    def setUp(self):
+        super().setUp()
+        self.client.force_login(create_author("admin", is_staff=True))
+
+    def post_authors(self, rows: list[dict]) -> Job:
+        response = self.client.post("/feed/author/bulk", {"authors": rows}, content_type="application/json")
+        self.assertEqual(response.status_code, 202)
+        return Job.objects.get(pk=response.json()["job_id"])
+
+    def test_authors_are_created_by_the_job(self):
+        provision_job = self.post_authors([make_row("first"), make_row("reader"), make_row("second")])
+        run_jobs()
+
+        provision_job = self.refresh(provision_job)
+        self.assertEqual(provision_job.status, Job.DONE)
+        self.assertEqual(provision_job.progress["created"], 2)
+        self.assertEqual(provision_job.progress["skipped"], ["reader"])
+        author = Author.objects.get(username="first")
+        self.assertTrue(author.check_password("secret-password"))
+        self.assertEqual(author.full_name, "First Last")
+        self.assertTrue(AuthorStats.objects.filter(author=author).exists())
+        self.assertNotIn("secret-password", str(provision_job.payload))
+
+    def test_failed_job_keeps_no_passwords(self):
+        provision_job = self.post_authors([make_row("first")])
+        Job.objects.filter(pk=provision_job.pk).update(max_attempts=1)
+
+        with mock.patch("feed.tasks.provision_authors", side_effect=RuntimeError("Failure")), \
+                self.assertLogs("feed.jobs", "ERROR"):
+            run_job(claim_next())
+        provision_job = self.refresh(provision_job)
+        self.assertEqual(provision_job.status, Job.FAILED)
+        self.assertEqual(provision_job.payload, {"authors": [{"username": "first"}]})
+
+    def test_rerun_does_not_skip_authors_of_earlier_attempts(self):
+        provision_job = self.post_authors([make_row("first"), make_row("second"), make_row("first")])
+        # The first attempt created "first" and failed
+        create_author("first")
+        Job.objects.filter(pk=provision_job.pk).update(progress={"created": 1, "created_usernames": ["first"]})
+        run_jobs()
+
+        progress = self.refresh(provision_job).progress
+        self.assertEqual(progress["created"], 2)
+        self.assertEqual(progress["created_usernames"], ["first", "second"])
+        # The duplicate row is still skipped
+        self.assertEqual(progress["skipped"], ["first"])
+
+    def test_invalid_requests(self):
+        for authors in ([], "authors", [{"username": "first"}]):
+            with self.subTest(authors=authors):
+                response = self.client.post("/feed/author/bulk", {"authors": authors}, content_type="application/json")
+                self.assertEqual(response.status_code, 400)
+        self.assertFalse(Job.objects.exists())
@@ -0,0 +1,53 @@
+from django.test import override_settings
+
+from feed.models import Article, Author, Comment, Job, LikeOnComment
+from feed.purge import tombstone_author
+from feed.reactions import set_reaction
+from feed.tests.base import FeedTestCase, run_jobs
+from pseudo_twitter.sharding import using_shard
+
+
+@override_settings(PURGE_BATCH_SIZE=2)
+class PurgeTests(FeedTestCase):
+    def setUp(self):
+        super().setUp()
+        with using_shard(self.shard):
+            self.comments = [
+                Comment.objects.create(comment_text=f"Comment {number}", author=self.author, article=self.article)
+                for number in range(5)
+            ]
+            Comment.objects.create(
+                comment_text="Reply", author=self.reader, article=self.article, parent_comment=self.comments[0]
+            )
+
+    def test_deleted_article_is_hidden_then_purged(self):
+        self.client.force_login(self.author)
+        response = self.client.delete(f"/feed/article/{self.article.pk}")
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(self.client.get(f"/feed/article/{self.article.pk}").status_code, 404)
+        with using_shard(self.shard):
+            self.assertEqual(Comment.objects.count(), 6)
+
+        run_jobs()
+        self.assertEqual(Job.objects.get(pk=response.json()["job_id"]).status, Job.DONE)
+        with using_shard(self.shard):
+            self.assertFalse(Article.all_objects.filter(pk=self.article.pk).exists())
+            self.assertEqual(Comment.objects.count(), 0)
+
+    def test_purge_author_decreases_like_counts(self):
+        with using_shard(self.shard):
+            for comment in self.comments:
+                set_reaction(self.reader, comment, LikeOnComment.LIKE)
+            set_reaction(self.author, self.comments[0], LikeOnComment.HEART)
+
+        tombstone_author(self.reader)
+        run_jobs()
+
+        self.assertFalse(Author.all_objects.filter(pk=self.reader.pk).exists())
+        with using_shard(self.shard):
+            self.assertEqual(LikeOnComment.objects.count(), 1)
+            self.assertEqual(
+                list(Comment.objects.order_by("pk").values_list("count_of_likes", "reply_count")),
+                [(1, 0), (0, 0), (0, 0), (0, 0), (0, 0)],
+            )
+            self.assertEqual(self.refresh(self.article).comment_count, 5)
@@ -0,0 +1,70 @@
+from django.db import connection
+from django.db.migrations.executor import MigrationExecutor
+from django.test import TransactionTestCase
+
+from feed.models import Comment, LikeOnComment
+from feed.reactions import set_reaction
+from feed.tests.base import FeedTestCase
+from pseudo_twitter.sharding import using_shard
+
+BEFORE_CODES = [("feed", "0012_admin_indexes")]
+WITH_CODES = [("feed", "0013_like_reaction_codes")]
+
+
+class ReactionCodeTests(FeedTestCase):
+    def setUp(self):
+        super().setUp()
+        self.enterContext(using_shard(self.shard))
+        self.comment = Comment.objects.create(comment_text="Comment", author=self.author, article=self.article)
+
+    def test_reactions_are_filtered_by_value_and_code(self):
+        set_reaction(self.reader, self.comment, LikeOnComment.LAUGH)
+        code = LikeOnComment.REACTION_CODES[LikeOnComment.LAUGH]
+        self.assertTrue(LikeOnComment.objects.filter(reaction=LikeOnComment.LAUGH).exists())
+        self.assertTrue(LikeOnComment.objects.filter(reaction=code).exists())
+        self.assertEqual(LikeOnComment.objects.get(comment=self.comment).reaction, LikeOnComment.LAUGH)
+
+    def test_unknown_reactions_are_rejected(self):
+        unknown_code = max(LikeOnComment.REACTION_CODES.values()) + 1
+        for value in ("unknown", unknown_code, True):
+            with self.subTest(value=value), self.assertRaises(ValueError):
+                LikeOnComment.objects.filter(reaction=value).exists()
+
+        self.client.force_login(self.reader)
+        response = self.client.post(f"/feed/comment/{self.comment.pk}/like", {"reaction": "unknown"})
+        self.assertEqual(response.status_code, 400)
+
+
+class ReactionCodesMigrationTests(TransactionTestCase):
+    def setUp(self):
+        executor = MigrationExecutor(connection)
+        self.latest = executor.loader.graph.leaf_nodes("feed")
+        executor.migrate(BEFORE_CODES)
+        self.addCleanup(self.migrate_to_latest)
+
+    def migrate_to_latest(self):
+        executor = MigrationExecutor(connection)
+        executor.migrate(self.latest)
+
+    def test_legacy_reactions_get_codes(self):
+        apps = MigrationExecutor(connection).loader.project_state(BEFORE_CODES).apps
+        Author = apps.get_model("feed", "Author")
+        Article = apps.get_model("feed", "Article")
+        Comment = apps.get_model("feed", "Comment")
+        LikeOnComment = apps.get_model("feed", "LikeOnComment")
+
+        author = Author.objects.create(username="author", first_name="First", last_name="Last")
+        reader = Author.objects.create(username="reader", first_name="First", last_name="Last")
+        article = Article.objects.create(title="Title", content="Content", author=author)
+        comment = Comment.objects.create(comment_text="Comment", author=author, article=article, count_of_likes=2)
+        heart = LikeOnComment.objects.create(author=author, comment=comment, reaction="&#129505;")
+        # Saved before reactions were validated
+        legacy = LikeOnComment.objects.create(author=reader, comment=comment, reaction="unknown")
+
+        executor = MigrationExecutor(connection)
+        executor.migrate(WITH_CODES)
+        apps = executor.loader.project_state(WITH_CODES).apps
+        likes = apps.get_model("feed", "LikeOnComment").objects
+        self.assertEqual(likes.get(pk=heart.pk).reaction, "&#129505;")
+        self.assertEqual(likes.get(pk=legacy.pk).reaction, "&#128077;")
+        self.assertEqual(apps.get_model("feed", "Comment").objects.get(pk=comment.pk).count_of_likes, 2)
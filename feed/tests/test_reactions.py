@@ -0,0 +1,55 @@
+from unittest import mock
+
+from django.db import connections
+
+from feed.models import Comment, LikeOnComment
+from feed.reactions import set_reaction
+from feed.tests.base import FeedTestCase
+from pseudo_twitter.sharding import using_shard
+
+
+class ReactionTests(FeedTestCase):
+    def setUp(self):
+        super().setUp()
+        self.enterContext(using_shard(self.shard))
+        self.comment = Comment.objects.create(comment_text="Comment", author=self.author, article=self.article)
+
+    def get_stored_code(self, like: LikeOnComment) -> int:
+        connection = connections[self.shard]
+        with connection.cursor() as cursor:
+            cursor.execute(f"SELECT reaction FROM {LikeOnComment._meta.db_table} WHERE id = %s", [like.pk])
+            return cursor.fetchone()[0]
+
+    def test_set_reaction_upserts(self):
+        like, created = set_reaction(self.reader, self.comment, LikeOnComment.LIKE)
+        self.assertTrue(created)
+        self.assertEqual(self.refresh(self.comment).count_of_likes, 1)
+
+        like, created = set_reaction(self.reader, self.comment, LikeOnComment.HEART)
+        self.assertFalse(created)
+        self.assertEqual(self.refresh(self.comment).count_of_likes, 1)
+        self.assertEqual(LikeOnComment.objects.filter(comment=self.comment).count(), 1)
+
+        self.assertEqual(LikeOnComment.objects.get(pk=like.pk).reaction, LikeOnComment.HEART)
+        self.assertEqual(self.get_stored_code(like), LikeOnComment.REACTION_CODES[LikeOnComment.HEART])
+
+    def test_unchanged_reaction_publishes_nothing(self):
+        set_reaction(self.reader, self.comment, LikeOnComment.LIKE)
+        with mock.patch("feed.reactions.publish_after_commit") as publish:
+            set_reaction(self.reader, self.comment, LikeOnComment.LIKE)
+            publish.assert_not_called()
+            set_reaction(self.reader, self.comment, LikeOnComment.CRY)
+            publish.assert_called_once()
+
+    def test_put_is_idempotent(self):
+        self.client.force_login(self.reader)
+        url = f"/feed/comment/{self.comment.pk}/like"
+        response = self.client.put(url, {"reaction": LikeOnComment.LIKE}, content_type="application/json")
+        self.assertEqual(response.status_code, 201)
+        response = self.client.put(url, {"reaction": LikeOnComment.LIKE}, content_type="application/json")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["reaction"], LikeOnComment.LIKE)
+        self.assertEqual(self.refresh(self.comment).count_of_likes, 1)
+
+        response = self.client.put(url, {"reaction": "unknown"}, content_type="application/json")
+        self.assertEqual(response.status_code, 400)
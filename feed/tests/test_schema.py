@@ -0,0 +1,22 @@
+import yaml
+from django.test import SimpleTestCase
+
+from pseudo_twitter.schema import generate_schema
+
+
+class SchemaTests(SimpleTestCase):
+    def test_component_names_are_valid(self):
+        schema = yaml.safe_load(generate_schema())
+        invalid = [name for name in schema["components"]["schemas"] if " " in name]
+        self.assertEqual(invalid, [])
+        self.assertIn("NotFound", schema["components"]["schemas"])
+
+    def test_static_schema_is_conditional(self):
+        response = self.client.get("/api/schema/")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.client.get("/api/schema/", HTTP_IF_NONE_MATCH=response["ETag"]).status_code, 304)
+
+    def test_swagger_view(self):
+        response = self.client.get("/swagger/")
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(b"swagger-ui", response.content)
@@ -0,0 +1,81 @@
+from unittest import skipUnless
+
+from django.conf import settings
+
+from feed.models import Article, Comment, LikeOnComment
+from feed.reactions import set_reaction
+from feed.sharding import find_comment_shard, find_like_shard, get_article_shard
+from feed.tests.base import FeedTestCase, create_author
+from pseudo_twitter.sharding import get_shards, using_shard
+
+
+class AdminShardTests(FeedTestCase):
+    def setUp(self):
+        super().setUp()
+        self.client.force_login(create_author("admin", is_staff=True, is_superuser=True))
+
+    def test_invalid_ids_are_not_found(self):
+        for model in ("article", "comment", "likeoncomment"):
+            with self.subTest(model=model):
+                response = self.client.get(f"/admin/feed/{model}/invalid/change/")
+                self.assertEqual(response.status_code, 404)
+                response = self.client.get(f"/admin/feed/{model}/invalid/delete/")
+                self.assertEqual(response.status_code, 404)
+
+
+@skipUnless(len(settings.SHARDS) > 1, "Needs several shards, e.g. SHARDS=default,s1")
+class ShardRoutingTests(FeedTestCase):
+    def create_article_on_other_shard(self) -> Article:
+        for number in range(100):
+            article = Article.objects.create(title=f"Title {number}", content="Content", author=self.author)
+            if get_article_shard(article.pk) != get_shards()[0]:
+                return article
+        self.fail("No article was placed on another shard")
+
+    def test_writes_go_to_the_shard_of_the_article(self):
+        article = self.create_article_on_other_shard()
+        shard = get_article_shard(article.pk)
+        with using_shard(shard):
+            comment = Comment.objects.create(comment_text="Comment", author=self.reader, article=article)
+            like, _ = set_reaction(self.reader, comment, LikeOnComment.LIKE)
+
+        self.assertEqual(find_comment_shard(comment.pk), shard)
+        self.assertEqual(find_like_shard(like.pk), shard)
+        for other_shard in get_shards():
+            stored = other_shard == shard
+            self.assertEqual(Article.objects.using(other_shard).filter(pk=article.pk).exists(), stored)
+            self.assertEqual(Comment.objects.using(other_shard).filter(pk=comment.pk).exists(), stored)
+            self.assertEqual(LikeOnComment.objects.using(other_shard).filter(pk=like.pk).exists(), stored)
+        with using_shard(shard):
+            self.assertEqual(Article.objects.get(pk=article.pk).comment_count, 1)
+            self.assertEqual(Comment.objects.get(pk=comment.pk).count_of_likes, 1)
+
+    def test_reads_find_the_shard_of_the_article(self):
+        article = self.create_article_on_other_shard()
+        with using_shard(get_article_shard(article.pk)):
+            comment = Comment.objects.create(comment_text="Comment", author=self.reader, article=article)
+        self.client.force_login(self.reader)
+
+        response = self.client.get(f"/feed/article/{article.pk}")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["id"], article.pk)
+
+        response = self.client.get(f"/feed/articles/{article.pk}/comments")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([result["id"] for result in response.json()["results"]], [comment.pk])
+
+        response = self.client.get("/feed/article", {"page_size": 100})
+        self.assertIn(article.pk, [result["id"] for result in response.json()["results"]])
+
+    def test_admin_change_views_use_the_shard_of_the_row(self):
+        article = self.create_article_on_other_shard()
+        with using_shard(get_article_shard(article.pk)):
+            comment = Comment.objects.create(comment_text="Comment", author=self.reader, article=article)
+            like, _ = set_reaction(self.reader, comment, LikeOnComment.LIKE)
+        self.client.force_login(create_author("admin", is_staff=True, is_superuser=True))
+
+        for model, pk in (("article", article.pk), ("comment", comment.pk), ("likeoncomment", like.pk)):
+            with self.subTest(model=model):
+                response = self.client.get(f"/admin/feed/{model}/{pk}/change/")
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(response.context["original"].pk, pk)
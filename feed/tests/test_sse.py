@@ -0,0 +1,71 @@
+import asyncio
+import json
+
+from feed import events
+from feed.authentication import issue_token
+from feed.sse import sse_application
+from feed.tests.base import FeedTestCase
+
+
+class EventStreamTests(FeedTestCase):
+    async def open_stream(self, headers: list, article_id: int | None = None) -> list:
+        """
+        Run the stream until the first event arrives, the event is published once the stream is open
+        :return: sent ASGI messages
+        """
+        article_id = article_id or self.article.pk
+        messages = []
+        disconnected = asyncio.Event()
+
+        async def receive():
+            await disconnected.wait()
+            return {"type": "http.disconnect"}
+
+        async def send(message):
+            messages.append(message)
+            body = message.get("body", b"")
+            if body.startswith(b"retry:"):
+                events.broker.publish(article_id, events.REACTION_SET, {"comment": 1})
+            elif b"event:" in body:
+                disconnected.set()
+
+        scope = {
+            "type": "http",
+            "method": "GET",
+            "path": f"/feed/articles/{article_id}/events",
+            "headers": headers,
+        }
+        await asyncio.wait_for(sse_application(scope, receive, send), 5)
+        return messages
+
+    async def test_anonymous_subscriber_is_rejected(self):
+        messages = await self.open_stream([])
+        self.assertEqual(messages[0]["status"], 401)
+        self.assertIn((b"www-authenticate", b'Bearer realm="api"'), messages[0]["headers"])
+
+    async def test_invalid_token_is_rejected(self):
+        messages = await self.open_stream([(b"authorization", b"Bearer forged")])
+        self.assertEqual(messages[0]["status"], 403)
+        self.assertEqual(json.loads(messages[1]["body"]), {"detail": "Invalid token."})
+
+    async def test_token_subscriber_gets_events(self):
+        token = issue_token(self.reader)
+        messages = await self.open_stream([(b"authorization", f"Bearer {token}".encode())])
+        self.assertEqual(messages[0]["status"], 200)
+        event = messages[-1]["body"].decode()
+        self.assertIn(f"event: {events.REACTION_SET}\n", event)
+        self.assertIn('data: {"comment": 1}\n', event)
+
+    async def test_session_subscriber_gets_events(self):
+        await self.async_client.aforce_login(self.reader)
+        session_key = self.async_client.cookies["sessionid"].value
+        messages = await self.open_stream([(b"cookie", f"sessionid={session_key}".encode())])
+        self.assertEqual(messages[0]["status"], 200)
+        self.assertIn(b"event: ", messages[-1]["body"])
+
+    async def test_missing_article(self):
+        token = issue_token(self.reader)
+        messages = await self.open_stream(
+            [(b"authorization", f"Bearer {token}".encode())], article_id=self.article.pk + 1000
+        )
+        self.assertEqual(messages[0]["status"], 404)
@@ -0,0 +1,50 @@
+from feed.models import AuthorStats, Comment, LikeOnComment
+from feed.reactions import set_reaction
+from feed.stats import rebuild_author_stats
+from feed.tests.base import FeedTestCase
+from pseudo_twitter.sharding import using_shard
+
+
+class AuthorStatsTests(FeedTestCase):
+    def setUp(self):
+        super().setUp()
+        with using_shard(self.shard):
+            self.comment = Comment.objects.create(comment_text="Comment", author=self.author, article=self.article)
+            Comment.objects.create(comment_text="Reply", author=self.reader, article=self.article,
+                                   parent_comment=self.comment)
+            set_reaction(self.reader, self.comment, LikeOnComment.LIKE)
+        self.client.force_login(self.reader)
+
+    def get_stats(self, author) -> dict:
+        response = self.client.get(f"/feed/author/{author.pk}/stats")
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def test_stats_follow_changes(self):
+        self.assertEqual(
+            self.get_stats(self.author),
+            {"author": self.author.pk, "article_count": 1, "comment_count": 1, "likes_received": 1},
+        )
+        self.assertEqual(
+            self.get_stats(self.reader),
+            {"author": self.reader.pk, "article_count": 0, "comment_count": 1, "likes_received": 0},
+        )
+
+        with using_shard(self.shard):
+            self.refresh(self.comment).delete()
+        stats = self.get_stats(self.author)
+        self.assertEqual((stats["comment_count"], stats["likes_received"]), (0, 0))
+
+    def test_missing_row_is_rebuilt(self):
+        AuthorStats.objects.all().delete()
+        stats = self.get_stats(self.author)
+        self.assertEqual((stats["article_count"], stats["comment_count"], stats["likes_received"]), (1, 1, 1))
+
+    def test_rebuild_repairs_drifted_rows(self):
+        AuthorStats.objects.filter(author=self.author).update(comment_count=10, likes_received=0)
+        rebuild_author_stats(self.author.pk, self.reader.pk + 1)
+        stats = AuthorStats.objects.get(author=self.author)
+        self.assertEqual((stats.comment_count, stats.likes_received), (1, 1))
+
+    def test_missing_author(self):
+        self.assertEqual(self.client.get("/feed/author/0/stats").status_code, 404)
@@ -0,0 +1,57 @@
+import json
+import warnings
+
+from django.core.paginator import UnorderedObjectListWarning
+from django.test import override_settings
+
+from feed.models import Article, Comment
+from feed.tests.base import FeedTestCase
+from pseudo_twitter.sharding import using_shard
+
+
+@override_settings(STREAM_CHUNK_SIZE=2)
+class StreamingTests(FeedTestCase):
+    def setUp(self):
+        super().setUp()
+        self.articles = [self.article] + [
+            Article.objects.create(title=f"Title {number}", content="Content", author=self.author)
+            for number in range(4)
+        ]
+        with using_shard(self.shard):
+            self.comments = [
+                Comment.objects.create(comment_text=f"Comment {number}", author=self.reader, article=self.article)
+                for number in range(5)
+            ]
+        self.client.force_login(self.reader)
+        self.enterContext(warnings.catch_warnings())
+        warnings.simplefilter("error", UnorderedObjectListWarning)
+
+    def get_stream(self, url: str) -> list:
+        response = self.client.get(url, {"stream": "true"})
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        return json.loads(b"".join(response.streaming_content))
+
+    def get_pages(self, url: str) -> list:
+        results = []
+        for page in (1, 2, 3):
+            response = self.client.get(url, {"page": page, "page_size": 2})
+            self.assertEqual(response.status_code, 200)
+            results += response.json()["results"]
+        return results
+
+    def test_articles(self):
+        streamed = [article["id"] for article in self.get_stream("/feed/article")]
+        self.assertEqual(streamed, sorted(article.pk for article in self.articles))
+        self.assertEqual([article["id"] for article in self.get_pages("/feed/article")], streamed)
+
+    def test_comments(self):
+        url = f"/feed/articles/{self.article.pk}/comments"
+        streamed = [comment["id"] for comment in self.get_stream(url)]
+        self.assertEqual(streamed, [comment.pk for comment in self.comments])
+        self.assertEqual([comment["id"] for comment in self.get_pages(url)], streamed)
+
+    def test_empty_stream(self):
+        with using_shard(self.shard):
+            article = Article.objects.create(title="Empty", content="Content", author=self.author)
+        self.assertEqual(self.get_stream(f"/feed/articles/{article.pk}/comments"), [])
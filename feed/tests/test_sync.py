@@ -0,0 +1,92 @@
+import datetime
+from unittest import mock
+
+from django.test import override_settings
+from django.utils import timezone
+
+from feed.models import Comment, LikeOnComment
+from feed.reactions import set_reaction
+from feed.tests.base import FeedTestCase
+from feed.utils import encode_cursor
+from pseudo_twitter.sharding import using_shard
+
+
+@override_settings(SYNC_SAFETY_WINDOW=5)
+class CommentChangesTests(FeedTestCase):
+    def setUp(self):
+        super().setUp()
+        self.url = f"/feed/articles/{self.article.pk}/comments/changes"
+        with using_shard(self.shard):
+            self.comment = Comment.objects.create(comment_text="Comment", author=self.author, article=self.article)
+        self.client.force_login(self.reader)
+
+    def get_changes(self, since: str | None = None, delay: int = 10, **params) -> dict:
+        """
+        :param delay: seconds after now when the request is made, past the safety window by default
+        """
+        if since is not None:
+            params["since"] = since
+        now = timezone.now() + datetime.timedelta(seconds=delay)
+        with mock.patch("feed.sync.timezone.now", return_value=now):
+            response = self.client.get(self.url, params)
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def test_full_sync_then_changes_after_cursor(self):
+        data = self.get_changes()
+        self.assertEqual([(change["type"], change["id"]) for change in data["changes"]], [("upsert", self.comment.pk)])
+        self.assertFalse(data["has_more"])
+        self.assertEqual(self.get_changes(data["next_cursor"])["changes"], [])
+
+        with using_shard(self.shard):
+            reply = Comment.objects.create(
+                comment_text="Reply", author=self.reader, article=self.article, parent_comment=self.comment
+            )
+        changes = self.get_changes(data["next_cursor"])["changes"]
+        # The reply and its parent with the new reply_count
+        self.assertEqual({change["id"] for change in changes}, {self.comment.pk, reply.pk})
+
+    def test_changes_inside_safety_window_wait_for_late_commits(self):
+        data = self.get_changes(delay=0)
+        self.assertEqual(data["changes"], [])
+
+        # A row dated before the request whose transaction committed after it
+        with using_shard(self.shard):
+            late = Comment.objects.create(comment_text="Late", author=self.reader, article=self.article)
+            Comment.objects.filter(pk=late.pk).update(update_date=self.comment.update_date)
+        changes = self.get_changes(data["next_cursor"])["changes"]
+        self.assertEqual({change["id"] for change in changes}, {self.comment.pk, late.pk})
+
+    def test_pages_follow_the_cursor(self):
+        with using_shard(self.shard):
+            for number in range(4):
+                Comment.objects.create(comment_text=f"Comment {number}", author=self.author, article=self.article)
+        seen = []
+        data = {"next_cursor": None}
+        for _ in range(3):
+            data = self.get_changes(data["next_cursor"], limit=2)
+            seen += [change["id"] for change in data["changes"]]
+        self.assertFalse(data["has_more"])
+        self.assertEqual(len(seen), 5)
+        self.assertEqual(len(set(seen)), 5)
+
+    def test_reaction_sends_comment_again(self):
+        cursor = self.get_changes()["next_cursor"]
+        with using_shard(self.shard):
+            set_reaction(self.reader, self.comment, LikeOnComment.LIKE)
+        [change] = self.get_changes(cursor, delay=20)["changes"]
+        self.assertEqual(change["id"], self.comment.pk)
+        self.assertEqual(change["data"]["count_of_likes"], 1)
+
+    def test_deleted_comment_is_sent_as_tombstone(self):
+        cursor = self.get_changes(delay=-10)["next_cursor"]
+        comment_id = self.comment.pk
+        with using_shard(self.shard):
+            self.comment.delete()
+        changes = self.get_changes(cursor)["changes"]
+        self.assertEqual(changes, [{"type": "delete", "id": comment_id}])
+
+    def test_invalid_and_expired_cursors(self):
+        self.assertEqual(self.client.get(self.url, {"since": "invalid"}).status_code, 400)
+        expired = encode_cursor({"rows": None, "tombstones": ["2000-01-01T00:00:00+00:00", 0]})
+        self.assertEqual(self.client.get(self.url, {"since": expired}).status_code, 410)
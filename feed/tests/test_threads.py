@@ -0,0 +1,57 @@
+from django.test import override_settings
+
+from feed.models import Comment
+from feed.tests.base import FeedTestCase
+from pseudo_twitter.sharding import using_shard
+
+
+@override_settings(THREAD_MAX_REPLIES=2, THREAD_MAX_DEPTH=1)
+class ThreadTests(FeedTestCase):
+    def setUp(self):
+        super().setUp()
+        with using_shard(self.shard):
+            self.comment = Comment.objects.create(comment_text="Comment", author=self.author, article=self.article)
+            self.replies = [
+                Comment.objects.create(
+                    comment_text=f"Reply {number}", author=self.reader, article=self.article,
+                    parent_comment=self.comment
+                )
+                for number in range(3)
+            ]
+            Comment.objects.create(
+                comment_text="Nested reply", author=self.author, article=self.article, parent_comment=self.replies[0]
+            )
+
+    def test_thread_is_bounded(self):
+        response = self.client.get(f"/feed/articles/{self.article.pk}/comments")
+        self.assertEqual(response.status_code, 200)
+
+        [comment] = response.json()["results"]
+        self.assertEqual([reply["id"] for reply in comment["child_comments"]], [reply.pk for reply in self.replies[:2]])
+        self.assertIsNotNone(comment["replies_cursor"])
+
+        first_reply = comment["child_comments"][0]
+        # Below THREAD_MAX_DEPTH only the cursor is rendered
+        self.assertIsNone(first_reply["child_comments"])
+        self.assertIsNotNone(first_reply["replies_cursor"])
+
+    def test_replies_continue_from_cursor(self):
+        response = self.client.get(f"/feed/articles/{self.article.pk}/comments")
+        cursor = response.json()["results"][0]["replies_cursor"]
+
+        response = self.client.get(f"/feed/comments/{self.comment.pk}/replies", {"cursor": cursor})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([reply["id"] for reply in response.json()["results"]], [self.replies[2].pk])
+        self.assertIsNone(response.json()["next_cursor"])
+
+    def test_nested_replies(self):
+        response = self.client.get(f"/feed/articles/{self.article.pk}/comments")
+        cursor = response.json()["results"][0]["child_comments"][0]["replies_cursor"]
+
+        response = self.client.get(f"/feed/comments/{self.replies[0].pk}/replies", {"cursor": cursor})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([reply["comment_text"] for reply in response.json()["results"]], ["Nested reply"])
+
+    def test_invalid_cursor(self):
+        response = self.client.get(f"/feed/comments/{self.comment.pk}/replies", {"cursor": "invalid"})
+        self.assertEqual(response.status_code, 400)
@@ -0,0 +1,70 @@
+from django.core.cache import caches
+from django.core.exceptions import ImproperlyConfigured
+from django.test import SimpleTestCase, override_settings
+
+from feed.tests.base import TEST_CACHES
+from pseudo_twitter.metrics import registry
+from pseudo_twitter.tiered_cache import SEQUENCE_KEY, TieredCache
+
+
+def create_process_cache() -> TieredCache:
+    """
+    Tiered cache of another worker process: its own LRU in front of the same shared cache
+    """
+    return TieredCache("", {
+        "OPTIONS": {**TEST_CACHES["default"]["OPTIONS"], "POLL_INTERVAL": 0},
+    })
+
+
+def cache_lookups() -> dict:
+    return {
+        dict(labels)["cache"] + ":" + dict(labels)["result"]: value
+        for (name, labels), value in registry.counters.items()
+        if name == "feed_cache_requests_total"
+    }
+
+
+@override_settings(CACHES=TEST_CACHES)
+class TieredCacheTests(SimpleTestCase):
+    def setUp(self):
+        caches["shared"].clear()
+        self.first = create_process_cache()
+        self.second = create_process_cache()
+
+    def test_writes_invalidate_other_processes(self):
+        self.first.set("key", 1)
+        self.assertEqual(self.second.get("key"), 1)
+
+        self.first.set("key", 2)
+        self.assertEqual(self.second.get("key"), 2)
+
+        self.first.delete("key")
+        self.assertIsNone(self.second.get("key"))
+
+    def test_immutable_keys_are_not_published(self):
+        self.first.set("key", 1)
+        sequence = caches["shared"].get(SEQUENCE_KEY)
+        self.first.set("compressed:gzip:digest", b"body")
+        self.first.set_many({"compressed:zstd:digest": b"body"})
+        self.assertEqual(caches["shared"].get(SEQUENCE_KEY), sequence)
+        self.assertEqual(self.second.get("compressed:gzip:digest"), b"body")
+
+    def test_one_outcome_per_lookup(self):
+        self.first.set("key", 1)
+        before = cache_lookups()
+        self.second.get("key")
+        self.second.get("key")
+        self.second.get_many(["key", "missing"])
+        after = cache_lookups()
+        self.assertEqual(
+            {name: after[name] - before.get(name, 0) for name in after if after[name] != before.get(name, 0)},
+            {"shared:hit": 1, "local:hit": 2, "shared:miss": 1},
+        )
+
+    @override_settings(CACHES={
+        **TEST_CACHES,
+        "shared": {"BACKEND": "django.core.cache.backends.filebased.FileBasedCache", "LOCATION": "/tmp/shared"},
+    })
+    def test_shared_backend_without_atomic_incr_is_refused(self):
+        with self.assertRaises(ImproperlyConfigured):
+            create_process_cache()
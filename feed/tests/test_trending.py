@@ -0,0 +1,62 @@
+import datetime
+from unittest import mock
+
+from django.test import override_settings
+
+from feed.models import ArticleTrendingScore, Comment, TrendingState
+from feed.tests.base import FeedTestCase
+from feed.trending import get_current_score, get_epoch, recompute_trending
+from pseudo_twitter.sharding import using_shard
+
+HOUR = 60 * 60
+
+
+@override_settings(TRENDING_HALF_LIFE=HOUR, TRENDING_REBASE_INTERVAL=HOUR, TRENDING_MIN_SCORE=0)
+class TrendingTests(FeedTestCase):
+    def setUp(self):
+        super().setUp()
+        with using_shard(self.shard):
+            self.comment = Comment.objects.create(comment_text="Comment", author=self.reader, article=self.article)
+
+    def recompute_at(self, now: datetime.datetime):
+        with mock.patch("feed.trending.timezone.now", return_value=now):
+            recompute_trending(shard=self.shard)
+
+    def get_listed_score_at(self, now: datetime.datetime) -> float:
+        with mock.patch("feed.trending.timezone.now", return_value=now):
+            response = self.client.get("/feed/article/trending")
+        self.assertEqual(response.status_code, 200)
+        [article] = response.json()["results"]
+        self.assertEqual(article["id"], self.article.pk)
+        return article["score"]
+
+    def expected_score_at(self, now: datetime.datetime) -> float:
+        return 2.0 ** ((self.comment.create_date - now).total_seconds() / HOUR)
+
+    def test_score_decays_across_the_epoch_before_the_rebase(self):
+        created = self.comment.create_date
+        self.recompute_at(created)
+
+        # Two epochs later, the stored scores are still relative to the epoch of the last recompute
+        later = created + datetime.timedelta(hours=2, minutes=30)
+        self.assertNotEqual(get_epoch(later), get_epoch(created))
+        self.assertAlmostEqual(self.get_listed_score_at(later), self.expected_score_at(later))
+
+    def test_rebase_keeps_decayed_score(self):
+        created = self.comment.create_date
+        self.recompute_at(created)
+        later = created + datetime.timedelta(hours=2, minutes=30)
+        self.recompute_at(later)
+
+        with using_shard(self.shard):
+            state = TrendingState.objects.get()
+            stored = ArticleTrendingScore.objects.get(article=self.article).score
+        self.assertEqual(state.epoch, get_epoch(later))
+        self.assertAlmostEqual(get_current_score(stored, state.epoch, later), self.expected_score_at(later))
+        self.assertAlmostEqual(self.get_listed_score_at(later), self.expected_score_at(later))
+
+    def test_recompute_adds_only_new_events(self):
+        created = self.comment.create_date
+        self.recompute_at(created)
+        self.recompute_at(created)
+        self.assertAlmostEqual(self.get_listed_score_at(created), 1.0)
@@ -0,0 +1,132 @@
+from collections import defaultdict
+
+from django.conf import settings
+from django.db.models import F, Window
+from django.db.models.functions import RowNumber
+
+from feed.models import Comment
+from feed.sharding import with_authors
+from feed.sync import InvalidCursor, after, parse_position
+from feed.utils import decode_cursor, encode_cursor
+
+DEFAULT_MAX_REPLIES = 5
+DEFAULT_MAX_DEPTH = 3
+MAX_REPLIES_PAGE_SIZE = 100
+
+REPLY_ORDERING = ("create_date", "id")
+
+
+def get_thread_limits() -> tuple[int, int]:
+    """
+    :return: replies rendered per comment and depth of rendered replies
+    """
+    return (
+        getattr(settings, "THREAD_MAX_REPLIES", DEFAULT_MAX_REPLIES),
+        getattr(settings, "THREAD_MAX_DEPTH", DEFAULT_MAX_DEPTH),
+    )
+
+
+def make_replies_cursor(last_reply: Comment | None) -> str:
+    """
+    Cursor of comments/<pk>/replies continuing after the reply, from the first reply for None
+    """
+    position = None
+    if last_reply is not None:
+        position = [last_reply.create_date.isoformat(), last_reply.id]
+    return encode_cursor({"after": position})
+
+
+def decode_replies_cursor(cursor: str | None):
+    """
+    :param cursor: cursor made by make_replies_cursor or None
+    :return: position (create_date, id) of the last seen reply or None
+    """
+    if not cursor:
+        return None
+    position = decode_cursor(cursor)
+    if position is None:
+        raise InvalidCursor()
+    return parse_position(position.get("after"))
+
+
+def get_replies_queryset():
+    return with_authors(
+        Comment.objects.visible().select_related("article"),
+        "author"
+    )
+
+
+def get_descendants(comments, max_replies: int, max_depth: int) -> tuple[dict, dict]:
+    """
+    Load the first replies of the comments level by level, one query per depth level.
+    Every level takes at most max_replies + 1 replies per parent with a window function,
+    the extra reply only tells that the parent has more.
+    :param comments: comments of the page
+    :param max_replies: replies per comment
+    :param max_depth: levels of replies below the comments
+    :return: dict {parent comment id: list of replies} and
+             dict {comment id: cursor of the replies left out}
+    """
+    children = defaultdict(list)
+    cursors = {}
+
+    level = list(comments)
+    for depth in range(max_depth + 1):
+        if not level:
+            break
+        if depth == max_depth:
+            # Replies below the depth limit are left for comments/<pk>/replies
+            for comment in level:
+                if comment.reply_count:
+                    cursors[comment.id] = make_replies_cursor(None)
+            break
+
+        replies = get_replies_queryset().annotate(
+            position=Window(
+                RowNumber(),
+                partition_by=F("parent_comment"),
+                order_by=[F(field).asc() for field in REPLY_ORDERING],
+            )
+        ).filter(
+            parent_comment__in=[comment.id for comment in level],
+            position__lte=max_replies + 1
+        ).order_by("parent_comment", "position")
+
+        level = []
+        for reply in replies:
+            if reply.position > max_replies:
+                cursors[reply.parent_comment_id] = make_replies_cursor(children[reply.parent_comment_id][-1])
+                continue
+            children[reply.parent_comment_id].append(reply)
+            level.append(reply)
+    return children, cursors
+
+
+def get_replies_page(comment: Comment, cursor: str | None, page_size: int) -> tuple[list[Comment], str | None]:
+    """
+    Page of direct replies of the comment in (create_date, id) order
+    :param comment: parent comment
+    :param cursor: cursor from replies_cursor or a previous page
+    :param page_size: replies per page
+    :return: replies and the cursor of the next page or None on the last page
+    """
+    replies = get_replies_queryset().filter(parent_comment=comment.id)
+    replies = after(replies, decode_replies_cursor(cursor), "create_date").order_by(*REPLY_ORDERING)
+
+    replies = list(replies[:page_size + 1])
+    next_cursor = None
+    if len(replies) > page_size:
+        replies = replies[:page_size]
+        next_cursor = make_replies_cursor(replies[-1])
+    return replies, next_cursor
+
+
+def iter_comment_ids(comments, children: dict[int, list[Comment]]):
+    """
+    Ids of the comments and all their loaded replies
+    """
+    stack = list(comments)
+    while stack:
+        comment = stack.pop()
+        yield comment.id
+        stack.extend(children.get(comment.id, ()))
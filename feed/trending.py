@@ -0,0 +1,175 @@
+import datetime
+from collections import defaultdict
+
+from django.conf import settings
+from django.db.models import F
+from django.utils import timezone
+
+from feed.models import ArticleTrendingScore, Comment, LikeOnComment, TrendingState
+from pseudo_twitter.sharding import get_shard_index, get_shards, shard_atomic, using_shard
+
+DEFAULT_HALF_LIFE = 6 * 60 * 60
+DEFAULT_COMMENT_WEIGHT = 1.0
+DEFAULT_LIKE_WEIGHT = 0.5
+DEFAULT_MIN_SCORE = 0.01
+DEFAULT_REBASE_INTERVAL = 7 * 24 * 60 * 60
+DEFAULT_BATCH_SIZE = 5000
+LOOKUP_CHUNK_SIZE = 500
+
+# Epochs of the stored scores are multiples of TRENDING_REBASE_INTERVAL from this moment,
+# so all shards keep their scores relative to the same epoch and lists merged across shards stay ordered
+EPOCH_ORIGIN = datetime.datetime(2000, 1, 1, tzinfo=datetime.timezone.utc)
+
+
+def get_half_life() -> float:
+    return getattr(settings, "TRENDING_HALF_LIFE", DEFAULT_HALF_LIFE)
+
+
+def get_epoch(now: datetime.datetime) -> datetime.datetime:
+    """
+    :param now: current time
+    :return: epoch the stored scores are relative to at this time
+    """
+    interval = getattr(settings, "TRENDING_REBASE_INTERVAL", DEFAULT_REBASE_INTERVAL)
+    periods = (now - EPOCH_ORIGIN).total_seconds() // interval
+    return EPOCH_ORIGIN + datetime.timedelta(seconds=periods * interval)
+
+
+def growth_factor(moment: datetime.datetime, epoch: datetime.datetime) -> float:
+    """
+    Stored scores are weight * 2 ** ((t - epoch) / half-life): an event never changes its stored value,
+    newer events weigh more, and the order of stored scores is the order of the decayed ones
+    :param moment: time of the event
+    :param epoch: epoch of the scores
+    :return: factor of the weight of the event
+    """
+    return 2.0 ** ((moment - epoch).total_seconds() / get_half_life())
+
+
+def get_current_score(stored_score: float, epoch: datetime.datetime | None,
+                      now: datetime.datetime | None = None) -> float:
+    """
+    :param stored_score: stored score
+    :param epoch: epoch of the stored scores of its shard (TrendingState.epoch), moved only by recompute_trending
+    :param now: current time
+    :return: score decayed to the current time
+    """
+    if epoch is None:
+        # Scores of a state without an epoch are decayed values at its last run
+        return stored_score
+    now = now or timezone.now()
+    return stored_score / growth_factor(now, epoch)
+
+
+def get_score_epochs() -> dict[str, datetime.datetime | None]:
+    """
+    :return: epochs of the stored scores by shard, one query per shard
+    """
+    epochs = {}
+    for shard in get_shards():
+        with using_shard(shard):
+            epochs[shard] = TrendingState.objects.filter(
+                pk=get_shard_index(shard) + 1
+            ).values_list("epoch", flat=True).first()
+    return epochs
+
+
+def collect_comment_scores(scores: dict, last_comment_id: int, epoch: datetime.datetime,
+                           batch_size: int) -> tuple[int, int]:
+    weight = getattr(settings, "TRENDING_COMMENT_WEIGHT", DEFAULT_COMMENT_WEIGHT)
+    comments = Comment.objects.filter(
+        pk__gt=last_comment_id
+    ).order_by("pk").values_list("pk", "article_id", "create_date")[:batch_size]
+
+    processed = 0
+    for comment_id, article_id, create_date in comments:
+        scores[article_id] += weight * growth_factor(create_date, epoch)
+        last_comment_id = comment_id
+        processed += 1
+    return last_comment_id, processed
+
+
+def collect_like_scores(scores: dict, last_like_id: int, epoch: datetime.datetime,
+                        batch_size: int) -> tuple[int, int]:
+    weight = getattr(settings, "TRENDING_LIKE_WEIGHT", DEFAULT_LIKE_WEIGHT)
+    likes = LikeOnComment.objects.filter(
+        pk__gt=last_like_id
+    ).order_by("pk").values_list("pk", "comment__article_id", "create_date")[:batch_size]
+
+    processed = 0
+    for like_id, article_id, create_date in likes:
+        # Likes keep only the date, the start of the day is the earliest possible moment
+        like_date = datetime.datetime.combine(create_date, datetime.time.min, tzinfo=epoch.tzinfo)
+        scores[article_id] += weight * growth_factor(like_date, epoch)
+        last_like_id = like_id
+        processed += 1
+    return last_like_id, processed
+
+
+def rebase_scores(state: TrendingState, epoch: datetime.datetime):
+    """
+    Move stored scores of the shard to a new epoch, the only update of all rows, once per TRENDING_REBASE_INTERVAL.
+    Scores of a state without an epoch are decayed values at its last run
+    """
+    if state.epoch is not None:
+        factor = 1 / growth_factor(epoch, state.epoch)
+    elif state.last_run is not None:
+        factor = growth_factor(state.last_run, epoch)
+    else:
+        factor = None
+    if factor is not None:
+        ArticleTrendingScore.objects.update(score=F("score") * factor)
+    state.epoch = epoch
+
+
+def recompute_trending(batch_size: int = DEFAULT_BATCH_SIZE, shard: str | None = None) -> tuple[int, bool]:
+    """
+    Add comments and likes created since the last run to the stored scores of the shard
+    and drop scores decayed below TRENDING_MIN_SCORE
+    :param batch_size: max number of comments and of likes taken in one run
+    :param shard: shard of the articles, the first one by default
+    :return: number of updated articles, True if all new events are processed
+    """
+    now = timezone.now()
+    min_score = getattr(settings, "TRENDING_MIN_SCORE", DEFAULT_MIN_SCORE)
+    shard = shard or get_shards()[0]
+    epoch = get_epoch(now)
+
+    with shard_atomic(shard):
+        # Every shard keeps its own position, ids of comments and likes are per shard
+        state, _ = TrendingState.objects.select_for_update().get_or_create(pk=get_shard_index(shard) + 1)
+        if state.epoch != epoch:
+            rebase_scores(state, epoch)
+        # A range of the score index
+        ArticleTrendingScore.objects.filter(score__lt=min_score * growth_factor(now, epoch)).delete()
+
+        scores = defaultdict(float)
+        last_comment_id, comments_processed = collect_comment_scores(scores, state.last_comment_id, epoch, batch_size)
+        last_like_id, likes_processed = collect_like_scores(scores, state.last_like_id, epoch, batch_size)
+        caught_up = comments_processed < batch_size and likes_processed < batch_size
+
+        article_ids = list(scores)
+        stored_scores = {}
+        for start in range(0, len(article_ids), LOOKUP_CHUNK_SIZE):
+            stored_scores.update(
+                ArticleTrendingScore.objects.filter(
+                    article_id__in=article_ids[start:start + LOOKUP_CHUNK_SIZE]
+                ).values_list("article_id", "score")
+            )
+        rows = [
+            ArticleTrendingScore(article_id=article_id, score=stored_scores.get(article_id, 0.0) + score, update_date=now)
+            for article_id, score in scores.items()
+        ]
+        ArticleTrendingScore.objects.bulk_create(
+            rows,
+            batch_size=LOOKUP_CHUNK_SIZE,
+            update_conflicts=True,
+            unique_fields=["article"],
+            update_fields=["score", "update_date"],
+        )
+
+        state.last_comment_id = last_comment_id
+        state.last_like_id = last_like_id
+        state.last_run = now
+        state.save()
+    return len(rows), caught_up
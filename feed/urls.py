@@ -1,23 +1,40 @@
 from django.urls import path
 
-from .views.author_views import GetPostAuthorsView, RetrieveUpdateDestroyAuthorView
-from .views.article_views import GetPostArticlesView, RetrieveUpdateDestroyArticleView
-from .views.comment_views import GetPostCommentView, UpdateDestroyCommentView
-from .views.like_on_comment_views import LikeOnCommentView
+from .views.auth_views import ObtainTokenView
+from .views.author_views import BulkCreateAuthorsView, GetPostAuthorsView, RetrieveAuthorStatsView, \
+    RetrieveUpdateDestroyAuthorView
+from .views.article_views import GetPostArticlesView, RetrieveUpdateDestroyArticleView, TrendingArticlesView
+from .views.comment_views import GetPostCommentView, ListRepliesView, UpdateDestroyCommentView
+from .views.job_views import RetrieveJobView
+from .views.like_on_comment_views import LikeOnCommentView, MyReactionsView
+from .views.sync_views import ArticleChangesView, CommentChangesView
 
 urlpatterns = [
+    # Auth
+    path("token", ObtainTokenView.as_view(), name="obtain_token"),
+
     # Authors
     path("author", GetPostAuthorsView.as_view(), name="list_authors_create_author"),
+    path("author/bulk", BulkCreateAuthorsView.as_view(), name="bulk_create_authors"),
     path("author/<str:pk>", RetrieveUpdateDestroyAuthorView.as_view(), name="retrieve_author"),
+    path("author/<str:pk>/stats", RetrieveAuthorStatsView.as_view(), name="retrieve_author_stats"),
 
     # Articles
     path("article", GetPostArticlesView.as_view(), name="list_articles"),
+    path("article/trending", TrendingArticlesView.as_view(), name="list_trending_articles"),
+    path("article/changes", ArticleChangesView.as_view(), name="list_article_changes"),
     path("article/<str:pk>", RetrieveUpdateDestroyArticleView.as_view(), name="retrieve_update_destroy_article"),
 
     # Comments
     path("articles/<str:article_id>/comments", GetPostCommentView.as_view(), name="list_comments"),
+    path("articles/<str:article_id>/comments/changes", CommentChangesView.as_view(), name="list_comment_changes"),
     path("comments/<str:pk>", UpdateDestroyCommentView.as_view(), name="create_comment"),
+    path("comments/<str:pk>/replies", ListRepliesView.as_view(), name="list_replies"),
 
     # Likes on Comments
+    path("comment/reactions", MyReactionsView.as_view(), name="list_my_reactions"),
     path("comment/<str:comment_id>/like", LikeOnCommentView.as_view(), name="list_likes_create_like_on_comment"),
+
+    # Background jobs
+    path("job/<str:pk>", RetrieveJobView.as_view(), name="retrieve_job"),
 ]
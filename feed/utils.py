@@ -1,3 +1,6 @@
+import base64
+import json
+
 from rest_framework import status
 from rest_framework.response import Response
 
@@ -15,3 +18,29 @@ def validate_params(dict_for_validate: dict[str, str], model_name: str) -> Respo
             error = Response(response, status=status.HTTP_400_BAD_REQUEST)
             return error
     return None
+
+
+def encode_cursor(position: dict) -> str:
+    """
+    Encode position of a keyset pagination into an opaque cursor
+    :param position: JSON serializable position
+    :return: cursor
+    """
+    data = json.dumps(position, separators=(",", ":"), default=str).encode()
+    return base64.urlsafe_b64encode(data).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> dict | None:
+    """
+    Decode cursor created by encode_cursor
+    :param cursor: cursor
+    :return: position or None if the cursor is invalid
+    """
+    try:
+        data = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        position = json.loads(data)
+    except (ValueError, TypeError):
+        return None
+    if not isinstance(position, dict):
+        return None
+    return position
@@ -3,34 +3,50 @@ from rest_framework import generics, permissions, status
 from rest_framework.generics import get_object_or_404
 from rest_framework.response import Response
 
-from feed.models import Article, Author
-from feed.serializers import ArticlesSerializer, ArticleSerializer
+from feed.conditional import get_article_etag, get_articles_etag, get_not_modified_response, set_etag
+from feed.models import Article, ArticleTrendingScore, Author
+from feed.serializers import ArticlesSerializer, ArticleSerializer, TrendingArticleSerializer
+from feed.purge import tombstone_article
+from feed.response_cache import cached_response
+from feed.sharding import with_authors
 from feed.statuses import SCHEMA_PERMISSION_DENIED, SCHEMA_GET_POST_STATUSES, SCHEMA_RETRIEVE_UPDATE_DESTROY_STATUSES, \
-    STATUS_204, RESPONSE_STATUS_403
+    SCHEMA_STREAM_PARAMETER, STATUS_202_DELETION, RESPONSE_STATUS_403
+from feed.trending import get_score_epochs
 from feed.utils import validate_params
+from pseudo_twitter.pagination import StreamingListMixin, TrendingPagination
+from pseudo_twitter.sharding import shard_queryset
 
 
-class GetPostArticlesView(generics.ListAPIView):
+class GetPostArticlesView(StreamingListMixin, generics.ListAPIView):
     serializer_class = ArticlesSerializer
     permission_classes = [permissions.IsAuthenticatedOrReadOnly]
 
     def get_queryset(self):
-        queryset = Article.objects.select_related(
+        queryset = with_authors(
+            Article.objects.order_by("pk"),
             "author"
         )
-        return queryset
+        # Articles of all shards
+        return shard_queryset(queryset)
 
     @extend_schema(
         tags=['Articles'],
         summary="Get list of articles",
+        parameters=[SCHEMA_STREAM_PARAMETER],
         responses={
             status.HTTP_200_OK: ArticlesSerializer,
+            status.HTTP_304_NOT_MODIFIED: None,
             **SCHEMA_GET_POST_STATUSES
 
         }
     )
     def get(self, request, *args, **kwargs):
-        return super().get(request, *args, **kwargs)
+        etag = get_articles_etag(self.get_queryset(), request)
+        not_modified = get_not_modified_response(request, etag)
+        if not_modified:
+            return not_modified
+        response = super().get(request, *args, **kwargs)
+        return set_etag(response, etag)
 
     @extend_schema(
         tags=['Articles'],
@@ -79,12 +95,44 @@ class GetPostArticlesView(generics.ListAPIView):
         return Response(status=status.HTTP_201_CREATED)
 
 
+class TrendingArticlesView(generics.ListAPIView):
+    serializer_class = TrendingArticleSerializer
+    pagination_class = TrendingPagination
+    permission_classes = [permissions.IsAuthenticatedOrReadOnly]
+
+    def get_queryset(self):
+        queryset = with_authors(
+            ArticleTrendingScore.objects.select_related("article"),
+            "article__author"
+        ).filter(
+            article__deleted_at__isnull=True
+        )
+        return shard_queryset(queryset)
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        context["score_epochs"] = get_score_epochs()
+        return context
+
+    @extend_schema(
+        tags=['Articles'],
+        summary="Get list of trending articles",
+        responses={
+            status.HTTP_200_OK: TrendingArticleSerializer,
+            **SCHEMA_GET_POST_STATUSES
+        }
+    )
+    def get(self, request, *args, **kwargs):
+        return super().get(request, *args, **kwargs)
+
+
 class RetrieveUpdateDestroyArticleView(generics.RetrieveUpdateDestroyAPIView):
     serializer_class = ArticleSerializer
     permission_classes = [permissions.IsAuthenticated]
 
     def get_queryset(self):
-        queryset = Article.objects.select_related(
+        queryset = with_authors(
+            Article.objects.all(),
             "author"
         )
         return queryset
@@ -94,12 +142,23 @@ class RetrieveUpdateDestroyArticleView(generics.RetrieveUpdateDestroyAPIView):
         summary="Get article",
         responses={
             status.HTTP_200_OK: ArticleSerializer,
+            status.HTTP_304_NOT_MODIFIED: None,
             **SCHEMA_RETRIEVE_UPDATE_DESTROY_STATUSES,
             **SCHEMA_PERMISSION_DENIED
         }
     )
     def get(self, request, *args, **kwargs):
-        return super().get(request, *args, **kwargs)
+        article_id = kwargs.get("pk")
+        etag = get_article_etag(article_id)
+        if not etag:
+            return super().get(request, *args, **kwargs)
+
+        not_modified = get_not_modified_response(request, etag)
+        if not_modified:
+            return not_modified
+        return cached_response(
+            request, "article", article_id, lambda: self.retrieve(request, *args, **kwargs), etag=etag
+        )
 
     @extend_schema(
         tags=['Articles'],
@@ -164,8 +223,9 @@ class RetrieveUpdateDestroyArticleView(generics.RetrieveUpdateDestroyAPIView):
     @extend_schema(
         tags=['Articles'],
         summary="Delete article",
+        description="The article is hidden at once, its comments are purged in the background",
         responses={
-            **STATUS_204,
+            **STATUS_202_DELETION,
             **SCHEMA_RETRIEVE_UPDATE_DESTROY_STATUSES,
             **SCHEMA_PERMISSION_DENIED
         }
@@ -178,4 +238,5 @@ class RetrieveUpdateDestroyArticleView(generics.RetrieveUpdateDestroyAPIView):
         if author_id != article.author_id:
             return RESPONSE_STATUS_403
 
-        return super().delete(request, *args, **kwargs)
+        job = tombstone_article(article)
+        return Response({"job_id": job.id}, status=status.HTTP_202_ACCEPTED)
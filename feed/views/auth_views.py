@@ -0,0 +1,68 @@
+from django.contrib.auth import authenticate
+from drf_spectacular.utils import extend_schema, OpenApiExample
+from rest_framework import permissions, serializers, status
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from feed.authentication import get_token_lifetime, issue_token
+from feed.statuses import SCHEMA_GET_POST_STATUSES, lazy_inline_serializer
+from feed.utils import validate_params
+
+
+class ObtainTokenView(APIView):
+    authentication_classes = []
+    permission_classes = [permissions.AllowAny]
+
+    @extend_schema(
+        tags=["Auth"],
+        summary="Get bearer token",
+        request=lazy_inline_serializer(
+            "TokenRequest",
+            lambda: {
+                "username": serializers.CharField(),
+                "password": serializers.CharField(),
+            }
+        ),
+        examples=[
+            OpenApiExample(
+                name="Example of a token request",
+                value={
+                    "username": "username",
+                    "password": "password",
+                },
+                request_only=True
+            ),
+        ],
+        responses={
+            status.HTTP_200_OK: lazy_inline_serializer(
+                "Token",
+                lambda: {
+                    "token": serializers.CharField(),
+                    "expires_in": serializers.IntegerField(),
+                }
+            ),
+            **SCHEMA_GET_POST_STATUSES
+        }
+    )
+    def post(self, request, *args, **kwargs):
+        username = request.data.get("username")
+        password = request.data.get("password")
+
+        dict_for_validate = {
+            "username": username,
+            "password": password
+        }
+        error = validate_params(dict_for_validate, "token")
+        if error:
+            return error
+
+        author = authenticate(request, username=username, password=password)
+        if author is None:
+            response = {"errors": "Invalid username or password."}
+            return Response(response, status=status.HTTP_400_BAD_REQUEST)
+
+        response = {
+            "token": issue_token(author),
+            "expires_in": get_token_lifetime(),
+        }
+        return Response(response, status=status.HTTP_200_OK)
@@ -1,12 +1,23 @@
+from django.conf import settings
 from drf_spectacular.utils import extend_schema, OpenApiExample
-from rest_framework import generics, status, permissions
+from rest_framework import generics, serializers, status, permissions
+from rest_framework.generics import get_object_or_404
+from rest_framework.response import Response
+from rest_framework.views import APIView
 
-from feed.models import Author
-from feed.serializers import AuthorsSerializer
-from feed.statuses import SCHEMA_GET_POST_STATUSES, SCHEMA_RETRIEVE_UPDATE_DESTROY_STATUSES, STATUS_204
+from feed.models import Author, AuthorStats
+from feed.jobs import enqueue
+from feed.serializers import AuthorsSerializer, AuthorStatsSerializer, BulkAuthorSerializer
+from feed.stats import rebuild_author_stats
+from feed.purge import tombstone_author
+from feed.statuses import SCHEMA_GET_POST_STATUSES, SCHEMA_RETRIEVE_UPDATE_DESTROY_STATUSES, STATUS_202_DELETION, \
+    STATUS_202_PROVISIONING, SCHEMA_PERMISSION_DENIED, SCHEMA_STREAM_PARAMETER, lazy_inline_serializer
+from pseudo_twitter.pagination import StreamingListMixin
 
+DEFAULT_BULK_MAX_AUTHORS = 1000
 
-class GetPostAuthorsView(generics.ListCreateAPIView):
+
+class GetPostAuthorsView(StreamingListMixin, generics.ListCreateAPIView):
     queryset = Author.objects.all()
     serializer_class = AuthorsSerializer
     permission_classes = [permissions.IsAdminUser]
@@ -14,6 +25,7 @@ class GetPostAuthorsView(generics.ListCreateAPIView):
     @extend_schema(
         tags=['Authors'],
         summary="Get list of authors",
+        parameters=[SCHEMA_STREAM_PARAMETER],
         responses={
             status.HTTP_200_OK: AuthorsSerializer,
             **SCHEMA_GET_POST_STATUSES
@@ -52,6 +64,58 @@ class GetPostAuthorsView(generics.ListCreateAPIView):
         user.save()
 
 
+class BulkCreateAuthorsView(APIView):
+    permission_classes = [permissions.IsAdminUser]
+
+    @extend_schema(
+        tags=['Authors'],
+        summary="Create many authors",
+        description="Authors are created by a background job: passwords are hashed in parallel, "
+                    "taken usernames are skipped. The job progress has the created count and skipped usernames",
+        request=lazy_inline_serializer(
+            "BulkAuthorsRequest",
+            lambda: {
+                "authors": BulkAuthorSerializer(many=True),
+            }
+        ),
+        examples=[
+            OpenApiExample(
+                name='Example of a bulk author create request',
+                value={
+                    "authors": [
+                        {
+                            "first_name": "Erich Maria",
+                            "last_name": "Remarque",
+                            "username": "username",
+                            "password": "password",
+                            "email": "email@example.com",
+                        },
+                    ],
+                },
+                request_only=True
+            ),
+        ],
+        responses={
+            **STATUS_202_PROVISIONING,
+            **SCHEMA_GET_POST_STATUSES,
+            **SCHEMA_PERMISSION_DENIED
+        }
+    )
+    def post(self, request, *args, **kwargs):
+        authors = request.data.get("authors")
+        max_authors = getattr(settings, "AUTHOR_PROVISION_MAX_REQUEST", DEFAULT_BULK_MAX_AUTHORS)
+        if not isinstance(authors, list) or not 0 < len(authors) <= max_authors:
+            response = {"errors": f"The authors must be a list of 1 to {max_authors} authors."}
+            return Response(response, status=status.HTTP_400_BAD_REQUEST)
+
+        serializer = BulkAuthorSerializer(data=authors, many=True)
+        if not serializer.is_valid():
+            return Response({"errors": serializer.errors}, status=status.HTTP_400_BAD_REQUEST)
+
+        job = enqueue("provision_authors", {"authors": serializer.validated_data})
+        return Response({"job_id": job.id}, status=status.HTTP_202_ACCEPTED)
+
+
 class RetrieveUpdateDestroyAuthorView(generics.RetrieveUpdateDestroyAPIView):
     queryset = Author.objects.all()
     serializer_class = AuthorsSerializer
@@ -113,10 +177,38 @@ class RetrieveUpdateDestroyAuthorView(generics.RetrieveUpdateDestroyAPIView):
     @extend_schema(
         tags=['Authors'],
         summary="Delete author by id",
+        description="The author and their articles are hidden at once, everything they created is purged in the background",
         responses={
-            **STATUS_204,
+            **STATUS_202_DELETION,
             **SCHEMA_RETRIEVE_UPDATE_DESTROY_STATUSES
         }
     )
     def delete(self, request, *args, **kwargs):
-        return super().delete(request, *args, **kwargs)
+        author = self.get_object()
+        job = tombstone_author(author)
+        return Response({"job_id": job.id}, status=status.HTTP_202_ACCEPTED)
+
+
+class RetrieveAuthorStatsView(generics.RetrieveAPIView):
+    serializer_class = AuthorStatsSerializer
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get_object(self):
+        author = get_object_or_404(Author, pk=self.kwargs.get("pk"))
+        stats = AuthorStats.objects.filter(author=author).first()
+        if stats is None:
+            rebuild_author_stats(author.pk, author.pk + 1)
+            stats = AuthorStats.objects.get(author=author)
+        return stats
+
+    @extend_schema(
+        tags=['Authors'],
+        summary="Get author statistics",
+        responses={
+            status.HTTP_200_OK: AuthorStatsSerializer,
+            **SCHEMA_RETRIEVE_UPDATE_DESTROY_STATUSES,
+            **SCHEMA_PERMISSION_DENIED
+        }
+    )
+    def get(self, request, *args, **kwargs):
+        return super().get(request, *args, **kwargs)
@@ -1,13 +1,23 @@
-from drf_spectacular.utils import extend_schema, OpenApiExample
-from rest_framework import generics, status, permissions
+from django.utils.cache import patch_vary_headers
+from drf_spectacular.utils import extend_schema, OpenApiExample, OpenApiParameter
+from rest_framework import generics, status, permissions, serializers
 from rest_framework.generics import get_object_or_404
 from rest_framework.response import Response
+from rest_framework.views import APIView
 
+from feed.conditional import get_comments_etag, get_not_modified_response, get_personal_etag, set_etag
 from feed.models import Comment, Article, Author
+from feed.reactions import get_article_reactions, get_my_reactions, with_my_reactions
+from feed.response_cache import cached_response
 from feed.serializers import CommentsSerializer
-from feed.statuses import SCHEMA_PERMISSION_DENIED, SCHEMA_RETRIEVE_UPDATE_DESTROY_STATUSES, STATUS_204, \
-    RESPONSE_STATUS_403
+from feed.sharding import with_authors
+from feed.statuses import SCHEMA_PERMISSION_DENIED, SCHEMA_RETRIEVE_UPDATE_DESTROY_STATUSES, SCHEMA_STREAM_PARAMETER, \
+    STATUS_204, RESPONSE_STATUS_403, lazy_inline_serializer
+from feed.sync import InvalidCursor
+from feed.threads import MAX_REPLIES_PAGE_SIZE, get_descendants, get_replies_page, get_thread_limits, \
+    iter_comment_ids
 from feed.utils import validate_params
+from pseudo_twitter.pagination import StreamingListMixin, is_stream_requested
 
 
 def check_parent_comment(article_id, parent_comment):
@@ -24,13 +34,32 @@ def get_objects(author_id, article_id, parent_comment_id):
 
     parent_comment = None
     if parent_comment_id:
-        parent_comment = get_object_or_404(Comment, pk=parent_comment_id)
+        parent_comment = get_object_or_404(Comment.objects.visible(), pk=parent_comment_id)
     return author, article, parent_comment
 
 
-class GetPostCommentView(generics.ListCreateAPIView):
+def get_thread_context(request, comments, include_my_reactions: bool = True) -> dict:
+    """
+    Serializer context rendering bounded threads under the comments: the first THREAD_MAX_REPLIES replies
+    of every comment down to THREAD_MAX_DEPTH levels, cursors of the rest and reactions of the user
+    :param request: request
+    :param comments: comments of the page
+    :param include_my_reactions: False for threads shared by all users, reactions are added to them later
+    :return: context for CommentsSerializer
+    """
+    max_replies, max_depth = get_thread_limits()
+    children, reply_cursors = get_descendants(comments, max_replies, max_depth)
+    my_reactions = {}
+    if include_my_reactions:
+        my_reactions = get_my_reactions(request.user, iter_comment_ids(comments, children))
+    return {"children": children, "reply_cursors": reply_cursors, "my_reactions": my_reactions}
+
+
+class GetPostCommentView(StreamingListMixin, generics.ListCreateAPIView):
     serializer_class = CommentsSerializer
     permission_classes = [permissions.IsAuthenticatedOrReadOnly]
+    # Cached pages are shared by all users, so they are rendered without reactions of the user
+    include_my_reactions = True
 
     def get_queryset(self):
         article_id = self.kwargs.get("article_id")
@@ -38,26 +67,71 @@ class GetPostCommentView(generics.ListCreateAPIView):
             return None
         get_object_or_404(Article, pk=article_id)
 
-        queryset = Comment.objects.select_related(
-            "article",
-            "author",
+        queryset = with_authors(
+            Comment.objects.visible().select_related("article"),
+            "author"
         ).filter(
             article=article_id,
             parent_comment__isnull=True
-        )
+        ).order_by("pk")
         return queryset
 
     @extend_schema(
         tags=["Comments"],
         summary="Get comments on the article",
+        parameters=[SCHEMA_STREAM_PARAMETER],
         responses={
             status.HTTP_200_OK: CommentsSerializer,
+            status.HTTP_304_NOT_MODIFIED: None,
             **SCHEMA_RETRIEVE_UPDATE_DESTROY_STATUSES,
             **SCHEMA_PERMISSION_DENIED,
         }
     )
     def get(self, request, *args, **kwargs):
-        return super().get(self, request, *args, **kwargs)
+        article_id = kwargs.get("article_id")
+        get_object_or_404(Article, pk=article_id)
+
+        shared_etag = get_comments_etag(article_id, request)
+        my_reactions = get_article_reactions(request.user, article_id)
+        etag = get_personal_etag(shared_etag, request.user, my_reactions)
+        not_modified = get_not_modified_response(request, etag)
+        if not_modified:
+            patch_vary_headers(not_modified, ("Authorization", "Cookie"))
+            return not_modified
+
+        if is_stream_requested(request):
+            # Streamed bodies are never held whole, so they bypass the response cache
+            response = set_etag(self.list(request, *args, **kwargs), etag)
+        else:
+            self.include_my_reactions = False
+            response = cached_response(
+                request,
+                "comments",
+                article_id,
+                lambda: self.list(request, *args, **kwargs),
+                etag=shared_etag,
+                personalize=lambda data: {**data, "results": with_my_reactions(data["results"], my_reactions)},
+            )
+            if response.has_header("ETag"):
+                # ETag of the cached thread, possibly stale, with the reactions sent in the body
+                response["ETag"] = get_personal_etag(response["ETag"], request.user, my_reactions)
+        patch_vary_headers(response, ("Authorization", "Cookie"))
+        return response
+
+    def list(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+        if is_stream_requested(request):
+            return self.get_streaming_response(queryset)
+
+        page = self.paginate_queryset(queryset)
+        serializer = self.get_serializer(page, many=True, context=self.get_chunk_context(page))
+        return self.get_paginated_response(serializer.data)
+
+    def get_chunk_context(self, rows):
+        return {
+            **self.get_serializer_context(),
+            **get_thread_context(self.request, rows, self.include_my_reactions),
+        }
 
     @extend_schema(
         tags=["Comments"],
@@ -116,9 +190,9 @@ class UpdateDestroyCommentView(generics.UpdateAPIView, generics.DestroyAPIView):
         comment_id = self.kwargs.get("pk")
         if not comment_id:
             return None
-        queryset = Comment.objects.select_related(
-            "article",
-            "author",
+        queryset = with_authors(
+            Comment.objects.visible().select_related("article"),
+            "author"
         ).filter(
             pk=comment_id
         )
@@ -148,7 +222,7 @@ class UpdateDestroyCommentView(generics.UpdateAPIView, generics.DestroyAPIView):
         author_id = request.user.id
 
         pk = kwargs.get("pk")
-        comment = get_object_or_404(Comment, pk=pk)
+        comment = get_object_or_404(Comment.objects.visible(), pk=pk)
         if author_id != comment.author_id:
             return RESPONSE_STATUS_403
 
@@ -187,7 +261,7 @@ class UpdateDestroyCommentView(generics.UpdateAPIView, generics.DestroyAPIView):
         author_id = request.user.id
 
         pk = kwargs.get("pk")
-        comment = get_object_or_404(Comment, pk=pk)
+        comment = get_object_or_404(Comment.objects.visible(), pk=pk)
         if author_id != comment.author_id:
             return RESPONSE_STATUS_403
 
@@ -198,7 +272,7 @@ class UpdateDestroyCommentView(generics.UpdateAPIView, generics.DestroyAPIView):
         parent_comment_id = request.data.get("parent_comment")
 
         if parent_comment_id:
-            parent_comment = get_object_or_404(Comment, pk=parent_comment_id)
+            parent_comment = get_object_or_404(Comment.objects.visible(), pk=parent_comment_id)
             error = check_parent_comment(article_id, parent_comment)
             if error:
                 return error
@@ -216,7 +290,59 @@ class UpdateDestroyCommentView(generics.UpdateAPIView, generics.DestroyAPIView):
     )
     def delete(self, request, *args, **kwargs):
         pk = kwargs.get("pk")
-        comment = get_object_or_404(Comment, pk=pk)
+        comment = get_object_or_404(Comment.objects.visible(), pk=pk)
         if request.user.id != comment.author_id:
             return RESPONSE_STATUS_403
         return super().delete(request, *args, **kwargs)
+
+
+class ListRepliesView(APIView):
+    permission_classes = [permissions.IsAuthenticatedOrReadOnly]
+
+    @extend_schema(
+        tags=["Comments"],
+        summary="Get more replies of the comment",
+        description="Pages direct replies of the comment starting from its replies_cursor, "
+                    "every reply comes with its own bounded thread",
+        parameters=[
+            OpenApiParameter("cursor", type=str, required=False,
+                             description="replies_cursor of the comment or next_cursor of the previous page"),
+            OpenApiParameter("page_size", type=int, required=False),
+        ],
+        responses={
+            status.HTTP_200_OK: lazy_inline_serializer(
+                "Replies",
+                lambda: {
+                    "results": CommentsSerializer(many=True),
+                    "next_cursor": serializers.CharField(allow_null=True),
+                }
+            ),
+            **SCHEMA_RETRIEVE_UPDATE_DESTROY_STATUSES,
+        }
+    )
+    def get(self, request, *args, **kwargs):
+        comment = get_object_or_404(Comment.objects.visible(), pk=kwargs.get("pk"))
+
+        max_replies, _ = get_thread_limits()
+        try:
+            page_size = int(request.query_params.get("page_size", max_replies))
+        except ValueError:
+            page_size = 0
+        if page_size < 1:
+            response = {"errors": "The page_size of replies is invalid."}
+            return Response(response, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            replies, next_cursor = get_replies_page(
+                comment, request.query_params.get("cursor"), min(page_size, MAX_REPLIES_PAGE_SIZE)
+            )
+        except InvalidCursor:
+            response = {"errors": "The cursor is invalid."}
+            return Response(response, status=status.HTTP_400_BAD_REQUEST)
+
+        context = {"request": request, **get_thread_context(request, replies)}
+        data = {
+            "results": CommentsSerializer(replies, many=True, context=context).data,
+            "next_cursor": next_cursor,
+        }
+        return Response(data, status=status.HTTP_200_OK)
@@ -0,0 +1,23 @@
+from drf_spectacular.utils import extend_schema
+from rest_framework import generics, permissions, status
+
+from feed.models import Job
+from feed.serializers import JobSerializer
+from feed.statuses import SCHEMA_RETRIEVE_UPDATE_DESTROY_STATUSES
+
+
+class RetrieveJobView(generics.RetrieveAPIView):
+    queryset = Job.objects.all()
+    serializer_class = JobSerializer
+    permission_classes = [permissions.IsAdminUser]
+
+    @extend_schema(
+        tags=["Jobs"],
+        summary="Get background job status and progress",
+        responses={
+            status.HTTP_200_OK: JobSerializer,
+            **SCHEMA_RETRIEVE_UPDATE_DESTROY_STATUSES
+        }
+    )
+    def get(self, request, *args, **kwargs):
+        return super().get(request, *args, **kwargs)
@@ -1,12 +1,17 @@
 from django.db import IntegrityError
 from drf_spectacular.utils import extend_schema, OpenApiExample, OpenApiParameter
-from rest_framework import generics, status, permissions
+from rest_framework import generics, status, permissions, serializers
 from rest_framework.generics import get_object_or_404
 from rest_framework.response import Response
+from rest_framework.views import APIView
 
+from feed.counters import change_counter
 from feed.models import LikeOnComment, Author, Comment
+from feed.reactions import MAX_BATCH_SIZE, get_my_reactions, parse_comment_ids, set_reaction
 from feed.serializers import LikeOnCommentSerializer
-from feed.statuses import SCHEMA_PERMISSION_DENIED, SCHEMA_RETRIEVE_UPDATE_DESTROY_STATUSES, STATUS_204
+from feed.sharding import exclude_deleted_authors, with_authors
+from feed.statuses import SCHEMA_PERMISSION_DENIED, SCHEMA_GET_POST_STATUSES, SCHEMA_RETRIEVE_UPDATE_DESTROY_STATUSES, \
+    STATUS_204, lazy_inline_serializer
 from feed.utils import validate_params
 
 
@@ -18,14 +23,14 @@ class LikeOnCommentView(generics.ListCreateAPIView, generics.RetrieveUpdateDestr
         comment_id = self.kwargs['comment_id']
         if not comment_id:
             return None
-        get_object_or_404(Comment, pk=comment_id)
-        qs = LikeOnComment.objects.select_related(
-            'author',
-            'comment'
+        get_object_or_404(Comment.objects.visible(), pk=comment_id)
+        qs = with_authors(
+            LikeOnComment.objects.select_related('comment'),
+            'author'
         ).filter(
             comment=comment_id
-        )
-        return qs
+        ).order_by("pk")
+        return exclude_deleted_authors(qs)
 
     @extend_schema(
         tags=["Likes"],
@@ -85,6 +90,10 @@ class LikeOnCommentView(generics.ListCreateAPIView, generics.RetrieveUpdateDestr
         error = validate_params(dict_for_validate, "like")
         if error:
             return error
+        # Only known reactions have a stored code
+        if reaction not in dict(LikeOnComment.REACTIONS):
+            response = {"errors": f"Unknown reaction {reaction}."}
+            return Response(response, status=status.HTTP_400_BAD_REQUEST)
 
         author, comment = self.get_objects(author_id, comment_id)
         try:
@@ -93,8 +102,7 @@ class LikeOnCommentView(generics.ListCreateAPIView, generics.RetrieveUpdateDestr
                 reaction=reaction,
                 comment=comment
             )
-            comment.count_of_likes += 1
-            comment.save()
+            change_counter(Comment, comment.pk, "count_of_likes", 1)
             return Response(status=status.HTTP_201_CREATED)
         except IntegrityError:
             response = Response({"errors": "Unique constraint failed."}, status=status.HTTP_400_BAD_REQUEST)
@@ -107,7 +115,7 @@ class LikeOnCommentView(generics.ListCreateAPIView, generics.RetrieveUpdateDestr
         if not comment_id or not author_id:
             return None
 
-        get_object_or_404(Comment, pk=comment_id)
+        get_object_or_404(Comment.objects.visible(), pk=comment_id)
 
         qs = get_object_or_404(LikeOnComment, comment_id=comment_id, author_id=author_id)
         return qs
@@ -123,15 +131,33 @@ class LikeOnCommentView(generics.ListCreateAPIView, generics.RetrieveUpdateDestr
         ],
         responses={
             status.HTTP_200_OK: LikeOnCommentSerializer,
+            status.HTTP_201_CREATED: LikeOnCommentSerializer,
             **SCHEMA_RETRIEVE_UPDATE_DESTROY_STATUSES,
             **SCHEMA_PERMISSION_DENIED
         },
         tags=["Likes"],
-        summary="Update like on comment"
+        summary="Set like on comment",
+        description="Creates the like or changes its reaction, repeating the request changes nothing"
     )
     def put(self, request, *args, **kwargs):
-        self.get_object()
-        return super().put(request, *args, **kwargs)
+        comment_id = kwargs.get("comment_id")
+        reaction = request.data.get("reaction")
+        dict_for_validate = {
+            "comment_id": comment_id,
+            "reaction": reaction
+        }
+        error = validate_params(dict_for_validate, "like")
+        if error:
+            return error
+        if reaction not in dict(LikeOnComment.REACTIONS):
+            response = {"errors": f"Unknown reaction {reaction}."}
+            return Response(response, status=status.HTTP_400_BAD_REQUEST)
+
+        comment = get_object_or_404(Comment.objects.visible(), pk=comment_id)
+        like, created = set_reaction(request.user, comment, reaction)
+
+        response_status = status.HTTP_201_CREATED if created else status.HTTP_200_OK
+        return Response(LikeOnCommentSerializer(like).data, status=response_status)
 
     @extend_schema(
         examples=[
@@ -165,14 +191,52 @@ class LikeOnCommentView(generics.ListCreateAPIView, generics.RetrieveUpdateDestr
     )
     def delete(self, request, *args, **kwargs):
         self.get_object()
-        comment_id = kwargs["comment_id"]
-        comment = Comment.objects.get(id=comment_id)
-        comment.count_of_likes -= 1
-        comment.save()
-        return super().delete(request, *args, **kwargs)
+        response = super().delete(request, *args, **kwargs)
+        change_counter(Comment, kwargs["comment_id"], "count_of_likes", -1)
+        return response
 
     @staticmethod
     def get_objects(author_id, comment_id):
         author = get_object_or_404(Author, pk=author_id)
-        comment = get_object_or_404(Comment, pk=comment_id)
+        comment = get_object_or_404(Comment.objects.visible(), pk=comment_id)
         return author, comment
+
+
+class MyReactionsView(APIView):
+    permission_classes = [permissions.IsAuthenticated]
+
+    @extend_schema(
+        tags=["Likes"],
+        summary="Get reactions of the current user on several comments",
+        parameters=[
+            OpenApiParameter(
+                "ids",
+                type=str, required=True,
+                description=f"Comma separated comment ids, at most {MAX_BATCH_SIZE}"
+            )
+        ],
+        responses={
+            status.HTTP_200_OK: lazy_inline_serializer(
+                "MyReactions",
+                lambda: {
+                    "reactions": serializers.DictField(child=serializers.CharField(allow_null=True)),
+                }
+            ),
+            **SCHEMA_GET_POST_STATUSES,
+            **SCHEMA_PERMISSION_DENIED
+        }
+    )
+    def get(self, request, *args, **kwargs):
+        raw_ids = request.query_params.get("ids")
+        error = validate_params({"ids": raw_ids}, "reactions")
+        if error:
+            return error
+
+        comment_ids = parse_comment_ids(raw_ids)
+        if comment_ids is None:
+            response = {"errors": f"The ids must be at most {MAX_BATCH_SIZE} comma separated comment ids."}
+            return Response(response, status=status.HTTP_400_BAD_REQUEST)
+
+        my_reactions = get_my_reactions(request.user, comment_ids)
+        reactions = {str(comment_id): my_reactions.get(comment_id) for comment_id in comment_ids}
+        return Response({"reactions": reactions})
@@ -0,0 +1,88 @@
+from drf_spectacular.utils import extend_schema, OpenApiParameter
+from rest_framework import permissions, status
+from rest_framework.generics import get_object_or_404
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from feed.models import Article, Comment
+from feed.serializers import ArticleSerializer, CommentChangeSerializer
+from feed.sharding import with_authors
+from feed.statuses import SCHEMA_RETRIEVE_UPDATE_DESTROY_STATUSES, SCHEMA_SYNC_CHANGES, STATUS_410
+from feed.sync import DEFAULT_LIMIT, MAX_LIMIT, ExpiredCursor, InvalidCursor, article_tombstones, \
+    collect_changes, comment_tombstones
+from pseudo_twitter.sharding import shard_queryset
+
+SYNC_PARAMETERS = [
+    OpenApiParameter("since", type=str, required=False, description="next_cursor of the previous response"),
+    OpenApiParameter("limit", type=int, required=False),
+]
+
+
+def get_limit(request) -> int | None:
+    limit = request.query_params.get("limit", DEFAULT_LIMIT)
+    try:
+        limit = int(limit)
+    except (TypeError, ValueError):
+        return None
+    if limit < 1:
+        return None
+    return min(limit, MAX_LIMIT)
+
+
+def changes_response(request, rows, tombstones, serializer_class) -> Response:
+    limit = get_limit(request)
+    if limit is None:
+        response = {"errors": "The limit of changes is invalid."}
+        return Response(response, status=status.HTTP_400_BAD_REQUEST)
+
+    def serialize(changed_rows):
+        return serializer_class(changed_rows, many=True).data
+
+    try:
+        data = collect_changes(rows, tombstones, request.query_params.get("since"), limit, serialize)
+    except InvalidCursor:
+        response = {"errors": "The cursor is invalid."}
+        return Response(response, status=status.HTTP_400_BAD_REQUEST)
+    except ExpiredCursor:
+        response = {"errors": "The cursor is too old, a full sync is required."}
+        return Response(response, status=status.HTTP_410_GONE)
+    return Response(data, status=status.HTTP_200_OK)
+
+
+class ArticleChangesView(APIView):
+    permission_classes = [permissions.IsAuthenticatedOrReadOnly]
+
+    @extend_schema(
+        tags=["Sync"],
+        summary="Get articles created, updated or deleted after the cursor",
+        parameters=SYNC_PARAMETERS,
+        responses={
+            status.HTTP_200_OK: SCHEMA_SYNC_CHANGES,
+            **STATUS_410,
+            **SCHEMA_RETRIEVE_UPDATE_DESTROY_STATUSES
+        }
+    )
+    def get(self, request, *args, **kwargs):
+        rows = shard_queryset(with_authors(Article.objects.all(), "author"))
+        return changes_response(request, rows, article_tombstones(), ArticleSerializer)
+
+
+class CommentChangesView(APIView):
+    permission_classes = [permissions.IsAuthenticatedOrReadOnly]
+
+    @extend_schema(
+        tags=["Sync"],
+        summary="Get comments of the article created, updated or deleted after the cursor",
+        parameters=SYNC_PARAMETERS,
+        responses={
+            status.HTTP_200_OK: SCHEMA_SYNC_CHANGES,
+            **STATUS_410,
+            **SCHEMA_RETRIEVE_UPDATE_DESTROY_STATUSES
+        }
+    )
+    def get(self, request, *args, **kwargs):
+        article_id = kwargs.get("article_id")
+        article = get_object_or_404(Article, pk=article_id)
+
+        rows = with_authors(Comment.objects.visible(), "author").filter(article=article)
+        return changes_response(request, rows, comment_tombstones(article.pk), CommentChangeSerializer)
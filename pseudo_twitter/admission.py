@@ -0,0 +1,192 @@
+import threading
+import time
+
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.http import JsonResponse
+from django.urls import Resolver404, resolve
+from drf_spectacular.types import OpenApiTypes
+from drf_spectacular.utils import extend_schema
+from rest_framework import permissions, status
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+WRITE_METHODS = frozenset(("POST", "PUT", "PATCH", "DELETE"))
+
+DEFAULT_MAX_CONCURRENCY = 4
+DEFAULT_MAX_QUEUE = 16
+DEFAULT_MAX_WAIT = 2.0
+DEFAULT_RETRY_AFTER = 1
+
+REJECT_QUEUE_FULL = "queue_full"
+REJECT_TIMEOUT = "timeout"
+
+
+class RouteLimiter:
+    """
+    Concurrency limit with a bounded wait queue for one route.
+    Limits are per worker process.
+    """
+
+    def __init__(self, route_name, max_concurrency, max_queue, max_wait, retry_after):
+        self.route_name = route_name
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.max_wait = max_wait
+        self.retry_after = retry_after
+
+        self._condition = threading.Condition()
+        self.active = 0
+        self.waiting = 0
+        self.admitted = 0
+        self.queued = 0
+        self.shed_queue_full = 0
+        self.shed_timeout = 0
+
+    def acquire(self) -> str | None:
+        """
+        Wait for a free slot
+        :return: reason of rejection or None if the request is admitted
+        """
+        with self._condition:
+            if self.active < self.max_concurrency and not self.waiting:
+                self.active += 1
+                self.admitted += 1
+                return None
+
+            if self.waiting >= self.max_queue:
+                self.shed_queue_full += 1
+                return REJECT_QUEUE_FULL
+
+            self.waiting += 1
+            self.queued += 1
+            deadline = time.monotonic() + self.max_wait
+            try:
+                while self.active >= self.max_concurrency:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self.shed_timeout += 1
+                        return REJECT_TIMEOUT
+                    self._condition.wait(remaining)
+            finally:
+                self.waiting -= 1
+
+            self.active += 1
+            self.admitted += 1
+            return None
+
+    def release(self):
+        with self._condition:
+            self.active -= 1
+            self._condition.notify()
+
+    def stats(self) -> dict:
+        with self._condition:
+            return {
+                "max_concurrency": self.max_concurrency,
+                "max_queue": self.max_queue,
+                "max_wait": self.max_wait,
+                "active": self.active,
+                "waiting": self.waiting,
+                "admitted": self.admitted,
+                "queued": self.queued,
+                "shed_queue_full": self.shed_queue_full,
+                "shed_timeout": self.shed_timeout,
+            }
+
+
+class LimiterRegistry:
+    def __init__(self):
+        self.limiters = {}
+        for route_name, options in getattr(settings, "ADMISSION_CONTROL", {}).items():
+            self.limiters[route_name] = RouteLimiter(
+                route_name,
+                max_concurrency=options.get("MAX_CONCURRENCY", DEFAULT_MAX_CONCURRENCY),
+                max_queue=options.get("MAX_QUEUE", DEFAULT_MAX_QUEUE),
+                max_wait=options.get("MAX_WAIT", DEFAULT_MAX_WAIT),
+                retry_after=options.get("RETRY_AFTER", DEFAULT_RETRY_AFTER),
+            )
+
+    def for_path(self, path: str) -> RouteLimiter | None:
+        if not self.limiters:
+            return None
+        try:
+            match = resolve(path)
+        except Resolver404:
+            return None
+        return self.limiters.get(match.url_name)
+
+    def stats(self) -> dict:
+        return {name: limiter.stats() for name, limiter in self.limiters.items()}
+
+
+registry = None
+
+
+def get_registry() -> LimiterRegistry:
+    global registry
+    if registry is None:
+        registry = LimiterRegistry()
+    return registry
+
+
+def rejection_response(limiter: RouteLimiter, reason: str) -> JsonResponse:
+    if reason == REJECT_QUEUE_FULL:
+        response = JsonResponse(
+            {"detail": "Too many concurrent write requests, try again later."},
+            status=status.HTTP_429_TOO_MANY_REQUESTS
+        )
+    else:
+        response = JsonResponse(
+            {"detail": "The service is overloaded, try again later."},
+            status=status.HTTP_503_SERVICE_UNAVAILABLE
+        )
+    response["Retry-After"] = str(limiter.retry_after)
+    return response
+
+
+class AdmissionControlMiddleware:
+    """
+    Limit concurrent write requests per route (ADMISSION_CONTROL setting) so that writes
+    queued behind the database write lock do not block every worker.
+    Requests over the queue size are answered with 429, requests waiting longer than
+    MAX_WAIT with 503; both carry Retry-After.
+    Sync only and skipped under ASGI: there Django runs the sync middleware chain on one thread,
+    so a request waiting for a slot would stall the requests holding the slots.
+    """
+    sync_capable = True
+    async_capable = False
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.registry = get_registry()
+
+    def __call__(self, request):
+        if request.method not in WRITE_METHODS or isinstance(request, ASGIRequest):
+            return self.get_response(request)
+
+        limiter = self.registry.for_path(request.path_info)
+        if limiter is None:
+            return self.get_response(request)
+
+        reason = limiter.acquire()
+        if reason:
+            return rejection_response(limiter, reason)
+        try:
+            return self.get_response(request)
+        finally:
+            limiter.release()
+
+
+class AdmissionStatsView(APIView):
+    permission_classes = [permissions.IsAdminUser]
+
+    @extend_schema(
+        tags=["Monitoring"],
+        summary="Get admission control counters",
+        responses={
+            status.HTTP_200_OK: OpenApiTypes.OBJECT,
+        }
+    )
+    def get(self, request, *args, **kwargs):
+        return Response(get_registry().stats())
@@ -2,6 +2,8 @@
 ASGI config for pseudo_twitter project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
+Server-Sent Events streams of articles are served here directly, everything else
+goes to Django.
 
 For more information on this file, see
 https://docs.djangoproject.com/en/5.1/howto/deployment/asgi/
@@ -13,4 +15,12 @@ from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'pseudo_twitter.settings')
 
-application = get_asgi_application()
+django_application = get_asgi_application()
+
+from feed.sse import SSE_PATH, sse_application  # noqa: E402  Django must be set up first
+
+
+async def application(scope, receive, send):
+    if scope["type"] == "http" and SSE_PATH.match(scope["path"]):
+        return await sse_application(scope, receive, send)
+    return await django_application(scope, receive, send)
@@ -0,0 +1,139 @@
+import threading
+import time
+import uuid
+
+from django.conf import settings
+from django.core.cache import caches
+
+DEFAULT_CACHE_ALIAS = "default"
+DEFAULT_TIMEOUT = 60
+DEFAULT_STALE_GRACE = 10
+DEFAULT_LOCK_TIMEOUT = 5
+LOCK_POLL_INTERVAL = 0.05
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """
+    Concurrent calls with the same key inside the process wait for the first one and share its result
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+
+    def in_flight(self, key: str) -> bool:
+        with self._lock:
+            return key in self._calls
+
+    def do(self, key: str, function):
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = function()
+        except BaseException as error:
+            call.error = error
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+        return call.result
+
+
+class CoalescingCache:
+    """
+    Cache of computed values with request coalescing:
+    - identical misses in a process wait for one computation (SingleFlight),
+    - across processes a short lock in the shared cache lets one process compute while the others
+      poll for its result,
+    - an entry that expired or whose version changed is still served for `grace` seconds
+      while one request recomputes it (stale-while-revalidate).
+    Versions are timestamps (ns) of the last change of the underlying data.
+    """
+
+    def __init__(self, prefix: str):
+        self.prefix = prefix
+        self.alias = getattr(settings, "RESPONSE_CACHE_ALIAS", DEFAULT_CACHE_ALIAS)
+        self.timeout = getattr(settings, "RESPONSE_CACHE_TIMEOUT", DEFAULT_TIMEOUT)
+        self.grace = getattr(settings, "RESPONSE_CACHE_STALE_GRACE", DEFAULT_STALE_GRACE)
+        self.lock_timeout = getattr(settings, "RESPONSE_CACHE_LOCK_TIMEOUT", DEFAULT_LOCK_TIMEOUT)
+        self.flights = SingleFlight()
+
+    @property
+    def cache(self):
+        return caches[self.alias]
+
+    def is_fresh(self, entry: dict | None, version, now: float) -> bool:
+        return entry is not None and entry["version"] == version and now < entry["created"] + self.timeout
+
+    def is_usable_stale(self, entry: dict | None, version, now: float) -> bool:
+        if entry is None:
+            return False
+        stale_since = entry["created"] + self.timeout
+        if entry["version"] != version:
+            # The version is the time of the change that made the entry stale
+            stale_since = min(stale_since, version / 1e9 if version else 0)
+        return now < stale_since + self.grace
+
+    def get_or_compute(self, key: str, version, compute) -> dict:
+        """
+        :param key: key of the value
+        :param version: current version of the data behind the value
+        :param compute: callable building the value
+        :return: cache entry {"id", "version", "created", "value"}
+        """
+        key = f"{self.prefix}:{key}"
+        entry = self.cache.get(key)
+        now = time.time()
+        if self.is_fresh(entry, version, now):
+            return entry
+
+        stale = entry if self.is_usable_stale(entry, version, now) else None
+        if stale is not None and self.flights.in_flight(key):
+            return stale
+        return self.flights.do(key, lambda: self._refresh(key, version, compute, stale))
+
+    def _refresh(self, key: str, version, compute, stale: dict | None) -> dict:
+        lock_key = f"{key}:lock"
+        locked = self.cache.add(lock_key, 1, self.lock_timeout)
+        if not locked:
+            # Another process is computing the value
+            if stale is not None:
+                return stale
+            entry = self._wait_for_entry(key, version)
+            if entry is not None:
+                return entry
+
+        try:
+            entry = {"id": uuid.uuid4().hex, "version": version, "created": time.time(), "value": compute()}
+            self.cache.set(key, entry, self.timeout + self.grace)
+        finally:
+            if locked:
+                self.cache.delete(lock_key)
+        return entry
+
+    def _wait_for_entry(self, key: str, version) -> dict | None:
+        deadline = time.monotonic() + self.lock_timeout
+        while time.monotonic() < deadline:
+            time.sleep(LOCK_POLL_INTERVAL)
+            entry = self.cache.get(key)
+            if self.is_fresh(entry, version, time.time()):
+                return entry
+        return None
@@ -0,0 +1,179 @@
+import gzip
+import zlib
+
+from django.conf import settings
+from django.core.cache import caches
+from django.utils.cache import patch_vary_headers
+
+from pseudo_twitter.metrics import record_cache
+
+try:
+    from compression import zstd as _zstd  # Python 3.14+
+except ImportError:
+    try:
+        import zstandard as _zstd
+    except ImportError:
+        _zstd = None
+
+DEFAULT_MIN_SIZE = 1024
+DEFAULT_CACHE_TIMEOUT = 300
+DEFAULT_CACHE_MAX_SIZE = 4 * 1024 * 1024
+
+COMPRESSIBLE_CONTENT_TYPES = (
+    "application/json",
+    "application/javascript",
+    "application/xml",
+    "application/vnd.oai.openapi",
+    "text/",
+)
+
+
+def _compress_zstd(data: bytes) -> bytes:
+    # One complete frame: a compressor object without a flush would leave the frame open
+    return _zstd.compress(data, level=3)
+
+
+def _compress_gzip(data: bytes) -> bytes:
+    # mtime=0 keeps the output deterministic, so equal bodies give equal bytes
+    return gzip.compress(data, compresslevel=6, mtime=0)
+
+
+def _compress_deflate(data: bytes) -> bytes:
+    return zlib.compress(data, 6)
+
+
+# Server preference order: the first supported coding accepted by the client wins
+COMPRESSORS = {}
+if _zstd is not None:
+    COMPRESSORS["zstd"] = _compress_zstd
+COMPRESSORS["gzip"] = _compress_gzip
+COMPRESSORS["deflate"] = _compress_deflate
+
+
+def parse_accept_encoding(header: str) -> dict[str, float]:
+    """
+    Parse Accept-Encoding header
+    :param header: raw header value
+    :return: dict {coding: q-value}
+    """
+    codings = {}
+    for item in header.split(","):
+        coding, _, params = item.strip().partition(";")
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        quality = 1.0
+        for param in params.split(";"):
+            name, _, value = param.strip().partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        codings[coding] = quality
+    return codings
+
+
+def negotiate_encoding(header: str) -> str | None:
+    """
+    Choose content coding for the response
+    :param header: raw Accept-Encoding header value
+    :return: name of the coding or None if the body must stay uncompressed
+    """
+    if not header:
+        return None
+    codings = parse_accept_encoding(header)
+    wildcard = codings.get("*", 0.0)
+
+    best_coding, best_quality = None, 0.0
+    for coding in COMPRESSORS:
+        quality = codings.get(coding, wildcard)
+        if quality > best_quality:
+            best_coding, best_quality = coding, quality
+    return best_coding
+
+
+def is_compressible(response) -> bool:
+    if response.streaming or response.has_header("Content-Encoding"):
+        return False
+    if response.status_code != 200:
+        return False
+    content_type = response.get("Content-Type", "").lower()
+    return content_type.startswith(COMPRESSIBLE_CONTENT_TYPES)
+
+
+class CompressedBodyCache:
+    """
+    Compressed bodies of the response cache (feed.response_cache) stored next to the digest of their entry,
+    so hot responses are compressed once instead of on every request
+    """
+
+    def __init__(self):
+        self.alias = getattr(settings, "COMPRESSION_CACHE_ALIAS", "default")
+        self.timeout = getattr(settings, "COMPRESSION_CACHE_TIMEOUT", DEFAULT_CACHE_TIMEOUT)
+        self.max_size = getattr(settings, "COMPRESSION_CACHE_MAX_SIZE", DEFAULT_CACHE_MAX_SIZE)
+
+    @staticmethod
+    def make_key(coding: str, digest: str) -> str:
+        return f"compressed:{coding}:{digest}"
+
+    def compress(self, coding: str, body: bytes, digest: str | None = None) -> bytes:
+        """
+        Compress body, reusing the cached result when the same body was compressed before
+        :param coding: content coding
+        :param body: plain response body
+        :param digest: digest of a body from the response cache, other bodies are compressed without caching
+        :return: compressed body
+        """
+        if digest is None or self.alias is None or len(body) > self.max_size:
+            return COMPRESSORS[coding](body)
+
+        cache = caches[self.alias]
+        key = self.make_key(coding, digest)
+
+        compressed = cache.get(key)
+        record_cache("compression", compressed is not None)
+        if compressed is None:
+            compressed = COMPRESSORS[coding](body)
+            cache.set(key, compressed, self.timeout)
+        return compressed
+
+
+class CompressionMiddleware:
+    """
+    Compress responses with the best coding accepted by the client (zstd, gzip or deflate)
+    when the body is larger than COMPRESSION_MIN_SIZE
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.min_size = getattr(settings, "COMPRESSION_MIN_SIZE", DEFAULT_MIN_SIZE)
+        self.body_cache = CompressedBodyCache()
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        if not is_compressible(response):
+            return response
+
+        patch_vary_headers(response, ("Accept-Encoding",))
+        if len(response.content) < self.min_size:
+            return response
+
+        coding = negotiate_encoding(request.META.get("HTTP_ACCEPT_ENCODING", ""))
+        if coding is None:
+            return response
+
+        digest = getattr(response, "body_digest", None)
+        compressed = self.body_cache.compress(coding, response.content, digest)
+        if len(compressed) >= len(response.content):
+            return response
+
+        response.content = compressed
+        response["Content-Length"] = str(len(compressed))
+        response["Content-Encoding"] = coding
+
+        # The representation changed, so a strong validator is no longer valid
+        etag = response.get("ETag")
+        if etag and etag.startswith('"'):
+            response["ETag"] = "W/" + etag
+        return response
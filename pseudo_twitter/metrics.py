@@ -0,0 +1,346 @@
+import atexit
+import contextvars
+import glob
+import json
+import os
+import re
+import tempfile
+import threading
+import time
+from collections import defaultdict
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.db import connections
+from rest_framework.renderers import JSONRenderer
+
+DEFAULT_PATH_PREFIX = "/feed/"
+DEFAULT_FLUSH_INTERVAL = 1.0
+
+DURATION_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200, 500)
+
+# name: (type, help, histogram buckets)
+METRICS = {
+    "feed_http_requests_total": ("counter", "Requests by route, method and status code", None),
+    "feed_http_request_duration_seconds": ("histogram", "Total time of the request", DURATION_BUCKETS),
+    "feed_db_duration_seconds": ("histogram", "Time spent in database queries per request", DURATION_BUCKETS),
+    "feed_serialize_duration_seconds": (
+        "histogram", "Time spent in serializers per request, queries issued by serializers included",
+        DURATION_BUCKETS
+    ),
+    "feed_render_duration_seconds": ("histogram", "Time spent rendering JSON per request", DURATION_BUCKETS),
+    "feed_db_queries_per_request": ("histogram", "Database queries per request", QUERY_COUNT_BUCKETS),
+    "feed_cache_requests_total": ("counter", "Cache lookups by cache and result", None),
+}
+
+_timings = contextvars.ContextVar("request_timings", default=None)
+_serializer_depth = contextvars.ContextVar("serializer_depth", default=0)
+
+
+class RequestTimings:
+    def __init__(self):
+        self.db = 0.0
+        self.queries = 0
+        self.serialize = 0.0
+        self.render = 0.0
+
+    def db_wrapper(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.db += time.perf_counter() - started
+            self.queries += 1
+
+
+class MetricsRegistry:
+    """
+    Counters and histograms of this process.
+    Labels are stored as a tuple of (name, value) pairs sorted by name.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.counters = defaultdict(float)
+        self.histograms = {}
+
+    @staticmethod
+    def make_labels(labels: dict) -> tuple:
+        return tuple(sorted((key, str(value)) for key, value in labels.items()))
+
+    def inc(self, name: str, labels: dict, value: float = 1):
+        key = (name, self.make_labels(labels))
+        with self._lock:
+            self.counters[key] += value
+
+    def observe(self, name: str, labels: dict, value: float):
+        buckets = METRICS[name][2]
+        key = (name, self.make_labels(labels))
+        with self._lock:
+            histogram = self.histograms.get(key)
+            if histogram is None:
+                histogram = self.histograms[key] = {"buckets": [0] * len(buckets), "sum": 0.0, "count": 0}
+            for index, bound in enumerate(buckets):
+                if value <= bound:
+                    histogram["buckets"][index] += 1
+                    break
+            histogram["sum"] += value
+            histogram["count"] += 1
+
+    def dump(self) -> dict:
+        with self._lock:
+            return {
+                "counters": [[name, labels, value] for (name, labels), value in self.counters.items()],
+                "histograms": [
+                    [name, labels, list(histogram["buckets"]), histogram["sum"], histogram["count"]]
+                    for (name, labels), histogram in self.histograms.items()
+                ],
+            }
+
+
+registry = MetricsRegistry()
+
+
+def record_cache(cache: str, hit: bool):
+    registry.inc("feed_cache_requests_total", {"cache": cache, "result": "hit" if hit else "miss"})
+
+
+def get_metrics_dir() -> str | None:
+    return getattr(settings, "METRICS_DIR", None)
+
+
+METRICS_FILE_NAME = re.compile(r"^metrics-(?P<pid>\d+)\.json$")
+
+
+def is_process_alive(pid: int) -> bool:
+    if os.name != "posix":
+        # Signal 0 only probes the process on POSIX systems
+        return True
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+class MetricsFile:
+    """
+    Snapshot of this process' registry in METRICS_DIR, so that any worker can export
+    the metrics of all workers. The file is removed when the process exits; files of
+    processes that died without cleanup are swept when the metrics are read
+    """
+
+    def __init__(self, directory: str, flush_interval: float):
+        self.directory = directory
+        self.flush_interval = flush_interval
+        self._lock = threading.Lock()
+        self._flushed_at = 0.0
+
+    @property
+    def path(self) -> str:
+        return os.path.join(self.directory, f"metrics-{os.getpid()}.json")
+
+    def flush(self, force: bool = False):
+        now = time.monotonic()
+        with self._lock:
+            if not force and now - self._flushed_at < self.flush_interval:
+                return
+            self._flushed_at = now
+
+            os.makedirs(self.directory, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=self.directory, prefix=".metrics-", suffix=".tmp")
+            with os.fdopen(fd, "w") as tmp_file:
+                json.dump(registry.dump(), tmp_file)
+            os.replace(tmp_path, self.path)
+
+    def remove(self):
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
+
+    def read_all(self) -> list[dict]:
+        dumps = []
+        for path in glob.glob(os.path.join(self.directory, "metrics-*.json")):
+            match = METRICS_FILE_NAME.match(os.path.basename(path))
+            if match and not is_process_alive(int(match.group("pid"))):
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+                continue
+            try:
+                with open(path) as metrics_file:
+                    dumps.append(json.load(metrics_file))
+            except (OSError, ValueError):
+                continue
+        return dumps
+
+
+metrics_file = None
+
+
+def get_metrics_file() -> MetricsFile | None:
+    global metrics_file
+    directory = get_metrics_dir()
+    if directory is None:
+        return None
+    if metrics_file is None:
+        metrics_file = MetricsFile(directory, getattr(settings, "METRICS_FLUSH_INTERVAL", DEFAULT_FLUSH_INTERVAL))
+        atexit.register(metrics_file.remove)
+    return metrics_file
+
+
+def merge_dumps(dumps: list[dict]) -> tuple[dict, dict]:
+    """
+    Sum the registry dumps of several processes
+    :param dumps: list of MetricsRegistry.dump() results
+    :return: counters {(name, labels): value} and histograms {(name, labels): (buckets, sum, count)}
+    """
+    counters = defaultdict(float)
+    histograms = {}
+    for dump in dumps:
+        for name, labels, value in dump["counters"]:
+            counters[(name, tuple(map(tuple, labels)))] += value
+        for name, labels, buckets, total, count in dump["histograms"]:
+            key = (name, tuple(map(tuple, labels)))
+            if key in histograms:
+                old_buckets, old_total, old_count = histograms[key]
+                buckets = [old + new for old, new in zip(old_buckets, buckets)]
+                total += old_total
+                count += old_count
+            histograms[key] = (buckets, total, count)
+    return counters, histograms
+
+
+def format_labels(labels, extra: tuple = ()) -> str:
+    pairs = list(labels) + list(extra)
+    if not pairs:
+        return ""
+    escaped = (
+        '{}="{}"'.format(key, value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n"))
+        for key, value in pairs
+    )
+    return "{" + ",".join(escaped) + "}"
+
+
+def format_value(value: float) -> str:
+    return repr(float(value)) if value != int(value) else str(int(value))
+
+
+def render_text(counters: dict, histograms: dict) -> str:
+    """
+    Prometheus text exposition format
+    """
+    lines = []
+    for name, (metric_type, help_text, buckets) in METRICS.items():
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} {metric_type}")
+        if metric_type == "counter":
+            for (metric_name, labels), value in sorted(counters.items()):
+                if metric_name == name:
+                    lines.append(f"{name}{format_labels(labels)} {format_value(value)}")
+            continue
+
+        for (metric_name, labels), (counts, total, count) in sorted(histograms.items()):
+            if metric_name != name:
+                continue
+            cumulative = 0
+            for bound, bucket_count in zip(buckets, counts):
+                cumulative += bucket_count
+                lines.append(f"{name}_bucket{format_labels(labels, (('le', str(bound)),))} {cumulative}")
+            lines.append(f"{name}_bucket{format_labels(labels, (('le', '+Inf'),))} {count}")
+            lines.append(f"{name}_sum{format_labels(labels)} {format_value(total)}")
+            lines.append(f"{name}_count{format_labels(labels)} {count}")
+    return "\n".join(lines) + "\n"
+
+
+class TimedSerializerMixin:
+    """
+    Add serializer time to the current request timings.
+    Only the outermost serializer is timed, nested serializers are already inside its time.
+    """
+
+    def to_representation(self, instance):
+        timings = _timings.get()
+        depth = _serializer_depth.get()
+        if timings is None or depth:
+            return super().to_representation(instance)
+
+        token = _serializer_depth.set(depth + 1)
+        started = time.perf_counter()
+        try:
+            return super().to_representation(instance)
+        finally:
+            timings.serialize += time.perf_counter() - started
+            _serializer_depth.reset(token)
+
+
+class TimedJSONRenderer(JSONRenderer):
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        timings = _timings.get()
+        if timings is None:
+            return super().render(data, accepted_media_type, renderer_context)
+
+        started = time.perf_counter()
+        try:
+            return super().render(data, accepted_media_type, renderer_context)
+        finally:
+            timings.render += time.perf_counter() - started
+
+
+class MetricsMiddleware:
+    """
+    Measure database, serialization and render time of requests under METRICS_PATH_PREFIX,
+    send them in the Server-Timing header and aggregate them into the metrics registry
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.path_prefix = getattr(settings, "METRICS_PATH_PREFIX", DEFAULT_PATH_PREFIX)
+
+    def __call__(self, request):
+        if not request.path_info.startswith(self.path_prefix):
+            return self.get_response(request)
+
+        timings = RequestTimings()
+        token = _timings.set(timings)
+        started = time.perf_counter()
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(connection.execute_wrapper(timings.db_wrapper))
+                response = self.get_response(request)
+        finally:
+            _timings.reset(token)
+        duration = time.perf_counter() - started
+
+        response["Server-Timing"] = ", ".join((
+            f"db;dur={timings.db * 1000:.2f}",
+            f"serialize;dur={timings.serialize * 1000:.2f}",
+            f"render;dur={timings.render * 1000:.2f}",
+            f"total;dur={duration * 1000:.2f}",
+        ))
+        self.record(request, response, timings, duration)
+        return response
+
+    @staticmethod
+    def record(request, response, timings: RequestTimings, duration: float):
+        match = getattr(request, "resolver_match", None)
+        route = match.route if match is not None else "unmatched"
+        labels = {"method": request.method, "route": route}
+
+        registry.inc("feed_http_requests_total", {**labels, "status": response.status_code})
+        registry.observe("feed_http_request_duration_seconds", labels, duration)
+        registry.observe("feed_db_duration_seconds", labels, timings.db)
+        registry.observe("feed_serialize_duration_seconds", labels, timings.serialize)
+        registry.observe("feed_render_duration_seconds", labels, timings.render)
+        registry.observe("feed_db_queries_per_request", labels, timings.queries)
+
+        target = get_metrics_file()
+        if target is not None:
+            target.flush()
+
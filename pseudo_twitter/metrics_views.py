@@ -0,0 +1,30 @@
+from django.http import HttpResponse
+from drf_spectacular.types import OpenApiTypes
+from drf_spectacular.utils import extend_schema
+from rest_framework import permissions, status
+from rest_framework.views import APIView
+
+from pseudo_twitter.metrics import get_metrics_file, merge_dumps, registry, render_text
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+class MetricsView(APIView):
+    permission_classes = [permissions.IsAdminUser]
+
+    @extend_schema(
+        tags=["Monitoring"],
+        summary="Export metrics in Prometheus text format",
+        description="With METRICS_DIR set the metrics of all worker processes are summed",
+        responses={
+            (status.HTTP_200_OK, "text/plain"): OpenApiTypes.STR,
+        }
+    )
+    def get(self, request, *args, **kwargs):
+        target = get_metrics_file()
+        if target is None:
+            dumps = [registry.dump()]
+        else:
+            target.flush(force=True)
+            dumps = target.read_all()
+        return HttpResponse(render_text(*merge_dumps(dumps)), content_type=CONTENT_TYPE)
@@ -1,8 +1,24 @@
-from rest_framework.pagination import PageNumberPagination
+import json
+from itertools import islice
+
+from django.conf import settings
+from django.core.paginator import Paginator
+from django.db import connections
+from django.db.models import QuerySet
+from django.http import StreamingHttpResponse
+from django.utils.functional import cached_property
+from rest_framework.pagination import CursorPagination, PageNumberPagination
 from rest_framework.response import Response
+from rest_framework.utils.encoders import JSONEncoder
+
+from pseudo_twitter.sharding import get_current_shard, using_shard
 
 DEFAULT_PAGE = 1
 DEFAULT_PAGE_SIZE = 10
+DEFAULT_MAX_PAGE_SIZE = 100
+DEFAULT_STREAM_CHUNK_SIZE = 500
+DEFAULT_ADMIN_COUNT_LIMIT = 10000
+STREAM_QUERY_PARAM = "stream"
 
 
 class CustomPagination(PageNumberPagination):
@@ -10,6 +26,10 @@ class CustomPagination(PageNumberPagination):
     page_size = DEFAULT_PAGE_SIZE
     page_size_query_param = 'page_size'
 
+    @property
+    def max_page_size(self) -> int:
+        return getattr(settings, "PAGINATION_MAX_PAGE_SIZE", DEFAULT_MAX_PAGE_SIZE)
+
     def get_paginated_response(self, data):
         return Response({
             'links': {
@@ -18,6 +38,97 @@ class CustomPagination(PageNumberPagination):
             },
             'total': self.page.paginator.count,
             'page': int(self.request.GET.get('page', DEFAULT_PAGE)),
-            'page_size': int(self.request.GET.get('page_size', self.page_size)),
+            # Requested sizes above max_page_size are capped
+            'page_size': self.get_page_size(self.request),
             'results': data
         })
+
+
+class TrendingPagination(CursorPagination):
+    page_size = DEFAULT_PAGE_SIZE
+    page_size_query_param = 'page_size'
+    ordering = ('-score', 'article_id')
+
+
+def is_stream_requested(request) -> bool:
+    return request.query_params.get(STREAM_QUERY_PARAM, "").lower() in ("1", "true")
+
+
+class StreamingListMixin:
+    """
+    List view which streams all rows as one JSON array with ?stream=true instead of a page.
+    Rows are read from a chunked iterator and serialized STREAM_CHUNK_SIZE at a time,
+    so memory does not grow with the number of rows
+    """
+
+    def list(self, request, *args, **kwargs):
+        if is_stream_requested(request):
+            return self.get_streaming_response(self.filter_queryset(self.get_queryset()))
+        return super().list(request, *args, **kwargs)
+
+    def get_chunk_context(self, rows: list) -> dict:
+        """
+        :param rows: rows of a streamed chunk or of a page
+        :return: serializer context of the rows
+        """
+        return self.get_serializer_context()
+
+    def get_streaming_response(self, queryset) -> StreamingHttpResponse:
+        chunk_size = getattr(settings, "STREAM_CHUNK_SIZE", DEFAULT_STREAM_CHUNK_SIZE)
+        # The body is generated after the view returns, when its shard is no longer current
+        shard = get_current_shard()
+        if isinstance(queryset, QuerySet):
+            queryset = queryset.using(queryset.db)
+        rows = queryset.iterator(chunk_size=chunk_size)
+
+        def serialize_chunk() -> bytes | None:
+            with using_shard(shard):
+                chunk = list(islice(rows, chunk_size))
+                if not chunk:
+                    return None
+                serializer = self.get_serializer(chunk, many=True, context=self.get_chunk_context(chunk))
+                data = json.dumps(serializer.data, cls=JSONEncoder, ensure_ascii=False, separators=(",", ":"))
+            # Items of the chunk without the brackets of its array
+            return data[1:-1].encode()
+
+        def generate():
+            yield b"["
+            separator = b""
+            while (data := serialize_chunk()) is not None:
+                yield separator + data
+                separator = b","
+            yield b"]"
+
+        return StreamingHttpResponse(generate(), content_type="application/json")
+
+
+def estimate_count(queryset) -> int | None:
+    """
+    Number of rows of the queryset estimated by the query planner, without reading them
+    :return: estimate or None if the database does not provide one
+    """
+    connection = connections[queryset.db]
+    if connection.vendor != "postgresql":
+        return None
+    sql, params = queryset.query.sql_with_params()
+    with connection.cursor() as cursor:
+        cursor.execute(f"EXPLAIN (FORMAT JSON) {sql}", params)
+        plan = cursor.fetchone()[0]
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]["Plan"]["Plan Rows"])
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    Paginator of admin changelists: counts at most ADMIN_COUNT_LIMIT + 1 rows, larger results get
+    the planner estimate where the database has one and the capped count otherwise
+    """
+
+    @cached_property
+    def count(self) -> int:
+        limit = getattr(settings, "ADMIN_COUNT_LIMIT", DEFAULT_ADMIN_COUNT_LIMIT)
+        counted = self.object_list[:limit + 1].count()
+        if counted <= limit:
+            return counted
+        return max(estimate_count(self.object_list) or 0, counted)
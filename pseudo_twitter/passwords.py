@@ -0,0 +1,66 @@
+import atexit
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+
+DEFAULT_WORKERS = None
+DEFAULT_CHUNK_SIZE = 16
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def _make_pool(workers: int | None) -> ProcessPoolExecutor:
+    # Workers are spawned rather than forked: request and job threads of this process may hold locks
+    return ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+
+
+def _shutdown_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(cancel_futures=True)
+            _pool = None
+
+
+atexit.register(_shutdown_pool)
+
+
+def get_password_hashing_pool() -> ProcessPoolExecutor:
+    """
+    Process pool of this process hashing passwords, created on first use and shut down at exit.
+    The hashers are CPU-bound and hold the GIL, so the pool runs PASSWORD_HASHING_WORKERS processes
+    (one per CPU by default) shared by all callers
+    """
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = _make_pool(getattr(settings, "PASSWORD_HASHING_WORKERS", DEFAULT_WORKERS))
+        return _pool
+
+
+@contextmanager
+def password_hashing_pool(workers: int | None = None):
+    """
+    Process pool hashing passwords in parallel
+    :param workers: number of processes of a pool made for the caller only,
+                    the shared pool of get_password_hashing_pool by default
+    """
+    if workers is None:
+        yield get_password_hashing_pool()
+        return
+    with _make_pool(workers) as pool:
+        yield pool
+
+
+def hash_passwords(pool: ProcessPoolExecutor, passwords: list[str]) -> list[str]:
+    """
+    :param pool: pool of password_hashing_pool
+    :param passwords: raw passwords
+    :return: encoded passwords in the order of the raw ones
+    """
+    return list(pool.map(make_password, passwords, chunksize=DEFAULT_CHUNK_SIZE))
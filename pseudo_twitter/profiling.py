@@ -0,0 +1,225 @@
+import random
+import sys
+import threading
+import time
+from collections import Counter, defaultdict
+
+from django.conf import settings
+from django.http import HttpResponse
+from django.urls import Resolver404, resolve
+from drf_spectacular.types import OpenApiTypes
+from drf_spectacular.utils import extend_schema, OpenApiParameter
+from rest_framework import permissions, status
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+DEFAULT_SAMPLE_RATE = 0.01
+DEFAULT_INTERVAL = 0.005
+DEFAULT_PATH_PREFIX = "/feed/"
+DEFAULT_MAX_STACK_DEPTH = 64
+DEFAULT_TOP_LIMIT = 30
+
+
+def frame_name(frame) -> str:
+    code = frame.f_code
+    return f"{code.co_filename}:{code.co_name}:{code.co_firstlineno}"
+
+
+def collapse_stack(frame, max_depth: int) -> tuple[str, ...]:
+    """
+    Stack of the frame from the outermost call, in the collapsed (flamegraph) order
+    """
+    names = []
+    while frame is not None and len(names) < max_depth:
+        names.append(frame_name(frame))
+        frame = frame.f_back
+    names.reverse()
+    return tuple(names)
+
+
+class StackProfiler:
+    """
+    Stack sampler: a background thread takes stacks of the threads serving sampled requests
+    every interval seconds and aggregates them per route in memory.
+    The thread is parked while no sampled request is running
+    """
+
+    def __init__(self, interval: float, max_depth: int):
+        self.interval = interval
+        self.max_depth = max_depth
+        self._lock = threading.Lock()
+        self._active = threading.Event()
+        self._threads = {}
+        self._stacks = defaultdict(Counter)
+        self._requests = Counter()
+        self._sampler = None
+
+    def start_request(self, route: str):
+        thread_id = threading.get_ident()
+        with self._lock:
+            self._threads[thread_id] = route
+            self._requests[route] += 1
+            self._active.set()
+            if self._sampler is None or not self._sampler.is_alive():
+                self._sampler = threading.Thread(target=self._run, name="stack-profiler", daemon=True)
+                self._sampler.start()
+
+    def stop_request(self):
+        with self._lock:
+            self._threads.pop(threading.get_ident(), None)
+            if not self._threads:
+                self._active.clear()
+
+    def _run(self):
+        while True:
+            self._active.wait()
+            time.sleep(self.interval)
+            with self._lock:
+                threads = dict(self._threads)
+            if not threads:
+                continue
+
+            frames = sys._current_frames()
+            samples = []
+            for thread_id, route in threads.items():
+                frame = frames.get(thread_id)
+                if frame is not None:
+                    samples.append((route, collapse_stack(frame, self.max_depth)))
+            del frames
+
+            with self._lock:
+                for route, stack in samples:
+                    self._stacks[route][stack] += 1
+
+    def routes(self) -> dict[str, dict]:
+        with self._lock:
+            return {
+                route: {"requests": requests, "samples": sum(self._stacks.get(route, {}).values())}
+                for route, requests in self._requests.items()
+            }
+
+    def stacks(self, route: str | None = None) -> Counter:
+        with self._lock:
+            if route is not None:
+                return Counter(self._stacks.get(route, {}))
+            merged = Counter()
+            for stacks in self._stacks.values():
+                merged.update(stacks)
+            return merged
+
+    def reset(self):
+        with self._lock:
+            self._stacks.clear()
+            self._requests.clear()
+
+
+def format_collapsed(stacks: Counter) -> str:
+    """
+    Stacks in the collapsed format of flamegraph.pl / speedscope: "frame;frame;frame count"
+    """
+    lines = [f"{';'.join(stack)} {count}" for stack, count in stacks.most_common()]
+    return "\n".join(lines) + "\n"
+
+
+def top_functions(stacks: Counter, limit: int) -> list[dict]:
+    """
+    Functions by cumulative samples (function anywhere in the stack) with their own samples (on top of the stack)
+    """
+    total = sum(stacks.values()) or 1
+    cumulative = Counter()
+    own = Counter()
+    for stack, count in stacks.items():
+        for name in set(stack):
+            cumulative[name] += count
+        if stack:
+            own[stack[-1]] += count
+
+    return [
+        {
+            "function": name,
+            "cumulative_samples": count,
+            "cumulative_percent": round(100 * count / total, 2),
+            "own_samples": own[name],
+            "own_percent": round(100 * own[name] / total, 2),
+        }
+        for name, count in cumulative.most_common(limit)
+    ]
+
+
+profiler = StackProfiler(
+    interval=getattr(settings, "PROFILING_INTERVAL", DEFAULT_INTERVAL),
+    max_depth=getattr(settings, "PROFILING_MAX_STACK_DEPTH", DEFAULT_MAX_STACK_DEPTH),
+)
+
+
+class SamplingProfilerMiddleware:
+    """
+    Profile a PROFILING_SAMPLE_RATE fraction of requests under PROFILING_PATH_PREFIX.
+    Off unless PROFILING_ENABLED is set.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.enabled = getattr(settings, "PROFILING_ENABLED", False)
+        self.sample_rate = getattr(settings, "PROFILING_SAMPLE_RATE", DEFAULT_SAMPLE_RATE)
+        self.path_prefix = getattr(settings, "PROFILING_PATH_PREFIX", DEFAULT_PATH_PREFIX)
+
+    def __call__(self, request):
+        if not self.enabled or not request.path_info.startswith(self.path_prefix):
+            return self.get_response(request)
+        if random.random() >= self.sample_rate:
+            return self.get_response(request)
+
+        try:
+            route = resolve(request.path_info).route
+        except Resolver404:
+            return self.get_response(request)
+
+        profiler.start_request(f"{request.method} {route}")
+        try:
+            return self.get_response(request)
+        finally:
+            profiler.stop_request()
+
+
+class ProfilingStacksView(APIView):
+    permission_classes = [permissions.IsAdminUser]
+
+    @extend_schema(
+        tags=["Monitoring"],
+        summary="Export sampled stacks",
+        description="output=routes lists profiled routes, output=collapsed returns stacks for flamegraph tools, "
+                    "output=top returns functions by cumulative samples",
+        parameters=[
+            OpenApiParameter("output", type=str, required=False, enum=["routes", "collapsed", "top"]),
+            OpenApiParameter("route", type=str, required=False),
+            OpenApiParameter("limit", type=int, required=False),
+        ],
+        responses={
+            status.HTTP_200_OK: OpenApiTypes.OBJECT,
+        }
+    )
+    def get(self, request, *args, **kwargs):
+        output_format = request.query_params.get("output", "routes")
+        route = request.query_params.get("route")
+
+        if output_format == "collapsed":
+            return HttpResponse(format_collapsed(profiler.stacks(route)), content_type="text/plain; charset=utf-8")
+        if output_format == "top":
+            try:
+                limit = int(request.query_params.get("limit", DEFAULT_TOP_LIMIT))
+            except ValueError:
+                limit = DEFAULT_TOP_LIMIT
+            return Response(top_functions(profiler.stacks(route), limit))
+        return Response(profiler.routes())
+
+    @extend_schema(
+        tags=["Monitoring"],
+        summary="Reset sampled stacks",
+        responses={
+            status.HTTP_204_NO_CONTENT: None,
+        }
+    )
+    def delete(self, request, *args, **kwargs):
+        profiler.reset()
+        return Response(status=status.HTTP_204_NO_CONTENT)
@@ -0,0 +1,87 @@
+import hashlib
+import threading
+from functools import cache
+from pathlib import Path
+
+from django.conf import settings
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.views import View
+
+DEFAULT_MAX_AGE = 60 * 60
+
+CONTENT_TYPE = "application/vnd.oai.openapi; charset=utf-8"
+
+
+def generate_schema() -> bytes:
+    """
+    Build the OpenAPI document by introspecting the views, as the spectacular command does.
+    The generator and the renderers are imported here and the Swagger UI view on its first request
+    (swagger_view), so workers serving a prebuilt schema load neither. AutoSchema itself comes
+    with the views, extend_schema subclasses it when the views are decorated.
+    :return: schema in YAML
+    """
+    from drf_spectacular.renderers import OpenApiYamlRenderer
+    from drf_spectacular.settings import spectacular_settings
+
+    generator = spectacular_settings.DEFAULT_GENERATOR_CLASS()
+    schema = generator.get_schema(request=None, public=True)
+    return OpenApiYamlRenderer().render(schema, renderer_context={})
+
+
+def get_schema_file() -> Path | None:
+    path = getattr(settings, "OPENAPI_SCHEMA_FILE", None)
+    return Path(path) if path else None
+
+
+class SchemaDocument:
+    """
+    Schema read from OPENAPI_SCHEMA_FILE (written by the build_schema command).
+    Without the file the schema is generated on the first request and kept for the life of the process.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.content = None
+        self.etag = None
+
+    def load(self) -> tuple[bytes, str]:
+        if self.content is None:
+            with self._lock:
+                if self.content is None:
+                    path = get_schema_file()
+                    if path is not None and path.is_file():
+                        content = path.read_bytes()
+                    else:
+                        content = generate_schema()
+                    self.etag = '"{}"'.format(hashlib.blake2b(content, digest_size=16).hexdigest())
+                    self.content = content
+        return self.content, self.etag
+
+
+document = SchemaDocument()
+
+
+class StaticSchemaView(View):
+    def get(self, request, *args, **kwargs):
+        content, etag = document.load()
+
+        response = get_conditional_response(request, etag=etag)
+        if response is None:
+            response = HttpResponse(content, content_type=CONTENT_TYPE)
+        response["ETag"] = etag
+        patch_cache_control(response, public=True, max_age=getattr(settings, "OPENAPI_SCHEMA_MAX_AGE", DEFAULT_MAX_AGE))
+        return response
+
+
+@cache
+def get_swagger_view():
+    from drf_spectacular.views import SpectacularSwaggerView
+    return SpectacularSwaggerView.as_view(url_name="schema")
+
+
+def swagger_view(request, *args, **kwargs):
+    """
+    Swagger UI of the schema, drf-spectacular views are imported on the first request
+    """
+    return get_swagger_view()(request, *args, **kwargs)
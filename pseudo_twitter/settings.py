@@ -27,12 +27,17 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'pseudo_twitter.metrics.MetricsMiddleware',
+    'pseudo_twitter.compression.CompressionMiddleware',
+    'pseudo_twitter.admission.AdmissionControlMiddleware',
+    'pseudo_twitter.profiling.SamplingProfilerMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'feed.sharding.ShardMiddleware',
 ]
 
 ROOT_URLCONF = 'pseudo_twitter.urls'
@@ -68,9 +73,115 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        'OPTIONS': {
+            # Write transactions take the lock at BEGIN and wait for it instead of failing on upgrade,
+            # requests and job worker threads write concurrently
+            'transaction_mode': 'IMMEDIATE',
+        },
     }
 }
 
+# Shards of articles with their comments and likes (pseudo_twitter.sharding, feed.sharding).
+# Authors, statistics, jobs and the article directory stay in the global database.
+# New shards are appended to the end of the list and filled by the rebalance_shards command
+SHARDS = os.environ.get('SHARDS', 'default').split(',')
+SHARDS_GLOBAL_DATABASE = 'default'
+SHARDS_RING_REPLICAS = 64
+SHARDS_DELETED_AUTHORS_TIMEOUT = 60
+SHARDED_MODELS = ['feed.article', 'feed.comment', 'feed.likeoncomment', 'feed.articletrendingscore']
+
+# Archive of cold threads (feed.archive): articles older than ARCHIVE_AFTER seconds without recent comments
+# move there with their comments and likes in batches of ARCHIVE_BATCH_SIZE articles, rows are copied in chunks
+# of ARCHIVE_COPY_CHUNK_SIZE; reads go through the article directory. Disabled without ARCHIVE_DATABASE
+ARCHIVE_DATABASE = os.environ.get('ARCHIVE_DATABASE') or None
+ARCHIVE_AFTER = 365 * 24 * 60 * 60
+ARCHIVE_BATCH_SIZE = 100
+ARCHIVE_COPY_CHUNK_SIZE = 1000
+ARCHIVE_INTERVAL = 24 * 60 * 60
+
+for shard in SHARDS + ([ARCHIVE_DATABASE] if ARCHIVE_DATABASE else []):
+    DATABASES.setdefault(shard, {
+        **DATABASES['default'],
+        'NAME': BASE_DIR / f'{shard}.sqlite3',
+    })
+
+DATABASE_ROUTERS = ['pseudo_twitter.sharding.ShardRouter']
+
+# Cache
+# https://docs.djangoproject.com/en/5.1/topics/cache/
+
+# Feed caches: an in-process LRU in front of the cache shared by all workers (pseudo_twitter.tiered_cache).
+# The shared cache needs atomic incr (TieredCache refuses other backends): Redis at SHARED_CACHE_URL
+# (pip install redis) for several worker processes, the memory of the process otherwise (runserver).
+# Compressed bodies are content-addressed, their writes are not broadcast to the other workers
+CACHES = {
+    'default': {
+        'BACKEND': 'pseudo_twitter.tiered_cache.TieredCache',
+        'OPTIONS': {
+            'SHARED': 'shared',
+            'LOCAL_MAX_BYTES': 32 * 1024 * 1024,
+            'LOCAL_TIMEOUT': 5,
+            'POLL_INTERVAL': 0.5,
+            'IMMUTABLE_KEY_PREFIXES': ['compressed:'],
+        },
+    },
+    'shared': {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': os.environ['SHARED_CACHE_URL'],
+    } if os.environ.get('SHARED_CACHE_URL') else {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'shared',
+        'OPTIONS': {
+            'MAX_ENTRIES': 10000,
+        },
+    },
+}
+
+# Response compression, compressed bodies of the response cache are kept for COMPRESSION_CACHE_TIMEOUT seconds
+COMPRESSION_MIN_SIZE = 1024
+COMPRESSION_CACHE_ALIAS = 'default'
+COMPRESSION_CACHE_TIMEOUT = 300
+COMPRESSION_CACHE_MAX_SIZE = 4 * 1024 * 1024
+
+# Admission control for write endpoints, per worker process of the WSGI server (not applied under ASGI)
+# {url_name: {MAX_CONCURRENCY, MAX_QUEUE, MAX_WAIT (seconds), RETRY_AFTER (seconds)}}
+ADMISSION_CONTROL = {
+    'list_comments': {
+        'MAX_CONCURRENCY': 2,
+        'MAX_QUEUE': 32,
+        'MAX_WAIT': 2.0,
+        'RETRY_AFTER': 1,
+    },
+    'list_likes_create_like_on_comment': {
+        'MAX_CONCURRENCY': 2,
+        'MAX_QUEUE': 64,
+        'MAX_WAIT': 1.0,
+        'RETRY_AFTER': 1,
+    },
+}
+
+# Sampling profiler of feed requests, interval in seconds
+PROFILING_ENABLED = os.environ.get('PROFILING_ENABLED', 'False').lower() == 'true'
+PROFILING_SAMPLE_RATE = 0.01
+PROFILING_INTERVAL = 0.005
+PROFILING_PATH_PREFIX = '/feed/'
+
+# Request metrics: Server-Timing headers and the metrics endpoint.
+# With METRICS_DIR set every worker process writes its metrics there at most once per METRICS_FLUSH_INTERVAL seconds
+# METRICS_DIR must be local to the host: files of exited worker PIDs are removed when the metrics are read
+METRICS_PATH_PREFIX = '/feed/'
+METRICS_DIR = os.environ.get('METRICS_DIR') or None
+METRICS_FLUSH_INTERVAL = 1.0
+
+# Admin changelists count at most ADMIN_COUNT_LIMIT rows and estimate larger results (pseudo_twitter.pagination),
+# searches by author match at most ADMIN_AUTHOR_SEARCH_LIMIT authors
+ADMIN_COUNT_LIMIT = 10000
+ADMIN_AUTHOR_SEARCH_LIMIT = 1000
+
+# OpenAPI schema prebuilt by the build_schema command; generated on the first request when the file is missing
+OPENAPI_SCHEMA_FILE = BASE_DIR / 'openapi' / 'schema.yml'
+OPENAPI_SCHEMA_MAX_AGE = 60 * 60
+
 # Password validation
 # https://docs.djangoproject.com/en/5.1/ref/settings/#auth-password-validators
 AUTH_USER_MODEL = 'feed.Author'
@@ -90,6 +201,57 @@ AUTH_PASSWORD_VALIDATORS = [
     },
 ]
 
+# Bulk author provisioning (feed.provisioning): authors per bulk_create, per request of the bulk endpoint
+# and processes hashing passwords (None: one per CPU)
+AUTHOR_PROVISION_BATCH_SIZE = 1000
+AUTHOR_PROVISION_MAX_REQUEST = 1000
+PASSWORD_HASHING_WORKERS = None
+
+# Signed bearer tokens (feed.authentication.SignedTokenAuthentication), authors are cached in every worker
+# for AUTH_AUTHOR_CACHE_TIMEOUT seconds
+AUTH_TOKEN_LIFETIME = 24 * 60 * 60
+AUTH_AUTHOR_CACHE_SIZE = 1024
+AUTH_AUTHOR_CACHE_TIMEOUT = 5
+
+# Trending articles (feed.trending), half-life of a score in seconds. Scores are stored relative to an epoch
+# moved forward every TRENDING_REBASE_INTERVAL seconds
+TRENDING_HALF_LIFE = 6 * 60 * 60
+TRENDING_REBASE_INTERVAL = 7 * 24 * 60 * 60
+TRENDING_COMMENT_WEIGHT = 1.0
+TRENDING_LIKE_WEIGHT = 0.5
+TRENDING_MIN_SCORE = 0.01
+
+# Background jobs (feed.jobs), delays in seconds
+JOBS_RETRY_DELAY = 10
+JOBS_MAX_RETRY_DELAY = 60 * 60
+JOBS_LOCK_TIMEOUT = 10 * 60
+# Running jobs refresh their lock this often, must stay well below JOBS_LOCK_TIMEOUT
+JOBS_HEARTBEAT_INTERVAL = 60
+TRENDING_INTERVAL = 60
+PURGE_BATCH_SIZE = 500
+
+# Delta-sync change feed (feed.sync), older cursors require a full sync.
+# Changes are sent once they are SYNC_SAFETY_WINDOW seconds old, longer than any write takes to commit
+SYNC_TOMBSTONE_RETENTION = 30 * 24 * 60 * 60
+SYNC_SAFETY_WINDOW = 5
+
+# Coalescing cache of article and comment responses (pseudo_twitter.coalescing, feed.response_cache), in seconds.
+# Stale entries are served for RESPONSE_CACHE_STALE_GRACE while one request rebuilds them
+RESPONSE_CACHE_ALIAS = 'default'
+RESPONSE_CACHE_TIMEOUT = 60
+RESPONSE_CACHE_STALE_GRACE = 10
+RESPONSE_CACHE_LOCK_TIMEOUT = 5
+
+# Comment threads: replies rendered per comment and levels of replies under a top-level comment
+THREAD_MAX_REPLIES = 5
+THREAD_MAX_DEPTH = 3
+
+# Server-Sent Events of articles (feed.events, feed.sse), heartbeat in seconds
+EVENTS_HISTORY_SIZE = 256
+EVENTS_QUEUE_SIZE = 100
+EVENTS_MAX_ARTICLES = 1000
+EVENTS_HEARTBEAT = 15
+
 # Internationalization
 # https://docs.djangoproject.com/en/5.1/topics/i18n/
 
@@ -112,7 +274,21 @@ STATIC_URL = 'static/'
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 REST_FRAMEWORK = {
+    'DEFAULT_AUTHENTICATION_CLASSES': [
+        'rest_framework.authentication.SessionAuthentication',
+        'rest_framework.authentication.BasicAuthentication',
+        'feed.authentication.SignedTokenAuthentication',
+    ],
+    'DEFAULT_RENDERER_CLASSES': [
+        'pseudo_twitter.metrics.TimedJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
     'DEFAULT_SCHEMA_CLASS': 'drf_spectacular.openapi.AutoSchema',
     'DEFAULT_PAGINATION_CLASS': 'pseudo_twitter.pagination.CustomPagination',
     'PAGE_SIZE': 10,
 }
+
+# Page size cap of paginated lists (pseudo_twitter.pagination), lists with ?stream=true are streamed
+# in chunks of STREAM_CHUNK_SIZE rows instead
+PAGINATION_MAX_PAGE_SIZE = 100
+STREAM_CHUNK_SIZE = 500
@@ -0,0 +1,291 @@
+import bisect
+import hashlib
+import heapq
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import lru_cache
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models.constants import LOOKUP_SEP
+
+DEFAULT_SHARDS = ["default"]
+DEFAULT_GLOBAL_DATABASE = "default"
+DEFAULT_RING_REPLICAS = 64
+# Position of the archive among the shards, far from the ones of shards added later
+ARCHIVE_SHARD_INDEX = 1000
+
+_current_shard = ContextVar("current_shard", default=None)
+
+
+def get_shards() -> list[str]:
+    """
+    Database aliases of the shards, the position of a shard in the list must not change
+    """
+    return list(getattr(settings, "SHARDS", DEFAULT_SHARDS))
+
+
+def get_global_database() -> str:
+    return getattr(settings, "SHARDS_GLOBAL_DATABASE", DEFAULT_GLOBAL_DATABASE)
+
+
+def get_archive_database() -> str | None:
+    return getattr(settings, "ARCHIVE_DATABASE", None)
+
+
+def get_all_shards() -> list[str]:
+    """
+    Shards with the archive of cold threads: every database holding articles.
+    New articles go to the shards only, reads and maintenance cover the archive too
+    """
+    shards = get_shards()
+    archive = get_archive_database()
+    if archive and archive not in shards:
+        shards.append(archive)
+    return shards
+
+
+def get_shard_index(shard: str) -> int:
+    """
+    Stable number of the shard, used for id ranges and per-shard state
+    """
+    if shard == get_archive_database():
+        return ARCHIVE_SHARD_INDEX
+    return get_shards().index(shard)
+
+
+def is_sharded() -> bool:
+    """
+    False while the sharded models live in the global database, queries may then join them with global ones
+    """
+    return get_all_shards() != [get_global_database()]
+
+
+def is_sharded_model(model) -> bool:
+    return model._meta.label_lower in getattr(settings, "SHARDED_MODELS", ())
+
+
+def _hash(value: str) -> int:
+    return int.from_bytes(hashlib.blake2b(value.encode(), digest_size=8).digest(), "big")
+
+
+class HashRing:
+    """
+    Consistent hashing of keys onto shards, every shard owns `replicas` points of the ring,
+    so adding a shard moves only about 1/N of the keys
+    """
+
+    def __init__(self, shards: list[str], replicas: int = DEFAULT_RING_REPLICAS):
+        points = sorted((_hash(f"{shard}:{number}"), shard) for shard in shards for number in range(replicas))
+        self._points = [point for point, _ in points]
+        self._shards = [shard for _, shard in points]
+
+    def get_shard(self, key) -> str:
+        index = bisect.bisect(self._points, _hash(str(key))) % len(self._points)
+        return self._shards[index]
+
+
+@lru_cache(maxsize=8)
+def _build_ring(shards: tuple, replicas: int) -> HashRing:
+    return HashRing(list(shards), replicas)
+
+
+def get_ring() -> HashRing:
+    return _build_ring(tuple(get_shards()), getattr(settings, "SHARDS_RING_REPLICAS", DEFAULT_RING_REPLICAS))
+
+
+def get_current_shard() -> str | None:
+    return _current_shard.get()
+
+
+def set_current_shard(shard: str | None):
+    _current_shard.set(shard)
+
+
+@contextmanager
+def using_shard(shard: str | None):
+    """
+    Route queries of sharded models without an explicit database to the shard
+    """
+    token = _current_shard.set(shard)
+    try:
+        yield
+    finally:
+        _current_shard.reset(token)
+
+
+@contextmanager
+def shard_atomic(shard: str):
+    """
+    Route queries to the shard inside transactions of the global database and of the shard.
+    The two transactions commit one after another, a failure between the commits is repaired
+    by the counter and statistics reconcile commands
+    """
+    with using_shard(shard), transaction.atomic(using=get_global_database()), transaction.atomic(using=shard):
+        yield
+
+
+def for_each_shard(function) -> list:
+    """
+    Scatter: call function(shard) with queries routed to every shard in turn,
+    the function evaluates its querysets before it returns
+    :return: results in the order of the shards
+    """
+    results = []
+    for shard in get_all_shards():
+        with using_shard(shard):
+            results.append(function(shard))
+    return results
+
+
+class ShardRouter:
+    """
+    Sharded models (SHARDED_MODELS) go to the shard of the related instance, to the current shard
+    (using_shard) or to the first shard; all other models go to the global database.
+    Every database gets every table, tables of the models living elsewhere stay empty.
+    """
+
+    def _db_for_model(self, model, instance=None) -> str:
+        if not is_sharded_model(model):
+            return get_global_database()
+        if instance is not None and is_sharded_model(instance.__class__) and instance._state.db:
+            return instance._state.db
+        return get_current_shard() or get_shards()[0]
+
+    def db_for_read(self, model, **hints):
+        return self._db_for_model(model, hints.get("instance"))
+
+    def db_for_write(self, model, **hints):
+        return self._db_for_model(model, hints.get("instance"))
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
+
+
+class _Descending:
+    __slots__ = ("value",)
+
+    def __init__(self, value):
+        self.value = value
+
+    def __lt__(self, other):
+        return other.value < self.value
+
+    def __eq__(self, other):
+        return self.value == other.value
+
+
+def _get_value(instance, field_path: str):
+    value = instance
+    for name in field_path.split(LOOKUP_SEP):
+        value = getattr(value, name)
+    return value
+
+
+class ShardedQuerySet:
+    """
+    Gather: the same queryset on every shard, filters and ordering are applied to all of them,
+    slices merge the ordered rows of the shards.
+    Supports what the paginators and the change feed use: filter, exclude, order_by, count, slicing, iterator.
+    """
+
+    def __init__(self, queryset, shards: list[str]):
+        self.queryset = queryset
+        self.shards = shards
+        self.model = queryset.model
+
+    def _chain(self, method: str, *args, **kwargs) -> "ShardedQuerySet":
+        return ShardedQuerySet(getattr(self.queryset, method)(*args, **kwargs), self.shards)
+
+    def filter(self, *args, **kwargs):
+        return self._chain("filter", *args, **kwargs)
+
+    def exclude(self, *args, **kwargs):
+        return self._chain("exclude", *args, **kwargs)
+
+    def order_by(self, *field_names):
+        return self._chain("order_by", *field_names)
+
+    def select_related(self, *fields):
+        return self._chain("select_related", *fields)
+
+    def prefetch_related(self, *lookups):
+        return self._chain("prefetch_related", *lookups)
+
+    def all(self):
+        return self
+
+    @property
+    def ordered(self) -> bool:
+        return self.queryset.ordered
+
+    def per_shard(self) -> list:
+        return [self.queryset.using(shard) for shard in self.shards]
+
+    def count(self) -> int:
+        return sum(queryset.count() for queryset in self.per_shard())
+
+    def __len__(self):
+        return self.count()
+
+    def exists(self) -> bool:
+        return any(queryset.exists() for queryset in self.per_shard())
+
+    def _sort_key(self):
+        fields = []
+        for name in self.queryset.query.order_by:
+            descending = name.startswith("-")
+            fields.append((name.lstrip("-"), descending))
+
+        def key(instance):
+            values = []
+            for field_path, descending in fields:
+                value = _get_value(instance, field_path)
+                values.append(_Descending(value) if descending else value)
+            return tuple(values)
+
+        return key
+
+    def __getitem__(self, item):
+        if isinstance(item, int):
+            return self[item:item + 1][0]
+        if item.step is not None or item.stop is None:
+            raise ValueError("Only slices with a stop are supported on sharded querysets")
+        start = item.start or 0
+        # Every shard may hold all rows of the slice
+        rows = heapq.merge(
+            *[queryset[:item.stop] for queryset in self.per_shard()],
+            key=self._sort_key()
+        )
+        return list(rows)[start:item.stop]
+
+    def __iter__(self):
+        return heapq.merge(*self.per_shard(), key=self._sort_key())
+
+    def iterator(self, chunk_size: int | None = None):
+        """
+        Ordered rows of all shards, every shard read in chunks
+        """
+        return heapq.merge(
+            *[queryset.iterator(chunk_size=chunk_size) for queryset in self.per_shard()],
+            key=self._sort_key()
+        )
+
+
+def shard_queryset(queryset, default_ordering=("pk",)):
+    """
+    Queryset of a sharded model over all shards: the queryset itself on one shard,
+    a ShardedQuerySet ordered by default_ordering (unless already ordered) on several ones
+    """
+    shards = get_all_shards()
+    if len(shards) == 1:
+        return queryset
+    if not queryset.ordered:
+        queryset = queryset.order_by(*default_ordering)
+    return ShardedQuerySet(queryset, shards)
+
+
+def iter_shard_querysets(queryset) -> list:
+    if isinstance(queryset, ShardedQuerySet):
+        return queryset.per_shard()
+    return [queryset]
@@ -0,0 +1,269 @@
+import pickle
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+from django.core.exceptions import ImproperlyConfigured
+
+from pseudo_twitter.metrics import record_cache
+
+DEFAULT_SHARED_ALIAS = "shared"
+DEFAULT_LOCAL_MAX_BYTES = 32 * 1024 * 1024
+DEFAULT_LOCAL_TIMEOUT = 5
+DEFAULT_POLL_INTERVAL = 0.5
+DEFAULT_LOG_SIZE = 1000
+
+SEQUENCE_KEY = "tiered:invalidations"
+LOG_KEY = "tiered:invalidation:{}"
+CLEAR_MARKER = "*"
+
+# Shared backends with atomic add and incr, the invalidation log loses entries on any other backend.
+# LocMemCache is atomic inside its process only, so it fits a single process (runserver, tests)
+ATOMIC_SHARED_BACKENDS = (
+    "django.core.cache.backends.redis.RedisCache",
+    "django.core.cache.backends.memcached.PyMemcacheCache",
+    "django.core.cache.backends.memcached.PyLibMCCache",
+    "django.core.cache.backends.locmem.LocMemCache",
+)
+
+
+class LocalLRU:
+    """
+    Pickled values in LRU order, bounded by their total size in bytes
+    """
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+
+    def get(self, key: str):
+        """
+        :return: pickled value or None on a miss
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires, data = entry
+            if expires <= time.monotonic():
+                self._pop(key)
+                return None
+            self._entries.move_to_end(key)
+            return data
+
+    def set(self, key: str, data: bytes, timeout: float):
+        with self._lock:
+            self._pop(key)
+            if timeout <= 0 or len(data) > self.max_bytes:
+                return
+            self._entries[key] = (time.monotonic() + timeout, data)
+            self.size += len(data)
+            while self.size > self.max_bytes:
+                oldest_key = next(iter(self._entries))
+                self._pop(oldest_key)
+
+    def delete(self, key: str):
+        with self._lock:
+            self._pop(key)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.size = 0
+
+    def _pop(self, key: str):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self.size -= len(entry[1])
+
+
+class TieredCache(BaseCache):
+    """
+    In-process LRU in front of a shared cache (OPTIONS["SHARED"] alias).
+    Writes go to the shared cache and are appended to an invalidation log kept in it; every process
+    polls the log at most once per POLL_INTERVAL and drops the changed keys from its LRU.
+    Local entries live at most LOCAL_TIMEOUT seconds, which bounds staleness when log entries are lost.
+    The shared backend must have atomic add and incr (ATOMIC_SHARED_BACKENDS), such as Redis.
+    Keys starting with one of IMMUTABLE_KEY_PREFIXES hold content-addressed values that never change
+    under the same key, writing them is not published to the log.
+    """
+
+    def __init__(self, location, params):
+        super().__init__(params)
+        options = params.get("OPTIONS", {})
+        self.shared_alias = options.get("SHARED", DEFAULT_SHARED_ALIAS)
+        shared_backend = settings.CACHES.get(self.shared_alias, {}).get("BACKEND")
+        if shared_backend not in ATOMIC_SHARED_BACKENDS:
+            raise ImproperlyConfigured(
+                f"The shared cache {self.shared_alias!r} of TieredCache uses {shared_backend} without atomic incr, "
+                f"use one of: {', '.join(ATOMIC_SHARED_BACKENDS)}."
+            )
+        self.immutable_prefixes = tuple(options.get("IMMUTABLE_KEY_PREFIXES", ()))
+        self.local_timeout = options.get("LOCAL_TIMEOUT", DEFAULT_LOCAL_TIMEOUT)
+        self.poll_interval = options.get("POLL_INTERVAL", DEFAULT_POLL_INTERVAL)
+        self.log_size = options.get("LOG_SIZE", DEFAULT_LOG_SIZE)
+        self.local = LocalLRU(options.get("LOCAL_MAX_BYTES", DEFAULT_LOCAL_MAX_BYTES))
+
+        self._poll_lock = threading.Lock()
+        self._polled_at = 0.0
+        self._sequence = None
+
+    @property
+    def shared(self):
+        return caches[self.shared_alias]
+
+    def _local_key(self, key, version=None) -> str:
+        return self.make_and_validate_key(key, version=version)
+
+    def _local_timeout(self, timeout) -> float:
+        if timeout is DEFAULT_TIMEOUT:
+            timeout = self.default_timeout
+        if timeout is None:
+            return self.local_timeout
+        return min(timeout, self.local_timeout)
+
+    def _store_local(self, key, value, timeout, version):
+        data = pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+        self.local.set(self._local_key(key, version), data, self._local_timeout(timeout))
+
+    # Invalidation log
+
+    def _is_mutable(self, key) -> bool:
+        return not str(key).startswith(self.immutable_prefixes)
+
+    def _publish(self, local_keys: list[str]):
+        if not local_keys:
+            return
+        shared = self.shared
+        shared.add(SEQUENCE_KEY, 0, None)
+        for local_key in local_keys:
+            sequence = shared.incr(SEQUENCE_KEY)
+            shared.set(LOG_KEY.format(sequence), local_key, None)
+            shared.delete(LOG_KEY.format(sequence - self.log_size))
+
+    def _poll(self):
+        now = time.monotonic()
+        if now - self._polled_at < self.poll_interval:
+            return
+        with self._poll_lock:
+            if now - self._polled_at < self.poll_interval:
+                return
+            self._polled_at = now
+
+            sequence = self.shared.get(SEQUENCE_KEY, 0)
+            last_sequence, self._sequence = self._sequence, sequence
+            if sequence == last_sequence:
+                return
+            if last_sequence is None or sequence < last_sequence or sequence - last_sequence > self.log_size:
+                # First poll, the log was reset or this process fell behind it
+                self.local.clear()
+                return
+
+            log_keys = [LOG_KEY.format(number) for number in range(last_sequence + 1, sequence + 1)]
+            changed = self.shared.get_many(log_keys)
+            if len(changed) < len(log_keys) or CLEAR_MARKER in changed.values():
+                self.local.clear()
+                return
+            for local_key in changed.values():
+                self.local.delete(local_key)
+
+    # Cache API
+
+    def get(self, key, default=None, version=None):
+        self._poll()
+        data = self.local.get(self._local_key(key, version))
+        if data is not None:
+            record_cache("local", True)
+            return pickle.loads(data)
+
+        sentinel = object()
+        value = self.shared.get(key, sentinel, version=version)
+        record_cache("shared", value is not sentinel)
+        if value is sentinel:
+            return default
+        self._store_local(key, value, None, version)
+        return value
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        self.shared.set(key, value, timeout, version=version)
+        self._store_local(key, value, timeout, version)
+        if self._is_mutable(key):
+            self._publish([self._local_key(key, version)])
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        added = self.shared.add(key, value, timeout, version=version)
+        if added:
+            self._store_local(key, value, timeout, version)
+            if self._is_mutable(key):
+                self._publish([self._local_key(key, version)])
+        return added
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        return self.shared.touch(key, timeout, version=version)
+
+    def delete(self, key, version=None):
+        local_key = self._local_key(key, version)
+        deleted = self.shared.delete(key, version=version)
+        self.local.delete(local_key)
+        self._publish([local_key])
+        return deleted
+
+    def has_key(self, key, version=None):
+        self._poll()
+        if self.local.get(self._local_key(key, version)) is not None:
+            return True
+        return self.shared.has_key(key, version=version)
+
+    def incr(self, key, delta=1, version=None):
+        value = self.shared.incr(key, delta, version=version)
+        local_key = self._local_key(key, version)
+        self.local.delete(local_key)
+        self._publish([local_key])
+        return value
+
+    def get_many(self, keys, version=None):
+        self._poll()
+        found = {}
+        missing = []
+        for key in keys:
+            data = self.local.get(self._local_key(key, version))
+            if data is None:
+                missing.append(key)
+            else:
+                record_cache("local", True)
+                found[key] = pickle.loads(data)
+
+        if missing:
+            shared_values = self.shared.get_many(missing, version=version)
+            for key in missing:
+                record_cache("shared", key in shared_values)
+            for key, value in shared_values.items():
+                self._store_local(key, value, None, version)
+            found.update(shared_values)
+        return found
+
+    def set_many(self, data, timeout=DEFAULT_TIMEOUT, version=None):
+        failed = self.shared.set_many(data, timeout, version=version)
+        for key, value in data.items():
+            if key not in failed:
+                self._store_local(key, value, timeout, version)
+        self._publish([self._local_key(key, version) for key in data if self._is_mutable(key)])
+        return failed
+
+    def delete_many(self, keys, version=None):
+        keys = list(keys)
+        self.shared.delete_many(keys, version=version)
+        local_keys = [self._local_key(key, version) for key in keys]
+        for local_key in local_keys:
+            self.local.delete(local_key)
+        self._publish(local_keys)
+
+    def clear(self):
+        self.shared.clear()
+        self.local.clear()
+        self._publish([CLEAR_MARKER])
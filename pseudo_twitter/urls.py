@@ -1,10 +1,17 @@
 from django.contrib import admin
 from django.urls import path, include
-from drf_spectacular.views import SpectacularAPIView, SpectacularSwaggerView
+
+from pseudo_twitter.admission import AdmissionStatsView
+from pseudo_twitter.metrics_views import MetricsView
+from pseudo_twitter.profiling import ProfilingStacksView
+from pseudo_twitter.schema import StaticSchemaView, swagger_view
 
 urlpatterns = [
-    path('api/schema/', SpectacularAPIView.as_view(), name='schema'),
-    path('swagger/', SpectacularSwaggerView.as_view(url_name='schema'), name='docs'),
+    path('api/schema/', StaticSchemaView.as_view(), name='schema'),
+    path('swagger/', swagger_view, name='docs'),
     path('admin/', admin.site.urls),
     path('feed/', include("feed.urls")),
+    path('admission/stats', AdmissionStatsView.as_view(), name='admission_stats'),
+    path('metrics', MetricsView.as_view(), name='metrics'),
+    path('profiling/stacks', ProfilingStacksView.as_view(), name='profiling_stacks'),
 ]